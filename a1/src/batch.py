@@ -0,0 +1,227 @@
+# Headless batch mode: runs the algorithms on generated instances without any menus or windows and writes the
+# scores and timings to a JSON or CSV file.
+#
+# Examples:
+#   python3 batch.py --packages 15 30 50 --map-sizes 60 120 --algorithms hc sa ga --repeats 3 --output results.csv
+#   python3 batch.py --config sweep.json
+#
+# A configuration file (JSON, or TOML on Python 3.11+) has the same keys as the command line options:
+#   {"packages": [15, 30], "map_sizes": [60], "algorithms": ["hc", "tabu"], "repeats": 2, "seed": 7,
+#    "output": "results.json", "parameters": {"hc": {"num_iterations": 2000}}}
+# Options given on the command line override the ones in the file.
+# time_limit, max_evaluations and target_score stop every run early (see termination.Termination), and the reason each
+# run stopped is written with its results.
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+
+from problem import generate_package_stream, get_instance
+from hill_climbing import get_hc_solution, get_sahc_solution
+from simulated_annealing import get_sa_solution
+from stats import SolverStats
+from tabu_search import get_tabu_solution
+from termination import Termination
+from genetic import genetic_algorithm
+from evaluation import evaluate_permutation
+
+ALGORITHMS = {
+    "hc": get_hc_solution,
+    "sahc": get_sahc_solution,
+    "sa": get_sa_solution,
+    "tabu": get_tabu_solution,
+    "ga": genetic_algorithm,
+}
+
+DEFAULT_CONFIG = {
+    "packages": [15, 30, 50],
+    "map_sizes": [60],
+    "algorithms": list(ALGORITHMS),
+    "repeats": 1,
+    "seed": 0,
+    "output": "-",
+    "time_limit": None,
+    "max_evaluations": None,
+    "target_score": None,
+    "parameters": {},
+}
+
+RESULT_FIELDS = ["algorithm", "num_packages", "map_size", "repeat", "seed", "score", "time", "reason", "parameters", "stats"]
+
+
+# Default parameters of each algorithm, the same ones used by main.py. Some of them depend on the number of packages.
+def default_parameters(algorithm, num_packages):
+    if algorithm == "hc":
+        return {"num_iterations": 1000}
+    elif algorithm == "sa":
+        return {"cooling": 0.99}
+    elif algorithm == "tabu":
+        return {"num_iterations": 200, "base_tabu_tenure": 5, "max_stagnation": num_packages}
+    elif algorithm == "ga":
+        generations = num_packages * 20
+        return {"num_generations": generations, "population_size": int(generations / 10)}
+    return {}
+
+
+# Reads a JSON or TOML configuration file, depending on its extension.
+def load_config(path):
+    if path.endswith(".toml"):
+        import tomllib
+
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+    with open(path) as file:
+        return json.load(file)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run the delivery scheduling algorithms without the interactive menus.")
+    parser.add_argument("--config", help="JSON or TOML file with the batch configuration")
+    parser.add_argument("--packages", type=int, nargs="+", help="numbers of packages of the instances")
+    parser.add_argument("--map-sizes", type=int, nargs="+", dest="map_sizes", help="map sizes of the instances")
+    parser.add_argument("--algorithms", nargs="+", choices=list(ALGORITHMS), help="algorithms to run")
+    parser.add_argument("--repeats", type=int, help="instances generated for each number of packages and map size")
+    parser.add_argument("--seed", type=int, help="base seed, every instance and run gets a seed derived from it")
+    parser.add_argument("--output", help="results file (.json or .csv), or - for JSON on the standard output")
+    parser.add_argument("--time-limit", type=float, dest="time_limit", help="seconds after which each run stops")
+    parser.add_argument("--max-evaluations", type=int, dest="max_evaluations", help="evaluations after which each run stops")
+    parser.add_argument("--target-score", type=float, dest="target_score", help="score at which each run stops")
+    parser.add_argument(
+        "--param",
+        action="append",
+        default=[],
+        metavar="ALGORITHM.NAME=VALUE",
+        help="algorithm parameter, e.g. ga.population_size=100 (the value is read as JSON when possible)",
+    )
+    return parser
+
+
+def parse_args(argv=None):
+    return build_parser().parse_args(argv)
+
+
+# Merges the defaults, the configuration file and the command line options into one configuration.
+def build_config(args):
+    config = dict(DEFAULT_CONFIG)
+    config["parameters"] = {}
+    if args.config:
+        config.update(load_config(args.config))
+    for key in ("packages", "map_sizes", "algorithms", "repeats", "seed", "output", "time_limit", "max_evaluations", "target_score"):
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+
+    parameters = {algorithm: dict(values) for algorithm, values in config.get("parameters", {}).items()}
+    for param in args.param:
+        name, equals, value = param.partition("=")
+        algorithm, dot, key = name.partition(".")
+        if not equals or not dot or not key:
+            raise ValueError(f"Invalid parameter {param!r}, expected ALGORITHM.NAME=VALUE")
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            pass
+        parameters.setdefault(algorithm, {})[key] = value
+    config["parameters"] = parameters
+
+    unknown = [algorithm for algorithm in config["algorithms"] if algorithm not in ALGORITHMS]
+    if unknown:
+        raise ValueError(f"Unknown algorithms: {', '.join(unknown)}")
+    # Parameters of an algorithm that does not exist would be silently ignored.
+    unknown = [f"{algorithm}.{key}" for algorithm, values in parameters.items() if algorithm not in ALGORITHMS for key in values]
+    if unknown:
+        raise ValueError(f"Parameters of unknown algorithms: {', '.join(unknown)}")
+    return config
+
+
+# Runs every algorithm on every instance of the configuration and returns one result dictionary per run,
+# including the counters and phase timings of the run (see stats.SolverStats) and the reason it stopped.
+def run_batch(config, log=False):
+    results = []
+    for num_packages in config["packages"]:
+        for map_size in config["map_sizes"]:
+            for repeat in range(config["repeats"]):
+                seed = f"{config['seed']}:{num_packages}:{map_size}:{repeat}"
+                package_stream = generate_package_stream(num_packages, map_size, rng=random.Random(seed))
+                instance = get_instance(package_stream)
+
+                for algorithm in config["algorithms"]:
+                    parameters = default_parameters(algorithm, num_packages)
+                    parameters.update(config["parameters"].get(algorithm, {}))
+
+                    stats = SolverStats()
+                    termination = Termination(config["time_limit"], config["max_evaluations"], config["target_score"])
+                    start_time = time.perf_counter()
+                    solution = ALGORITHMS[algorithm](
+                        package_stream=instance,
+                        rng=random.Random(f"{seed}:{algorithm}"),
+                        stats=stats,
+                        termination=termination,
+                        **parameters,
+                    )
+                    execution_time = time.perf_counter() - start_time
+
+                    result = {
+                        "algorithm": algorithm,
+                        "num_packages": num_packages,
+                        "map_size": map_size,
+                        "repeat": repeat,
+                        "seed": seed,
+                        "score": evaluate_permutation(instance, solution),
+                        "time": execution_time,
+                        "reason": termination.reason,
+                        "parameters": parameters,
+                        "stats": stats.as_dict(),
+                    }
+                    results.append(result)
+                    if log:
+                        print(
+                            f"{algorithm} packages={num_packages} map={map_size} repeat={repeat}: "
+                            f"score={result['score']:.3f} time={execution_time:.3f}s",
+                            file=sys.stderr,
+                        )
+    return results
+
+
+# Writes the results as JSON or CSV, depending on the extension of the output path. "-" writes JSON to the standard output.
+# The directory of the path is created if needed.
+def write_results(results, output):
+    create_output_directory(output)
+    if output == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif output.endswith(".csv"):
+        with open(output, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=RESULT_FIELDS)
+            writer.writeheader()
+            for result in results:
+                writer.writerow(dict(result, parameters=json.dumps(result["parameters"]), stats=json.dumps(result["stats"])))
+    else:
+        with open(output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+# Creates the directory of the output path, if it has one, so that a bad path fails before the batch runs.
+def create_output_directory(output):
+    directory = os.path.dirname(output) if output != "-" else ""
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        config = build_config(args)
+        create_output_directory(config["output"])
+    except (ValueError, OSError) as error:
+        parser.error(str(error))
+    results = run_batch(config, log=config["output"] != "-")
+    write_results(results, config["output"])
+
+
+if __name__ == "__main__":
+    main()
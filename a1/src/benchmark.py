@@ -0,0 +1,255 @@
+# Reproducible benchmark suite. Every instance is generated from a fixed seed, so runs on different machines or commits
+# measure the same work.
+#  - micro: throughput (operations per second) of the evaluation functions, the neighbour operators and the crossovers.
+#  - macro: quality versus time of each solver, running it with increasing budgets (iterations, generations or cooling).
+# Results are written as JSON and can be compared with a previous run to detect regressions:
+#
+#   python3 benchmark.py --output baseline.json
+#   python3 benchmark.py --baseline baseline.json              (exit status 1 if something regressed)
+#   python3 benchmark.py --suites micro --sizes 15 5000 --min-time 0.5
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from delta import RouteState
+from evaluation import evaluate_solution, evaluate_permutation, evaluate_permutations
+from genetic import CROSSOVERS, genetic_algorithm
+from hill_climbing import get_hc_solution, get_sahc_solution
+from neighbours import MOVE_TYPES
+from problem import generate_package_stream, get_instance
+from simulated_annealing import get_sa_solution
+from tabu_search import get_tabu_solution
+
+SEED = 2324
+MAP_SIZE = 200
+MICRO_SIZES = [15, 50, 200, 1000, 5000]
+MACRO_SIZES = [15, 50, 200]
+# Population evaluated at once by the evaluate_permutations micro-benchmark.
+POPULATION_SIZE = 64
+# Allowed relative drop of throughput (micro) or score (macro) before a result counts as a regression.
+TOLERANCE = 0.2
+
+
+# Builds the benchmark instance of a given size. It only depends on the seed and the size.
+def make_instance(num_packages, seed=SEED):
+    package_stream = generate_package_stream(num_packages, MAP_SIZE, rng=make_rng(seed, num_packages))
+    return package_stream, get_instance(package_stream)
+
+
+# Random generator of one benchmark, so every benchmark draws the same numbers whatever ran before it.
+def make_rng(seed, *keys):
+    return random.Random(":".join(str(key) for key in (seed,) + keys))
+
+
+# Random permutation of the packages of an instance.
+def random_permutation(instance, rng):
+    permutation = instance.identity()
+    rng.shuffle(permutation)
+    return permutation
+
+
+# Micro-benchmarks. Each one receives the package list, its instance and a random generator and returns the function to time.
+
+def bench_evaluate_solution(package_stream, instance, rng):
+    return lambda: evaluate_solution(package_stream)
+
+
+def bench_evaluate_permutation(package_stream, instance, rng):
+    permutation = instance.identity()
+    return lambda: evaluate_permutation(instance, permutation)
+
+
+def bench_evaluate_permutations(package_stream, instance, rng):
+    population = np.array([random_permutation(instance, rng) for _ in range(POPULATION_SIZE)])
+    return lambda: evaluate_permutations(instance, population)
+
+
+# A random move applied to the route and undone, which is what producing a neighbour costs.
+def bench_move(move_type):
+    def bench(package_stream, instance, rng):
+        solution = instance.identity()
+
+        def run():
+            move = move_type.sample(solution, rng)
+            move.apply(solution)
+            move.undo(solution)
+
+        return run
+
+    return bench
+
+
+# Incremental score of a random move against the cached route state.
+def bench_delta(move_type):
+    def bench(package_stream, instance, rng):
+        solution = instance.identity()
+        state = RouteState(solution, instance)
+        return lambda: state.delta(move_type.sample(solution, rng))
+
+    return bench
+
+
+def bench_crossover(crossover_function):
+    def bench(package_stream, instance, rng):
+        parent1 = random_permutation(instance, rng)
+        parent2 = random_permutation(instance, rng)
+        return lambda: crossover_function(parent1, parent2, rng)
+
+    return bench
+
+
+MICRO_BENCHMARKS = {
+    "evaluate_solution": bench_evaluate_solution,
+    "evaluate_permutation": bench_evaluate_permutation,
+    "evaluate_permutations": bench_evaluate_permutations,
+}
+for move_type in MOVE_TYPES:
+    MICRO_BENCHMARKS[f"move:{move_type.__name__.lower()}"] = bench_move(move_type)
+    MICRO_BENCHMARKS[f"delta:{move_type.__name__.lower()}"] = bench_delta(move_type)
+for name, crossover_function in CROSSOVERS.items():
+    MICRO_BENCHMARKS[f"crossover:{name}"] = bench_crossover(crossover_function)
+
+
+# Macro-benchmarks: the solver, its fixed parameters for an instance size, the budget parameter and its values,
+# and the largest instance it runs on.
+MACRO_BENCHMARKS = {
+    "hc": (get_hc_solution, lambda size: {}, "num_iterations", [250, 1000, 4000], None),
+    "sahc": (get_sahc_solution, lambda size: {}, None, [None], 50),
+    "sa": (get_sa_solution, lambda size: {}, "cooling", [0.95, 0.99, 0.995, 0.999], None),
+    "tabu": (get_tabu_solution, lambda size: {"base_tabu_tenure": 5, "max_stagnation": size}, "num_iterations", [50, 200, 800], None),
+    "ga": (genetic_algorithm, lambda size: {"population_size": 40}, "num_generations", [25, 100, 400], None),
+}
+
+
+# Times a function like timeit: the number of calls doubles until a batch lasts min_time, and the fastest of
+# the repeated batches gives the time per call.
+def time_function(function, min_time, repeats):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+
+    best = elapsed
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return best / number
+
+
+def run_micro(names, sizes, min_time, repeats, log=False):
+    results = []
+    for size in sizes:
+        package_stream, instance = make_instance(size)
+        instance.distances()
+        for name in names:
+            benchmark = MICRO_BENCHMARKS[name](package_stream, instance, make_rng(SEED, name, size))
+            seconds = time_function(benchmark, min_time, repeats)
+            results.append({"name": name, "size": size, "seconds_per_op": seconds, "ops_per_sec": 1 / seconds})
+            if log:
+                print(f"micro {name:<24} {size:>6} {1 / seconds:14.1f} ops/s", file=sys.stderr)
+    return results
+
+
+# Runs each solver with every value of its budget parameter. The (time, score) points form its quality-versus-time curve.
+def run_macro(names, sizes, log=False):
+    results = []
+    for size in sizes:
+        _, instance = make_instance(size)
+        instance.distances()
+        for name in names:
+            solver, parameters, budget_name, budgets, max_size = MACRO_BENCHMARKS[name]
+            if max_size is not None and size > max_size:
+                continue
+            for budget in budgets:
+                solver_args = parameters(size)
+                if budget_name is not None:
+                    solver_args[budget_name] = budget
+                start = time.perf_counter()
+                solution = solver(package_stream=instance, rng=make_rng(SEED, name, size, budget), **solver_args)
+                elapsed = time.perf_counter() - start
+                score = evaluate_permutation(instance, solution)
+                results.append({"solver": name, "size": size, "budget": budget, "time": elapsed, "score": score})
+                if log:
+                    print(f"macro {name:<6} {size:>6} budget={budget}: score={score:.3f} time={elapsed:.3f}s", file=sys.stderr)
+    return results
+
+
+# Compares the results with a baseline and returns a description of each regression found.
+# Micro results regress when their throughput drops, macro results when their score gets worse, by more than the tolerance.
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    baseline_micro = {(entry["name"], entry["size"]): entry for entry in baseline.get("micro", [])}
+    for entry in results.get("micro", []):
+        old = baseline_micro.get((entry["name"], entry["size"]))
+        if old is not None and entry["ops_per_sec"] < old["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"micro {entry['name']} size={entry['size']}: {entry['ops_per_sec']:.1f} ops/s (baseline {old['ops_per_sec']:.1f})"
+            )
+
+    baseline_macro = {(entry["solver"], entry["size"], entry["budget"]): entry for entry in baseline.get("macro", [])}
+    for entry in results.get("macro", []):
+        old = baseline_macro.get((entry["solver"], entry["size"], entry["budget"]))
+        # Scores are negative costs, so a worse score is a cost more than tolerance above the baseline.
+        if old is not None and -entry["score"] > -old["score"] * (1 + tolerance):
+            regressions.append(
+                f"macro {entry['solver']} size={entry['size']} budget={entry['budget']}: score {entry['score']:.3f} (baseline {old['score']:.3f})"
+            )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the reproducible benchmark suite.")
+    parser.add_argument("--suites", nargs="+", choices=["micro", "macro"], default=["micro", "macro"])
+    parser.add_argument("--sizes", type=int, nargs="+", help="instance sizes (default: 15 to 5000 for micro, 15 to 200 for macro)")
+    parser.add_argument("--micro", nargs="+", choices=list(MICRO_BENCHMARKS), default=list(MICRO_BENCHMARKS))
+    parser.add_argument("--solvers", nargs="+", choices=list(MACRO_BENCHMARKS), default=list(MACRO_BENCHMARKS))
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of each timed micro-benchmark batch")
+    parser.add_argument("--repeats", type=int, default=3, help="timed batches of each micro-benchmark, the fastest is kept")
+    parser.add_argument("--output", help="JSON file where the results are written")
+    parser.add_argument("--baseline", help="JSON file of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = {
+        "metadata": {
+            "seed": SEED,
+            "map_size": MAP_SIZE,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    }
+    if "micro" in args.suites:
+        results["micro"] = run_micro(args.micro, args.sizes or MICRO_SIZES, args.min_time, args.repeats, log=True)
+    if "macro" in args.suites:
+        results["macro"] = run_macro(args.solvers, args.sizes or MACRO_SIZES, log=True)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
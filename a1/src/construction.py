@@ -0,0 +1,234 @@
+import math
+
+import numpy as np
+
+from spatial import SpatialGrid
+
+# Number of nearest packages considered by greedy edge (candidate edges) and cheapest insertion (candidate positions).
+CONSTRUCTION_CANDIDATES = 8
+
+
+# Constructive heuristics that build a good first route for the solvers, instead of starting from the order in which the
+# packages were generated. Each one takes a problem.ProblemInstance and returns an int32 permutation of it, and uses a
+# spatial.SpatialGrid so that no distance matrix is needed:
+#     nearest_neighbour   from the depot, always drive to the closest package not delivered yet
+#     greedy_edge         join packages with the shortest edges first, then link the fragments from the depot
+#     cheapest_insertion  insert packages one by one where they increase the cost the least, urgent packages first
+# The solvers accept the name of one of them as `construction` (see problem.as_instance).
+
+
+# Nearest-neighbour route starting at the depot.
+def nearest_neighbour_route(instance):
+    xs = instance.coordinates_x
+    ys = instance.coordinates_y
+    grid = SpatialGrid(xs, ys)
+    route = np.empty(len(instance), dtype=np.int32)
+    x, y = 0.0, 0.0
+    for position in range(len(instance)):
+        package = grid.nearest(x, y)
+        grid.remove(package)
+        route[position] = package
+        x, y = xs[package], ys[package]
+    return route
+
+
+# Greedy edge route. Candidate edges (each package to its nearest packages, and the depot to every package) are taken
+# shortest first, skipping those that would give a package more than two neighbours, the depot more than one, or close a
+# cycle. The resulting paths are then chained from the depot, always continuing with the closest free path end.
+def greedy_edge_route(instance, num_candidates=CONSTRUCTION_CANDIDATES):
+    n = len(instance)
+    if n == 0:
+        return np.empty(0, dtype=np.int32)
+    xs = instance.coordinates_x
+    ys = instance.coordinates_y
+    depot = n
+
+    neighbours = instance.candidates(num_candidates)
+    first = np.repeat(np.arange(n), neighbours.shape[1])
+    second = neighbours.ravel().astype(np.int64)
+    edges = np.unique(np.minimum(first, second) * (n + 1) + np.maximum(first, second))
+    first = np.concatenate((edges // (n + 1), np.arange(n)))
+    second = np.concatenate((edges % (n + 1), np.full(n, depot)))
+    end_x = np.append(xs, 0.0)[second]
+    end_y = np.append(ys, 0.0)[second]
+    lengths = np.hypot(xs[first] - end_x, ys[first] - end_y)
+
+    degree = [0] * (n + 1)
+    parent = list(range(n + 1))
+    adjacent = [[] for _ in range(n)]
+    start = None
+    for edge in np.argsort(lengths, kind="stable").tolist():
+        a = int(first[edge])
+        b = int(second[edge])
+        if degree[a] == 2 or degree[b] == (1 if b == depot else 2):
+            continue
+        root_a = find_root(parent, a)
+        root_b = find_root(parent, b)
+        if root_a == root_b:
+            continue
+        parent[root_a] = root_b
+        degree[a] += 1
+        degree[b] += 1
+        if b == depot:
+            start = a
+        else:
+            adjacent[a].append(b)
+            adjacent[b].append(a)
+
+    ends = SpatialGrid(xs, ys, indices=[i for i in range(n) if degree[i] - (i == start) < 2])
+    if start is None:
+        start = ends.nearest(0.0, 0.0)
+    route = []
+    while True:
+        ends.remove(start)
+        previous = None
+        package = start
+        while True:
+            route.append(package)
+            following = [other for other in adjacent[package] if other != previous]
+            if not following:
+                break
+            previous, package = package, following[0]
+        if package != start:
+            ends.remove(package)
+        if len(route) == n:
+            break
+        start = ends.nearest(xs[package], ys[package])
+    return np.array(route, dtype=np.int32)
+
+
+# Root of a package in the union-find forest used by greedy_edge_route, compressing the path on the way.
+def find_root(parent, i):
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+
+# Cost of delivering packages after driving the given distances: the expected fragile damage plus the urgent lateness.
+# Normal packages cost nothing, since their breaking cost is 0 and their delivery time infinite.
+def stop_costs(instance, packages, dist):
+    damage = (1 - (1 - instance.breaking_chance[packages]) ** dist) * instance.breaking_cost[packages]
+    return damage + np.maximum(dist - instance.delivery_time[packages], 0) * 0.3
+
+
+# Partial route built by cheapest insertion. For every position it keeps the package delivered there, the distance driven
+# to reach it and the package's damage or lateness cost, so that the exact cost of inserting another package anywhere can
+# be computed. It can start empty or from an existing route (an int array of package indices of the instance).
+class InsertionRoute:
+    def __init__(self, instance, route=None):
+        n = len(instance)
+        self.instance = instance
+        self.route = np.empty(n, dtype=np.int64)
+        self.arrival = np.empty(n)
+        self.costs = np.empty(n)
+        self.position = np.empty(n, dtype=np.int64)
+        self.size = 0
+        route = np.asarray(route if route is not None else (), dtype=np.int64)
+        self.grid = SpatialGrid(instance.coordinates_x, instance.coordinates_y, indices=route)
+        if len(route):
+            size = len(route)
+            steps = np.hypot(np.diff(instance.coordinates_x[route], prepend=0.0), np.diff(instance.coordinates_y[route], prepend=0.0))
+            self.route[:size] = route
+            self.arrival[:size] = np.cumsum(steps)
+            self.costs[:size] = stop_costs(instance, route, self.arrival[:size])
+            self.position[route] = np.arange(size)
+            self.size = size
+
+    # Inserts a package where the exact cost of the route grows the least, trying the positions next to its nearest
+    # packages already in the route and the start and end of the route. The cost counts the extra distance, the package's
+    # own damage or lateness, and the damage and lateness added to every package after it. Returns the chosen position.
+    # Re-pricing the packages after a position is the expensive part, so the positions are tried from the lowest lower
+    # bound of their cost: the cost without the packages after it, plus the lateness of the urgent packages after it that
+    # are already late, which grows exactly by the detour. Once that bound reaches the best cost, no position can beat it.
+    def add(self, package, num_candidates=CONSTRUCTION_CANDIDATES):
+        instance = self.instance
+        xs = instance.coordinates_x
+        ys = instance.coordinates_y
+        route, arrival, costs, size = self.route, self.arrival, self.costs, self.size
+        x, y = xs[package], ys[package]
+        # Own damage or lateness of the package, as in stop_costs.
+        chance = float(instance.breaking_chance[package])
+        breaking_cost = float(instance.breaking_cost[package])
+        deadline = float(instance.delivery_time[package])
+        slots = {0, size}
+        for near in self.grid.nearest_points(x, y, num_candidates):
+            slots.add(int(self.position[near]))
+            slots.add(int(self.position[near]) + 1)
+
+        late = arrival[:size] > instance.delivery_time[route[:size]]
+        late_after = np.append(np.cumsum(late[::-1])[::-1], 0)
+        options = []
+        for slot in sorted(slots):
+            if slot > 0:
+                before = route[slot - 1]
+                start_x, start_y, start_dist = xs[before], ys[before], arrival[slot - 1]
+            else:
+                start_x, start_y, start_dist = 0.0, 0.0, 0.0
+            to_package = math.hypot(x - start_x, y - start_y)
+            own_arrival = start_dist + to_package
+            cost = (1 - (1 - chance) ** own_arrival) * breaking_cost + max(own_arrival - deadline, 0) * 0.3
+            if slot < size:
+                after = route[slot]
+                detour = to_package + math.hypot(xs[after] - x, ys[after] - y) - math.hypot(xs[after] - start_x, ys[after] - start_y)
+            else:
+                detour = to_package
+            cost += detour * 0.3
+            options.append((cost + detour * 0.3 * int(late_after[slot]), slot, cost, detour, own_arrival))
+
+        best_cost = math.inf
+        for bound, slot, cost, detour, own_arrival in sorted(options):
+            if bound >= best_cost:
+                break
+            if slot < size:
+                shifted = stop_costs(instance, route[slot:size], arrival[slot:size] + detour)
+                cost += float(shifted.sum() - costs[slot:size].sum())
+            if cost < best_cost:
+                best_slot, best_cost, best_detour, best_arrival = slot, cost, detour, own_arrival
+
+        slot = best_slot
+        route[slot + 1 : size + 1] = route[slot:size]
+        arrival[slot + 1 : size + 1] = arrival[slot:size] + best_detour
+        route[slot] = package
+        arrival[slot] = best_arrival
+        size += 1
+        costs[slot:size] = stop_costs(instance, route[slot:size], arrival[slot:size])
+        self.position[route[slot:size]] = np.arange(slot, size)
+        self.grid.add(package)
+        self.size = size
+        return slot
+
+    # The route built so far, as an int32 permutation.
+    def permutation(self):
+        return self.route[: self.size].astype(np.int32)
+
+
+# Order in which cheapest insertion adds packages: urgent packages first, by increasing delivery time, then fragile
+# packages by decreasing breaking cost, then the normal ones.
+def insertion_order(instance, packages):
+    packages = np.asarray(packages, dtype=np.int64)
+    return packages[np.lexsort((-instance.breaking_cost[packages], instance.delivery_time[packages]))]
+
+
+# Urgency-aware cheapest insertion: every package is added to an InsertionRoute, in insertion_order.
+def cheapest_insertion_route(instance, num_candidates=CONSTRUCTION_CANDIDATES):
+    route = InsertionRoute(instance)
+    for package in insertion_order(instance, np.arange(len(instance))).tolist():
+        route.add(package, num_candidates)
+    return route.permutation()
+
+
+CONSTRUCTIONS = {
+    "nearest_neighbour": nearest_neighbour_route,
+    "greedy_edge": greedy_edge_route,
+    "cheapest_insertion": cheapest_insertion_route,
+}
+
+
+# Builds a route with one of the CONSTRUCTIONS.
+def construct_route(instance, method):
+    if method not in CONSTRUCTIONS:
+        raise ValueError(f"Unknown construction method: {method}")
+    return CONSTRUCTIONS[method](instance)
@@ -0,0 +1,234 @@
+import math
+from bisect import bisect_left
+
+import numpy as np
+
+from problem import NORMAL, FRAGILE, URGENT
+
+# Number of stops from which RouteState walks them with numpy instead of a Python loop. Below it the per-call overhead of
+# numpy is larger than the loop, so small routes are handled exactly as before.
+VECTOR_MIN_STOPS = 128
+
+
+# Extract the data needed by the cost function from a package: (x, y, kind, a, b).
+# For fragile packages a is the breaking chance and b the breaking cost, for urgent packages a is the delivery time.
+def package_stop(package):
+    if package.package_type == "fragile":
+        return (package.coordinates_x, package.coordinates_y, FRAGILE, package.breaking_chance, package.breaking_cost)
+    if package.package_type == "urgent":
+        return (package.coordinates_x, package.coordinates_y, URGENT, package.delivery_time, 0)
+    return (package.coordinates_x, package.coordinates_y, NORMAL, 0, 0)
+
+
+# Walk a sequence of stops starting from the given state and return the state after the last stop.
+def walk_stops(stops, dist, x, y, breaking, urgent):
+    for stop_x, stop_y, kind, a, b in stops:
+        dist += math.sqrt((stop_x - x) ** 2 + (stop_y - y) ** 2)
+        x = stop_x
+        y = stop_y
+        if kind == FRAGILE:
+            breaking += (1 - ((1 - a) ** dist)) * b
+        elif kind == URGENT and dist > a:
+            urgent += (dist - a) * 0.3
+    return dist, x, y, breaking, urgent
+
+
+# Cached prefix state of a route. For every position it keeps the cumulative distance, fragile damage and urgent lateness,
+# so a move can be scored by walking only the changed segment and re-pricing the fragile/urgent stops after it.
+# The solution is either a list of packages or a permutation of the given problem.ProblemInstance.
+# On an instance, long stretches of the route are priced with numpy: refreshing the prefix arrays after a move, walking
+# long move windows, and re-pricing the special stops after a move's window.
+class RouteState:
+    def __init__(self, solution, instance=None):
+        self.solution = solution
+        self.instance = instance
+        if instance is not None:
+            self.stops = instance.route_stops(solution)
+        else:
+            self.stops = [package_stop(package) for package in solution]
+        self.refresh()
+
+    # Rebuild the prefix arrays from the given position onwards. On an instance they are numpy arrays, so that long routes
+    # can be refreshed and re-priced without converting them, otherwise lists.
+    def refresh(self, start=0):
+        n = len(self.stops)
+        if start == 0:
+            if self.instance is not None:
+                self.dist = np.zeros(n)
+                self.breaking = np.zeros(n)
+                self.urgent = np.zeros(n)
+                self.route_chance = np.zeros(n)
+                self.route_cost = np.zeros(n)
+                self.route_deadline = np.zeros(n)
+            else:
+                self.dist = [0.0] * n
+                self.breaking = [0.0] * n
+                self.urgent = [0.0] * n
+            self.special = []
+        # Positions of the stops whose cost depends on the distance travelled before reaching them. Those before start
+        # have not moved.
+        del self.special[bisect_left(self.special, start) :]
+        if self.instance is not None and n - start >= VECTOR_MIN_STOPS:
+            self.refresh_arrays(start)
+            return
+        dist, x, y, breaking, urgent = self.prefix(start)
+        dists = []
+        breakings = []
+        urgents = []
+        for k in range(start, n):
+            stop_x, stop_y, kind, a, b = self.stops[k]
+            dist += math.sqrt((stop_x - x) ** 2 + (stop_y - y) ** 2)
+            x = stop_x
+            y = stop_y
+            if kind == FRAGILE:
+                breaking += (1 - ((1 - a) ** dist)) * b
+            elif kind == URGENT and dist > a:
+                urgent += (dist - a) * 0.3
+            dists.append(dist)
+            breakings.append(breaking)
+            urgents.append(urgent)
+            if kind != NORMAL:
+                self.special.append(k)
+        self.dist[start:] = dists
+        self.breaking[start:] = breakings
+        self.urgent[start:] = urgents
+        if self.instance is not None:
+            self.refresh_route_arrays(start, np.asarray(self.solution[start:]))
+
+    # Same as refresh, with numpy. The running sums are taken in the same order as the loop, so the values are identical.
+    def refresh_arrays(self, start):
+        instance = self.instance
+        packages = np.asarray(self.solution[start:])
+        dist, x, y, breaking, urgent = self.prefix(start)
+        dx = np.diff(instance.coordinates_x[packages], prepend=x)
+        dy = np.diff(instance.coordinates_y[packages], prepend=y)
+        dists = np.cumsum(np.concatenate(([dist], np.sqrt(dx * dx + dy * dy))))[1:]
+        damage = (1 - (1 - instance.breaking_chance[packages]) ** dists) * instance.breaking_cost[packages]
+        lateness = np.maximum(dists - instance.delivery_time[packages], 0) * 0.3
+        self.dist[start:] = dists
+        self.breaking[start:] = np.cumsum(np.concatenate(([breaking], damage)))[1:]
+        self.urgent[start:] = np.cumsum(np.concatenate(([urgent], lateness)))[1:]
+        self.refresh_route_arrays(start, packages)
+        self.special.extend((start + np.flatnonzero(instance.types[packages] != NORMAL)).tolist())
+
+    # Breaking chance, breaking cost and delivery time of every stop from start onwards, in route order. Normal packages
+    # have no breaking chance and no deadline, so they add nothing when the tail is re-priced with these.
+    def refresh_route_arrays(self, start, packages):
+        self.route_chance[start:] = self.instance.breaking_chance[packages]
+        self.route_cost[start:] = self.instance.breaking_cost[packages]
+        self.route_deadline[start:] = self.instance.delivery_time[packages]
+
+    # State (distance, x, y, breaking cost, urgent cost) right before visiting the given position.
+    def prefix(self, position):
+        if position == 0:
+            return 0.0, 0, 0, 0.0, 0.0
+        stop = self.stops[position - 1]
+        return float(self.dist[position - 1]), stop[0], stop[1], float(self.breaking[position - 1]), float(self.urgent[position - 1])
+
+    def cost(self):
+        if not self.stops:
+            return 0
+        return float(self.dist[-1]) * 0.3 + float(self.breaking[-1]) + float(self.urgent[-1])
+
+    # Same value evaluate_solution would return for the cached route.
+    def score(self):
+        return -self.cost()
+
+    # Cost of the route whose positions lo..hi are replaced by the stops of the given segments, in order. Each segment is
+    # a (start, end, reverse) range of positions of the current route, taken backwards when reverse is True.
+    # On an instance, long windows are walked with numpy (walk_packages), so 2-opt moves across a long route stay cheap.
+    def window_cost(self, lo, hi, segments):
+        if self.instance is not None and hi - lo + 1 >= VECTOR_MIN_STOPS:
+            solution = np.asarray(self.solution)
+            packages = np.concatenate([solution[start:end][::-1] if reverse else solution[start:end] for start, end, reverse in segments])
+            return self.rest_cost(hi, *self.walk_packages(packages, *self.prefix(lo)))
+        window = []
+        for start, end, reverse in segments:
+            window.extend(reversed(self.stops[start:end]) if reverse else self.stops[start:end])
+        return self.rest_cost(hi, *walk_stops(window, *self.prefix(lo)))
+
+    # Same as walk_stops for an array of packages of the instance, with numpy.
+    def walk_packages(self, packages, dist, x, y, breaking, urgent):
+        instance = self.instance
+        stop_x = instance.coordinates_x[packages]
+        stop_y = instance.coordinates_y[packages]
+        dx = np.diff(stop_x, prepend=x)
+        dy = np.diff(stop_y, prepend=y)
+        dists = dist + np.cumsum(np.sqrt(dx * dx + dy * dy))
+        breaking += float(((1 - (1 - instance.breaking_chance[packages]) ** dists) * instance.breaking_cost[packages]).sum())
+        urgent += float(np.maximum(dists - instance.delivery_time[packages], 0).sum()) * 0.3
+        return float(dists[-1]), float(stop_x[-1]), float(stop_y[-1]), breaking, urgent
+
+    # Cost of the route given the state (distance, x, y, breaking cost, urgent cost) after a new window ending at position
+    # hi, while the stops after it stay in place.
+    def rest_cost(self, hi, dist, x, y, breaking, urgent):
+        n = len(self.stops)
+        if hi + 1 >= n:
+            return dist * 0.3 + breaking + urgent
+
+        # Every stop after the window is reached with its old cumulative distance shifted by a constant.
+        next_stop = self.stops[hi + 1]
+        shift = dist + math.sqrt((next_stop[0] - x) ** 2 + (next_stop[1] - y) ** 2) - float(self.dist[hi + 1])
+        if shift == 0:
+            return self.cost() - float(self.breaking[hi]) - float(self.urgent[hi]) + breaking + urgent
+
+        first = bisect_left(self.special, hi + 1)
+        if self.instance is not None and len(self.special) - first >= VECTOR_MIN_STOPS:
+            stop_dists = self.dist[hi + 1 :] + shift
+            breaking += float(((1 - (1 - self.route_chance[hi + 1 :]) ** stop_dists) * self.route_cost[hi + 1 :]).sum())
+            urgent += float(np.maximum(stop_dists - self.route_deadline[hi + 1 :], 0).sum()) * 0.3
+            return (float(self.dist[-1]) + shift) * 0.3 + breaking + urgent
+
+        for k in self.special[first:]:
+            _, _, kind, a, b = self.stops[k]
+            stop_dist = float(self.dist[k]) + shift
+            if kind == FRAGILE:
+                breaking += (1 - ((1 - a) ** stop_dist)) * b
+            elif stop_dist > a:
+                urgent += (stop_dist - a) * 0.3
+        return (float(self.dist[-1]) + shift) * 0.3 + breaking + urgent
+
+    # Change in score (new score - current score) of moving the package at position i to position j.
+    def relocate_delta(self, i, j):
+        if i == j:
+            return 0
+        if i < j:
+            return self.cost() - self.window_cost(i, j, [(i + 1, j + 1, False), (i, i + 1, False)])
+        return self.cost() - self.window_cost(j, i, [(i, i + 1, False), (j, i, False)])
+
+    # Change in score of moving the segment of `length` packages starting at position i so that it starts at position j.
+    def segment_delta(self, i, j, length):
+        if i == j:
+            return 0
+        if i < j:
+            return self.cost() - self.window_cost(i, j + length - 1, [(i + length, j + length, False), (i, i + length, False)])
+        return self.cost() - self.window_cost(j, i + length - 1, [(i, i + length, False), (j, i, False)])
+
+    # Change in score of swapping the packages at positions i and j.
+    def swap_delta(self, i, j):
+        if i == j:
+            return 0
+        lo, hi = min(i, j), max(i, j)
+        return self.cost() - self.window_cost(lo, hi, [(hi, hi + 1, False), (lo + 1, hi, False), (lo, lo + 1, False)])
+
+    # Change in score of reversing the segment [i, j) of the route (2-opt move).
+    def reverse_delta(self, i, j):
+        if j - i < 2:
+            return 0
+        return self.cost() - self.window_cost(i, j - 1, [(i, j, True)])
+
+    # Change in score of a neighbours.Move on the cached route.
+    def delta(self, move):
+        return move.delta(self)
+
+    # Applies a neighbours.Move to the cached route in place and refreshes the prefix state from the first changed position.
+    def apply(self, move):
+        move.apply(self.solution)
+        move.apply(self.stops)
+        self.refresh(move.bounds()[0])
+
+    # Reverts a move previously applied with apply.
+    def undo(self, move):
+        move.undo(self.solution)
+        move.undo(self.stops)
+        self.refresh(move.bounds()[0])
@@ -0,0 +1,88 @@
+# Solution generation and evaluation, kept free of the GUI and plotting libraries so that it can be imported quickly
+# by solvers and worker processes. utils.py re-exports these functions together with the visualization helpers.
+
+import copy
+import math
+import random
+
+import numpy as np
+
+# Create a random assortment of the packages from an existing list.
+def generate_random_solution(package_stream, rng=random):
+    solution = copy.deepcopy(package_stream)
+    rng.shuffle(solution)
+    return solution
+
+# Calculate the total cost of delivering the packages in the given order and return its negative value for minimization
+def evaluate_solution(solution):
+    last_x = 0
+    last_y = 0
+    total_dist = 0
+    total_breaking_cost = 0
+    total_urgent_cost = 0
+
+    for package in solution:
+        if package == None:
+            return 0
+        
+        # Calculate distance from the last package's location
+        dist = math.sqrt(
+            (package.coordinates_x - last_x) ** 2
+            + (package.coordinates_y - last_y) ** 2
+        )
+        total_dist += dist
+
+        last_x = package.coordinates_x
+        last_y = package.coordinates_y
+
+        if package.package_type == "fragile":
+            p_damage = 1 - ((1 - package.breaking_chance) ** total_dist)
+            total_breaking_cost += (
+                p_damage * package.breaking_cost
+            )  # Expected value of breaking cost instead of random chance in order to make the evaluation function deterministic and consistent
+
+        if package.package_type == "urgent":
+            if (
+                total_dist > package.delivery_time
+            ):  # 60km/h = 1km/min so total_dist is equal to the minutes elapsed
+                total_urgent_cost += (total_dist - package.delivery_time) * 0.3
+
+    total_cost = total_dist * 0.3 + total_breaking_cost + total_urgent_cost
+
+    return -total_cost
+
+# Maximum number of route stops evaluated at once by evaluate_permutations, to bound its temporary arrays.
+BATCH_ELEMENTS = 1 << 20
+
+# Calculate the same score as evaluate_solution for a permutation of a problem.ProblemInstance, using array operations.
+def evaluate_permutation(instance, permutation):
+    if len(permutation) == 0:
+        return 0
+    return float(evaluate_permutations(instance, np.asarray(permutation)[None, :])[0])
+
+# Calculate the scores of many permutations of the same instance at once, given as a 2-D array with one route per row.
+def evaluate_permutations(instance, permutations):
+    permutations = np.asarray(permutations)
+    num_routes, num_stops = permutations.shape
+    scores = np.zeros(num_routes)
+    if num_stops == 0:
+        return scores
+
+    distances = instance.distances()
+    rows = max(1, BATCH_ELEMENTS // num_stops)
+    for start in range(0, num_routes, rows):
+        block = permutations[start : start + rows]
+
+        # Each leg is read from the cached distance matrix, starting at the depot.
+        previous = np.empty_like(block)
+        previous[:, 0] = instance.depot
+        previous[:, 1:] = block[:, :-1]
+        dist = np.cumsum(distances[previous, block], axis=1, dtype=np.float64)
+
+        # Non-fragile packages have no breaking cost and non-urgent packages have an infinite delivery time, so no type checks are needed.
+        p_damage = 1 - (1 - instance.breaking_chance[block]) ** dist
+        total_breaking_cost = (p_damage * instance.breaking_cost[block]).sum(axis=1)
+        total_urgent_cost = np.maximum(dist - instance.delivery_time[block], 0).sum(axis=1) * 0.3
+
+        scores[start : start + rows] = -(dist[:, -1] * 0.3 + total_breaking_cost + total_urgent_cost)
+    return scores
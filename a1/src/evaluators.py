@@ -0,0 +1,119 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from evaluation import evaluate_permutations
+from problem import ProblemInstance
+
+# Arrays of a problem.ProblemInstance that are placed in shared memory by ProcessPoolEvaluator.
+SHARED_ARRAYS = ("coordinates_x", "coordinates_y", "types", "breaking_chance", "breaking_cost", "delivery_time")
+
+# Instance rebuilt from shared memory in each worker process, and the shared memory blocks it reads from.
+_worker_instance = None
+_worker_blocks = []
+
+
+# Evaluation backends for whole populations. All of them are called with a 2-D array of permutations (one per row)
+# and return the array of their scores, like utils.evaluate_permutations.
+
+# Evaluates the population in the calling thread.
+class SerialEvaluator:
+    def __init__(self, instance, max_workers=None):
+        self.instance = instance
+
+    def __call__(self, population):
+        return evaluate_permutations(self.instance, population)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Evaluates chunks of the population in a pool of threads. NumPy releases the GIL in its array operations,
+# so the chunks are evaluated concurrently without copying the instance.
+class ThreadPoolEvaluator(SerialEvaluator):
+    def __init__(self, instance, max_workers=None):
+        super().__init__(instance)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def __call__(self, population):
+        chunks = np.array_split(np.asarray(population), self.max_workers)
+        return np.concatenate(list(self.executor.map(self.evaluate_chunk, chunks)))
+
+    def evaluate_chunk(self, chunk):
+        return evaluate_permutations(self.instance, chunk)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+# Evaluates chunks of the population in a pool of processes. The instance arrays and its distance matrix are copied
+# once into multiprocessing.shared_memory blocks that every worker reads, so each call only sends the permutations.
+class ProcessPoolEvaluator(SerialEvaluator):
+    def __init__(self, instance, max_workers=None):
+        super().__init__(instance)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.blocks = []
+        specs = {}
+        arrays = {name: getattr(instance, name) for name in SHARED_ARRAYS}
+        arrays["distances"] = instance.distances()
+        # The blocks already created are released if a later one or the pool cannot be created.
+        try:
+            for name, array in arrays.items():
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self.blocks.append(block)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+                specs[name] = (block.name, array.shape, array.dtype.str)
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=attach_instance, initargs=(specs,))
+        except BaseException:
+            self.release_blocks()
+            raise
+
+    def __call__(self, population):
+        chunks = np.array_split(np.asarray(population), self.max_workers)
+        return np.concatenate(list(self.executor.map(evaluate_shared, chunks)))
+
+    def close(self):
+        self.executor.shutdown()
+        self.release_blocks()
+
+    def release_blocks(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+# Rebuilds the instance in a worker process from views of the shared memory blocks, without copying them.
+def attach_instance(specs):
+    global _worker_instance
+    arrays = {}
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _worker_blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    _worker_instance = ProblemInstance(*(arrays[name] for name in SHARED_ARRAYS))
+    _worker_instance._distances = arrays["distances"]
+
+
+# Evaluates a chunk of permutations in a worker process.
+def evaluate_shared(chunk):
+    return evaluate_permutations(_worker_instance, chunk)
+
+
+EVALUATORS = {"serial": SerialEvaluator, "thread": ThreadPoolEvaluator, "process": ProcessPoolEvaluator}
+
+
+# Creates the evaluation backend with the given name ("serial", "thread" or "process") for an instance.
+def make_evaluator(name, instance, max_workers=None):
+    if name not in EVALUATORS:
+        raise ValueError(f"Unknown evaluation backend: {name}")
+    return EVALUATORS[name](instance, max_workers)
@@ -1,197 +1,426 @@
 import random
-from matplotlib import pyplot as plt
+import time
+from bisect import bisect_left
 import numpy as np
 
-from neighbours import get_random_neighbour_solution
-from utils import evaluate_solution, generate_random_solution
+from evaluation import generate_random_solution
+from evaluators import make_evaluator
+from neighbours import get_random_move, apply_move
+from problem import as_instance, as_solution
+from randomness import get_rng
+
+# The crossover operators work on int32 permutations of a problem.ProblemInstance. Instead of searching the children
+# for each package, they mark the packages already placed in a boolean array indexed by package, so they run in linear time.
+# The operators of this module draw their random numbers from rng, a random.Random-like object (see randomness.get_rng).
 
 # Performs order-based crossover between two parent solutions.
 # A random set of indices are chosen, and the values at these indices are directly copied from the parents to the children.
 # The rest of the child is filled with non-duplicated items in the order they appear in the other parent.
-def order_based_crossover(solution1, solution2):
+def order_based_crossover(solution1, solution2, rng=random):
     length = len(solution1)
-    child1 = [None] * length
-    child2 = [None] * length
-
-    indices = sorted(random.sample(range(length), length // 2))
-
-    for index in indices:
-        child1[index] = solution1[index]
-        child2[index] = solution2[index]
+    indices = rng.sample(range(length), length // 2)
+    kept = np.zeros(length, dtype=bool)
+    kept[indices] = True
 
-    solution2_rest = [pkg for pkg in solution2 if pkg not in child1]
-    iterator1 = iter(solution2_rest)
+    return order_based_child(solution1, solution2, kept), order_based_child(solution2, solution1, kept)
 
-    for i in range(len(child1)):
-        if child1[i] is None:
-            child1[i] = next(iterator1)
 
-    solution1_rest = [pkg for pkg in solution1 if pkg not in child2]
-    iterator2 = iter(solution1_rest)
-
-    for i in range(len(child2)):
-        if child2[i] is None:
-            child2[i] = next(iterator2)
-
-    return child1, child2
+# Builds one order-based child: the kept positions come from the first parent, the rest from the second one in order.
+def order_based_child(parent1, parent2, kept):
+    child = np.empty_like(parent1)
+    child[kept] = parent1[kept]
+    placed = np.zeros(len(parent1), dtype=bool)
+    placed[parent1[kept]] = True
+    child[~kept] = parent2[~placed[parent2]]
+    return child
 
 
 # Performs order crossover, which preserves the relative order of elements from each parent.
 # Two crossover points are randomly selected, and the segment between them is copied from each parent to the corresponding child.
 # The remaining positions are filled with the other parent's elements while preserving their order.
-def order_crossover(solution1, solution2):
+def order_crossover(solution1, solution2, rng=random):
     length = len(solution1)
-    mid_point1, mid_point2 = sorted(random.sample(range(length), 2))
-
-    child1 = [None] * length
-    child2 = [None] * length
-
-    child1[mid_point1:mid_point2] = solution1[mid_point1:mid_point2]
-    child2[mid_point1:mid_point2] = solution2[mid_point1:mid_point2]
-
-    current_pos = mid_point2
-
-    for p in solution2:
-        if p not in child1:
-            if current_pos >= length:
-                current_pos = 0
-
-            child1[current_pos] = p
-            current_pos += 1
-
-    current_pos = mid_point2
-
-    for p in solution1:
-        if p not in child2:
-            if current_pos >= length:
-                current_pos = 0
-
-            child2[current_pos] = p
-            current_pos += 1
-
-    return child1, child2
-
-
-# Randomly selects between order-based and order crossover strategies.
-def crossover(solution1, solution2):
-    if random.randint(0, 1) == 0:
-        return order_based_crossover(solution1, solution2)
+    mid_point1, mid_point2 = sorted(rng.sample(range(length), 2))
+
+    return (
+        order_child(solution1, solution2, mid_point1, mid_point2),
+        order_child(solution2, solution1, mid_point1, mid_point2),
+    )
+
+
+# Builds one order crossover child. The other parent's packages are placed starting after the segment and wrapping around.
+def order_child(parent1, parent2, mid_point1, mid_point2):
+    length = len(parent1)
+    child = np.empty_like(parent1)
+    child[mid_point1:mid_point2] = parent1[mid_point1:mid_point2]
+    placed = np.zeros(length, dtype=bool)
+    placed[parent1[mid_point1:mid_point2]] = True
+    positions = np.r_[mid_point2:length, 0:mid_point1]
+    child[positions] = parent2[~placed[parent2]]
+    return child
+
+
+# Performs partially mapped crossover (PMX).
+# The segment between two random points is copied from one parent, and the other parent's packages that were displaced
+# by it are placed by following the mapping between both segments. Every other position keeps the other parent's package.
+def pmx_crossover(solution1, solution2, rng=random):
+    length = len(solution1)
+    mid_point1, mid_point2 = sorted(rng.sample(range(length), 2))
+
+    return (
+        pmx_child(solution1, solution2, mid_point1, mid_point2),
+        pmx_child(solution2, solution1, mid_point1, mid_point2),
+    )
+
+
+# Builds one PMX child with the segment of the first parent.
+def pmx_child(parent1, parent2, mid_point1, mid_point2):
+    child = parent2.copy()
+    child[mid_point1:mid_point2] = parent1[mid_point1:mid_point2]
+    in_segment = np.zeros(len(parent1), dtype=bool)
+    in_segment[parent1[mid_point1:mid_point2]] = True
+    position_in_parent2 = np.empty(len(parent2), dtype=np.intp)
+    position_in_parent2[parent2] = np.arange(len(parent2))
+
+    first = parent1.tolist()
+    second = parent2.tolist()
+    positions = position_in_parent2.tolist()
+    for k in range(mid_point1, mid_point2):
+        package = second[k]
+        if in_segment[package]:
+            continue
+        position = k
+        while mid_point1 <= position < mid_point2:
+            position = positions[first[position]]
+        child[position] = package
+    return child
+
+
+# Performs cycle crossover (CX).
+# The positions are split into the cycles formed by both parents, and whole cycles are inherited alternately from each
+# parent, so every package keeps the position it has in one of the parents. It draws no random numbers, rng is accepted like in the
+# other crossovers.
+def cycle_crossover(solution1, solution2, rng=random):
+    length = len(solution1)
+    position_in_solution1 = np.empty(length, dtype=np.intp)
+    position_in_solution1[solution1] = np.arange(length)
+    positions = position_in_solution1.tolist()
+    second = solution2.tolist()
+
+    cycle = [-1] * length
+    cycle_no = 0
+    for start in range(length):
+        if cycle[start] >= 0:
+            continue
+        position = start
+        while cycle[position] < 0:
+            cycle[position] = cycle_no
+            position = positions[second[position]]
+        cycle_no += 1
+
+    odd = np.array(cycle) % 2 == 1
+    return np.where(odd, solution2, solution1), np.where(odd, solution1, solution2)
+
+
+# Performs edge recombination crossover (ERX), which builds each child from the adjacencies present in either parent.
+# Starting from the first package of a parent, the next package is the unvisited neighbour with the fewest remaining
+# neighbours (ties broken at random), or a random unvisited package when there is none.
+def edge_recombination_crossover(solution1, solution2, rng=random):
+    return (
+        edge_recombination_child(solution1, solution2, int(solution1[0]), rng),
+        edge_recombination_child(solution1, solution2, int(solution2[0]), rng),
+    )
+
+
+# Builds one ERX child starting from the given package.
+def edge_recombination_child(solution1, solution2, start, rng=random):
+    length = len(solution1)
+    edges = [set() for _ in range(length)]
+    for parent in (solution1.tolist(), solution2.tolist()):
+        for a, b in zip(parent, parent[1:]):
+            edges[a].add(b)
+            edges[b].add(a)
+
+    # Unvisited packages, with the position of each one in the list so it can be removed in constant time.
+    unvisited = list(range(length))
+    index = list(range(length))
+
+    child = np.empty_like(solution1)
+    current = start
+    for k in range(length):
+        child[k] = current
+        last = unvisited.pop()
+        if last != current:
+            unvisited[index[current]] = last
+            index[last] = index[current]
+        for neighbour in edges[current]:
+            edges[neighbour].discard(current)
+
+        if not unvisited:
+            break
+        if edges[current]:
+            fewest = min(len(edges[neighbour]) for neighbour in edges[current])
+            candidates = [neighbour for neighbour in edges[current] if len(edges[neighbour]) == fewest]
+            current = rng.choice(sorted(candidates))
+        else:
+            current = unvisited[rng.randint(0, len(unvisited) - 1)]
+    return child
+
+
+CROSSOVERS = {
+    "order_based": order_based_crossover,
+    "order": order_crossover,
+    "pmx": pmx_crossover,
+    "cycle": cycle_crossover,
+    "edge": edge_recombination_crossover,
+}
+
+
+# Applies the crossover with the given name (see CROSSOVERS).
+# Without a name it randomly selects between order-based and order crossover strategies.
+def crossover(solution1, solution2, method=None, rng=random):
+    if method is not None:
+        return CROSSOVERS[method](solution1, solution2, rng)
+    if rng.randint(0, 1) == 0:
+        return order_based_crossover(solution1, solution2, rng)
     else:
-        return order_crossover(solution1, solution2)
+        return order_crossover(solution1, solution2, rng)
 
 
 # Selects a single solution from the population using tournament selection.
 # A subset of the population is chosen at random, and the one with the highest fitness is selected.
-def tournament_selection(population, fitness_scores, tournament_size):
-    selected_indices = random.sample(range(len(population)), tournament_size)
+def tournament_selection(population, fitness_scores, tournament_size, rng=random):
+    selected_indices = rng.sample(range(len(population)), tournament_size)
     selected_fitness = [fitness_scores[i] for i in selected_indices]
     winner_index = selected_indices[selected_fitness.index(max(selected_fitness))]
     return population[winner_index]
 
 
-# Selects a single solution using roulette wheel selection based on fitness scores.
-# Solutions with higher fitness have a higher chance of being selected.
-def roulette_selection(population, fitness_scores):
-    total_fitness = abs(sum(fitness_scores))
-    selection_probs = [abs(score) / total_fitness for score in fitness_scores]
+# Builds the roulette wheel of a generation: the cumulative selection probability of each solution.
+# It is built once per generation and shared by all the roulette draws of that generation.
+def roulette_wheel(fitness_scores):
+    weights = np.abs(np.asarray(fitness_scores, dtype=np.float64))
+    return np.cumsum(weights / weights.sum()).tolist()
 
-    cumulative_probs = []
-    cum_prob = 0
-    for prob in selection_probs:
-        cum_prob += prob  # Accumulate the selection probability
-        cumulative_probs.append(cum_prob)
 
-    spin = random.random()
-    for i, solution in enumerate(population):
-        if spin <= cumulative_probs[i]:
-            return solution
+# Selects a single solution using roulette wheel selection based on fitness scores.
+# Solutions with higher fitness have a higher chance of being selected.
+# The wheel is found by binary search; without a prebuilt wheel it is built for this draw only.
+def roulette_selection(population, fitness_scores, wheel=None, rng=random):
+    if wheel is None:
+        wheel = roulette_wheel(fitness_scores)
+    spin = rng.random()
+    return population[min(bisect_left(wheel, spin), len(population) - 1)]
+
+
+# Selects num_selections solutions at once using stochastic universal sampling on the roulette wheel.
+# A single spin places num_selections equally spaced pointers on the wheel, which gives the same expected selections as
+# independent roulette draws with less variance. The selections are returned in random order, and there are none when
+# num_selections is 0 (e.g. when the elites fill the whole next population).
+def stochastic_universal_sampling(population, wheel, num_selections, rng=random):
+    if num_selections <= 0:
+        return []
+    spin = rng.random() / num_selections
+    pointers = spin + np.arange(num_selections) / num_selections
+    indices = np.minimum(np.searchsorted(wheel, pointers, side="left"), len(population) - 1)
+    rng.shuffle(indices)
+    return [population[index] for index in indices]
 
 
 # Mutates a solution by generating a random neighbour solution.
-def mutate_solution(solution):
-    return get_random_neighbour_solution(solution)
+def mutate_solution(solution, rng=random):
+    return apply_move(solution, get_random_move(solution, rng))
 
 # Finds and returns the solution with the highest fitness in the current population.
 def get_greatest_fit(population, fitness_scores):
     greatest_fit_index = fitness_scores.index(max(fitness_scores))
     return population[greatest_fit_index], fitness_scores[greatest_fit_index]
 
-# Retrieves a specified number of the best solutions from the population.
+# Retrieves a specified number of the best solutions from the population, best first.
+# Only the best scores are selected (a partial selection with np.partition), instead of sorting the whole population.
+# Among solutions with the same score, the ones that come first in the population are preferred.
 def get_greatest_fits(population, fitness_scores, no_greatest_fits):
-    greatest_fits = []
-    scores_copy = fitness_scores[:]
-    for _ in range(no_greatest_fits):
-        greatest_fit_index = scores_copy.index(max(scores_copy))
-        greatest_fits.append(population[greatest_fit_index])
-        scores_copy[greatest_fit_index] = -float("inf")
-    return greatest_fits
-
-# Executes the genetic algorithm over a specified number of generations and population size.
-def genetic_algorithm(num_generations, package_stream, population_size, log=False, scores_info=False):
+    scores = np.asarray(fitness_scores)
+    no_greatest_fits = min(no_greatest_fits, len(scores))
+    if no_greatest_fits <= 0:
+        return []
+    threshold = np.partition(scores, len(scores) - no_greatest_fits)[len(scores) - no_greatest_fits]
+    above = np.flatnonzero(scores > threshold)
+    tied = np.flatnonzero(scores == threshold)[: no_greatest_fits - len(above)]
+    chosen = np.concatenate((above, tied))
+    chosen = chosen[np.argsort(-scores[chosen], kind="stable")]
+    return [population[index] for index in chosen]
+
+# Number of elite solutions kept in each generation: 4 by default, or the given fraction of the population (at least 1).
+def get_elite_count(population_size, elite_fraction=None):
+    if elite_fraction is None:
+        return 4
+    return max(1, int(population_size * elite_fraction))
+
+# Evaluates a population with the evaluator, going through the score cache when there is one.
+# With a stats.SolverStats, the solutions actually evaluated (cache misses) and the time taken are added to it.
+# With a termination.Termination, the solutions actually evaluated are counted in it.
+def evaluate_population(instance, population, evaluator, cache=None, stats=None, termination=None):
+    if stats is not None:
+        clock = time.perf_counter()
+    misses = cache.misses if cache is not None else 0
+    if cache is not None:
+        fitness_scores = cache.evaluate_population(instance, population, evaluator).tolist()
+    else:
+        fitness_scores = evaluator(population).tolist()
+    evaluated = cache.misses - misses if cache is not None else len(population)
+    if stats is not None:
+        stats.add_time("evaluation", clock)
+        stats.evaluations += evaluated
+    if termination is not None:
+        termination.evaluations += evaluated
+    return fitness_scores
+
+# Creates the initial population: the given solution followed by random reorderings of it, one solution per row.
+def generate_population(initial_solution, population_size, rng=random):
     population = []
-    population.append(package_stream)
-    scores_history = []
+    population.append(initial_solution)
     # Initializes the population with random solutions.
     for _ in range(1, population_size):
-        population.append(generate_random_solution(package_stream))
-
-    # Evaluates the fitness of each solution in the initial population.
-    fitness_scores = [evaluate_solution(solution) for solution in population]
-    best_solution = population[0]
-    best_score = evaluate_solution(best_solution)
-    best_solution_generation = 0
-    if log:
-        print(f"Initial score: {best_score}")
-
-    generation_no = 0
-
-    tournament_size = int(population_size * 0.2)
-
-    while generation_no < num_generations:
-        greatest_fits = get_greatest_fits(population, fitness_scores, 4) # Elitism: Selects the 4 best solutions from the population.
-        new_population = greatest_fits
-
-        for _ in range((population_size - 4) // 2):
-            # Evolves the population using selection, crossover, and mutation.
-            tournament_winner = tournament_selection(
-                population, fitness_scores, tournament_size
-            )
-            roulette_winner = roulette_selection(population, fitness_scores)
-
-            if random.random() < 0.9:
-                offspring1, offspring2 = crossover(tournament_winner, roulette_winner)
-            else:
-                offspring1, offspring2 = tournament_winner, roulette_winner
-
-            # Mutation is applied with a 50% probability to avoid premature convergence.
-            if random.random() < 0.5:
-                offspring1 = mutate_solution(offspring1)
-            if random.random() < 0.5:
-                offspring2 = mutate_solution(offspring2)
-
-            new_population.append(offspring1)
+        population.append(generate_random_solution(initial_solution, rng))
+    return np.array(population)
+
+# Creates the next generation using elitism, selection, crossover and mutation. The new population still has to be evaluated.
+# The second parent of each pair is chosen by roulette draws ("roulette") or by stochastic universal sampling ("sus").
+# The elite fraction sets how many of the best solutions are carried over (see get_elite_count).
+# When the number of offspring needed is odd, the second offspring of the last pair is dropped, so the new population
+# always has population_size solutions.
+# With a stats.SolverStats, the offspring are counted as proposed moves, and the time is split between selection and
+# building the offspring (crossover and mutation).
+def evolve_population(population, fitness_scores, population_size, tournament_size, crossover_method=None, selection="roulette", elite_fraction=None, rng=random, stats=None):
+    if stats is not None:
+        clock = time.perf_counter()
+    num_elites = get_elite_count(population_size, elite_fraction)
+    greatest_fits = get_greatest_fits(population, fitness_scores, num_elites) # Elitism: Selects the best solutions from the population.
+    new_population = greatest_fits
+
+    num_pairs = (population_size - num_elites + 1) // 2
+    wheel = roulette_wheel(fitness_scores)
+    if selection == "sus":
+        sampled_winners = stochastic_universal_sampling(population, wheel, num_pairs, rng)
+    elif selection != "roulette":
+        raise ValueError(f"Unknown selection method: {selection}")
+
+    for pair_no in range(num_pairs):
+        # Evolves the population using selection, crossover, and mutation.
+        tournament_winner = tournament_selection(
+            population, fitness_scores, tournament_size, rng
+        )
+        if selection == "sus":
+            roulette_winner = sampled_winners[pair_no]
+        else:
+            roulette_winner = roulette_selection(population, fitness_scores, wheel, rng)
+        if stats is not None:
+            clock = stats.add_time("selection", clock)
+
+        if rng.random() < 0.9:
+            offspring1, offspring2 = crossover(tournament_winner, roulette_winner, crossover_method, rng)
+        else:
+            offspring1, offspring2 = tournament_winner, roulette_winner
+
+        # Mutation is applied with a 50% probability to avoid premature convergence.
+        if rng.random() < 0.5:
+            offspring1 = mutate_solution(offspring1, rng)
+        if rng.random() < 0.5:
+            offspring2 = mutate_solution(offspring2, rng)
+
+        new_population.append(offspring1)
+        if len(new_population) < population_size:
             new_population.append(offspring2)
+        if stats is not None:
+            clock = stats.add_time("neighbours", clock)
+            stats.moves_proposed += 2
 
-        population = new_population
-        generation_no += 1
-
-        fitness_scores = [evaluate_solution(solution) for solution in population]
+    if stats is not None:
+        stats.add_time("selection", clock)
+    return np.array(new_population)
 
-        greatest_fit, greatest_fit_score = get_greatest_fit(population, fitness_scores)
-        if greatest_fit_score > best_score:
-            best_solution = greatest_fit
-            best_score = greatest_fit_score
-            best_solution_generation = generation_no
-        
+# Executes the genetic algorithm over a specified number of generations and population size.
+# The package stream can be a list of packages or a problem.ProblemInstance, and the solution is returned in the same form.
+# Individuals are int32 permutations of the instance.
+# The evaluator is the backend used to score each generation: "serial", "thread" or "process" (see evaluators.py),
+# or an evaluator object that was already created for this instance and that the caller closes.
+# The crossover method is one of the names in CROSSOVERS, or None for the default mix of order-based and order crossover.
+# The selection is "roulette" or "sus", and the elite fraction the share of the population kept as elite (see evolve_population).
+# A score_cache.ScoreCache can be given so that elites and unchanged offspring are not evaluated again.
+# Every random choice is drawn from rng (see randomness.get_rng), the global random module by default.
+# A stats.SolverStats can be given to count evaluations and offspring and time each phase; its iterations are generations.
+# The first individual of the initial population can be built by a constructive heuristic, named by construction
+# (see problem.as_instance); the others are random reorderings of it.
+# A termination.Termination can be given to stop at a time limit, evaluation budget or target score; the reason is left in it.
+def genetic_algorithm(num_generations, package_stream, population_size, log=False, scores_info=False, evaluator="serial", max_workers=None, crossover_method=None, selection="roulette", elite_fraction=None, cache=None, rng=None, stats=None, construction=None, termination=None):
+    rng = get_rng(rng)
+    instance, initial_solution = as_instance(package_stream, construction)
+    population = generate_population(initial_solution, population_size, rng)
+    scores_history = []
+    owns_evaluator = isinstance(evaluator, str)
+    if owns_evaluator:
+        evaluator = make_evaluator(evaluator, instance, max_workers)
+
+    # An evaluator created here is closed even if the search fails or is interrupted, so that a process pool and its
+    # shared memory blocks are not left behind.
+    try:
+        if stats is not None:
+            stats.start()
+        if termination is not None:
+            termination.start()
+        # Evaluates the fitness of the whole initial population at once. Each row of the population array is one solution.
+        fitness_scores = evaluate_population(instance, population, evaluator, cache, stats, termination)
+        best_solution = population[0]
+        best_score = fitness_scores[0]
+        best_solution_generation = 0
         if log:
-            print(f" Best score so far: {best_score}")
-            print(f" Generation: {generation_no}")
-        scores_history.append(best_score)
+            print(f"Initial score: {best_score}")
+
+        generation_no = 0
+
+        tournament_size = int(population_size * 0.2)
+
+        while generation_no < num_generations:
+            if termination is not None and termination.should_stop(best_score):
+                break
+            population = evolve_population(population, fitness_scores, population_size, tournament_size, crossover_method, selection, elite_fraction, rng, stats)
+            generation_no += 1
+
+            fitness_scores = evaluate_population(instance, population, evaluator, cache, stats, termination)
+
+            if stats is not None:
+                clock = time.perf_counter()
+            greatest_fit, greatest_fit_score = get_greatest_fit(population, fitness_scores)
+            if greatest_fit_score > best_score:
+                best_solution = greatest_fit
+                best_score = greatest_fit_score
+                best_solution_generation = generation_no
+                if stats is not None:
+                    stats.improved(best_score, best_solution)
+            if stats is not None:
+                stats.add_time("selection", clock)
+                stats.iteration(best_score, greatest_fit_score)
+        
+            if log:
+                print(f" Best score so far: {best_score}")
+                print(f" Generation: {generation_no}")
+            if scores_info:
+                scores_history.append(best_score)
     
+    finally:
+        if owns_evaluator:
+            evaluator.close()
+    if stats is not None:
+        stats.stop()
+    if termination is not None:
+        termination.finish("generations")
+
     if log:
         print(f"  Final score: {best_score}")
         print(f"  Found on generation {best_solution_generation}")
 
+    best_solution = as_solution(package_stream, instance, best_solution)
     if (scores_info):
         return best_solution, scores_history
     return best_solution
@@ -1,36 +1,84 @@
-from neighbours import (
-    get_random_neighbour_solution,
-    get_all_neighbours,
-    get_best_neighbour,
-)
-from utils import evaluate_solution
+import time
+
+from delta import RouteState
+from evaluation import evaluate_permutation
+from local_search import candidate_local_search, get_positions, get_random_candidate_move, update_positions
+from neighbours import get_random_move, get_best_move
+from problem import as_instance, as_solution
+from randomness import get_rng
 
 
 # Executes the Hill Climbing algorithm with a specified number of maximum iterations without improvement.
-def get_hc_solution(package_stream, num_iterations, log=False, scores_info=False):
+# The package stream can be a list of packages or a problem.ProblemInstance, and the solution is returned in the same form.
+# Random moves are drawn from rng (see randomness.get_rng), the global random module by default.
+# A stats.SolverStats can be given to count evaluations and moves and time each phase of the search.
+# The initial route can be built by a constructive heuristic, named by construction (see problem.as_instance).
+# A termination.Termination can be given to stop at a time limit, evaluation budget or target score; the reason is left in it.
+# With num_candidates, random moves only join a package with one of its num_candidates nearest packages
+# (see local_search.get_random_candidate_move), which on large maps are far more likely to be accepted.
+def get_hc_solution(package_stream, num_iterations, log=False, scores_info=False, rng=None, stats=None, num_candidates=None, construction=None, termination=None):
+    rng = get_rng(rng)
     iteration = 0
-    best_solution = package_stream
-    best_score = evaluate_solution(best_solution)
+    instance, best_solution = as_instance(package_stream, construction)
+    state = RouteState(best_solution, instance)
+    best_score = state.score()
+    if num_candidates is not None:
+        candidates = instance.candidates(num_candidates).tolist()
+        positions = get_positions(best_solution)
 
     scores = []
 
     if log:
         print(f"Initial score: {best_score}")
+    if stats is not None:
+        stats.start()
+    if termination is not None:
+        termination.start()
 
     while iteration < num_iterations:
+        if termination is not None and termination.should_stop(best_score):
+            break
         # Simple algorithm that selects a random neighbour and replaces the current solution if the neighbour has a better score.s
         iteration += 1
-        neighbor_solution = get_random_neighbour_solution(best_solution)
-        neighbor_score = evaluate_solution(neighbor_solution)
+        if stats is not None:
+            clock = time.perf_counter()
+        # The move is scored against the cached route state and only applied, in place, if it is accepted.
+        if num_candidates is not None:
+            move = get_random_candidate_move(state, positions, candidates, rng)
+        else:
+            move = get_random_move(best_solution, rng)
+        if stats is not None:
+            clock = stats.add_time("neighbours", clock)
+        neighbor_score = best_score + move.delta(state)
+        if stats is not None:
+            clock = stats.add_time("evaluation", clock)
+            stats.evaluations += 1
+            stats.moves_proposed += 1
+        if termination is not None:
+            termination.evaluations += 1
 
         if neighbor_score > best_score:
-            best_solution = neighbor_solution
-            best_score = neighbor_score
+            state.apply(move)
+            best_score = state.score()
             iteration = 0
+            if num_candidates is not None:
+                update_positions(positions, best_solution, *move.bounds())
+            if stats is not None:
+                stats.moves_accepted += 1
+                stats.improved(best_score, best_solution)
             if log:
                 print(f"New best score: {neighbor_score}")
-        scores.append((best_score, neighbor_score))
+        if stats is not None:
+            stats.add_time("selection", clock)
+            stats.iteration(best_score, neighbor_score)
+        if scores_info:
+            scores.append((best_score, neighbor_score))
 
+    if stats is not None:
+        stats.stop()
+    if termination is not None:
+        termination.finish("no_improvement")
+    best_solution = as_solution(package_stream, instance, best_solution)
     if scores_info:
         return best_solution, scores
     else:
@@ -38,31 +86,79 @@ def get_hc_solution(package_stream, num_iterations, log=False, scores_info=False
 
 
 # Executes the Steepest Ascent Hill Climbing algorithm with a specified number of maximum iterations without improvement.
-def get_sahc_solution(package_stream, log=False, scores_info=False):
-    best_solution = package_stream
-    best_score = evaluate_solution(best_solution)
+# The search is deterministic, rng is only accepted so that every solver can be called the same way.
+# A stats.SolverStats can be given to count evaluations and moves and time each phase of the search.
+# The initial route can be built by a constructive heuristic, named by construction (see problem.as_instance).
+# A termination.Termination can be given to stop at a time limit, evaluation budget or target score; the reason is left in it.
+# With num_candidates, the full neighbourhood is replaced by the 2-opt and Or-opt moves between each package and its
+# num_candidates nearest packages, searched with don't-look bits (see local_search.candidate_local_search). Each step still
+# applies the best improving move, but only among the moves of one package, so large instances can be handled. Every
+# applied move still re-prices the rest of the route, so on large maps start from a construction (e.g. "greedy_edge"):
+# from the generated order, thousands of moves spanning the whole route are needed first.
+def get_sahc_solution(package_stream, log=False, scores_info=False, rng=None, stats=None, num_candidates=None, construction=None, termination=None):
+    instance, best_solution = as_instance(package_stream, construction)
+    best_score = evaluate_permutation(instance, best_solution)
 
     if log:
         print(f"Initial score: {best_score}")
 
+    if termination is not None:
+        termination.start()
+
+    if num_candidates is not None:
+        state = RouteState(best_solution, instance)
+        if stats is not None:
+            stats.start()
+        scores = [] if scores_info else None
+        candidate_local_search(state, instance, num_candidates, stats=stats, termination=termination, scores=scores)
+        if stats is not None:
+            stats.stop()
+        if termination is not None:
+            termination.finish("local_optimum")
+        if log:
+            print(f"Final score: {state.score()}")
+        best_solution = as_solution(package_stream, instance, best_solution)
+        if scores_info:
+            return best_solution, scores
+        return best_solution
+
     scores = []
+    if stats is not None:
+        stats.start()
 
     improved = True
     while improved:
+        if termination is not None and termination.should_stop(best_score):
+            break
         # Unlike the basic Hill Climbing, this algorithm checks all neighbours and selects the best one until there is no better neighbour left.
         improved = False
-        neighbours = get_all_neighbours(best_solution)
-        neighbour_solution = get_best_neighbour(neighbours)
-        neighbor_score = evaluate_solution(neighbour_solution)
+        # The neighbourhood is scanned lazily and only the best move is kept, then applied in place.
+        # When a limit is reached during the scan, the best move of the part already scanned is used.
+        move, neighbor_score = get_best_move(best_solution, instance, stats=stats, termination=termination)
+        if stats is not None:
+            clock = time.perf_counter()
 
         if neighbor_score > best_score:
-            best_solution = neighbour_solution
+            move.apply(best_solution)
             best_score = neighbor_score
             improved = True
+            if stats is not None:
+                stats.moves_accepted += 1
+                stats.improved(best_score, best_solution)
             if log:
                 print(f"New best score: {neighbor_score}")
-        scores.append((best_score, neighbor_score))
+        if stats is not None:
+            stats.add_time("selection", clock)
+            stats.iteration(best_score, neighbor_score)
+        if scores_info:
+            scores.append((best_score, neighbor_score))
+
+    if stats is not None:
+        stats.stop()
+    if termination is not None:
+        termination.finish("local_optimum")
 
+    best_solution = as_solution(package_stream, instance, best_solution)
     if scores_info:
         return best_solution, scores
     else:
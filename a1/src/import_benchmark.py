@@ -0,0 +1,90 @@
+# Import-time benchmark of the solver modules. Each module is imported in a fresh interpreter, several times, and the
+# fastest import time is reported together with any GUI or plotting library it pulled in.
+# Fails (exit status 1) if a solver module imports one of those libraries or takes longer than the time budget,
+# so that worker processes keep starting quickly.
+#
+#   python3 import_benchmark.py
+#   python3 import_benchmark.py --repeats 10 --max-seconds 0.5 --output imports.json
+import argparse
+import json
+import subprocess
+import sys
+
+# Modules imported by the solvers and worker processes, which must stay free of the heavy libraries.
+CORE_MODULES = [
+    "problem",
+    "evaluation",
+    "delta",
+    "neighbours",
+    "spatial",
+    "local_search",
+    "construction",
+    "incremental",
+    "score_cache",
+    "termination",
+    "evaluators",
+    "hill_climbing",
+    "simulated_annealing",
+    "tabu_search",
+    "genetic",
+    "island",
+    "multi_start",
+    "batch",
+    "service",
+]
+# Libraries only needed for visualization.
+HEAVY_MODULES = ["pygame", "pandas", "matplotlib"]
+
+MEASURE_IMPORT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"time": elapsed, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+# Imports a module in a new interpreter and returns its import time in seconds and the heavy libraries it loaded.
+def measure_import(module):
+    code = MEASURE_IMPORT.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["time"], result["heavy"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the solver modules.")
+    parser.add_argument("--modules", nargs="+", default=CORE_MODULES, help="modules to import")
+    parser.add_argument("--repeats", type=int, default=5, help="imports of each module, the fastest one is reported")
+    parser.add_argument("--max-seconds", type=float, default=1.0, help="time budget of each import")
+    parser.add_argument("--output", help="JSON file where the results are written")
+    args = parser.parse_args(argv)
+
+    results = []
+    failed = False
+    for module in args.modules:
+        times = []
+        heavy = []
+        for _ in range(args.repeats):
+            elapsed, heavy = measure_import(module)
+            times.append(elapsed)
+        result = {"module": module, "time": min(times), "heavy": heavy}
+        results.append(result)
+
+        status = "ok"
+        if heavy:
+            status = f"imports {', '.join(heavy)}"
+            failed = True
+        elif result["time"] > args.max_seconds:
+            status = "too slow"
+            failed = True
+        print(f"{module:<20} {result['time'] * 1000:8.1f} ms  {status}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+
+from construction import CONSTRUCTION_CANDIDATES, InsertionRoute, insertion_order
+from delta import RouteState
+from local_search import NUM_CANDIDATES, NearestCandidates, candidate_local_search
+from neighbours import MAX_SEGMENT_LENGTH
+from problem import ProblemInstance
+
+# Number of positions on each side of an inserted or removed package whose packages are repaired.
+REPAIR_RADIUS = 2
+# Largest number of positions, minus one, that a repair move can change, so that the repair stays local.
+REPAIR_MAX_SPAN = 64
+
+
+# Incremental re-optimization of a live route, for packages that arrive or are cancelled during the day.
+# Instead of solving again from scratch, the route is kept and only changed where needed:
+#   1. cancelled packages are removed, which leaves the rest of the route in order;
+#   2. arriving packages are inserted by cheapest insertion (construction.InsertionRoute), urgent packages first, each
+#      where the exact cost of the route grows the least; every position is allowed, as the problem has no hard
+#      constraints and late or damaged deliveries are only penalized;
+#   3. a candidate local search (local_search.candidate_local_search) repairs the route starting from the packages within
+#      repair_radius positions of every change, with moves spanning at most max_span positions. Other packages are only
+#      looked at if the repair reaches them.
+# The route and the result are lists of packages. Cancellations are the packages to remove from the route, matched by id
+# like Package.__eq__, so a copy of a package cancels it too; a ValueError is raised if one of them is not in the route,
+# or if two packages of the route and the arrivals have the same id, since a cancellation could not tell them apart.
+# A stats.SolverStats and a termination.Termination can be given to follow and bound the repair.
+def update_route(
+    route,
+    arrivals=(),
+    cancellations=(),
+    num_candidates=NUM_CANDIDATES,
+    max_segment=MAX_SEGMENT_LENGTH,
+    repair_radius=REPAIR_RADIUS,
+    max_span=REPAIR_MAX_SPAN,
+    stats=None,
+    termination=None,
+):
+    id_counts = Counter(package.id for package in itertools.chain(route, arrivals))
+    duplicates = sorted(package_id for package_id, count in id_counts.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Packages with the same id in the route and arrivals: {duplicates}")
+    cancelled = {package.id for package in cancellations}
+    missing = cancelled - {package.id for package in route}
+    if missing:
+        raise ValueError(f"Cancelled packages not in the route: {sorted(missing)}")
+    kept = []
+    changed = set()
+    after_removal = False
+    for package in route:
+        if package.id in cancelled:
+            if kept:
+                changed.add(len(kept) - 1)
+            after_removal = True
+            continue
+        if after_removal:
+            changed.add(len(kept))
+            after_removal = False
+        kept.append(package)
+
+    packages = kept + list(arrivals)
+    if not packages:
+        return []
+    instance = ProblemInstance.from_packages(packages)
+    insertion = InsertionRoute(instance, np.arange(len(kept)))
+    for package in insertion_order(instance, np.arange(len(kept), len(packages))).tolist():
+        changed.add(package)
+        insertion.add(package, CONSTRUCTION_CANDIDATES)
+    solution = insertion.permutation()
+
+    # The changes are known by package, the repair region is taken around their final positions.
+    if termination is not None:
+        termination.start()
+    if stats is not None:
+        stats.start()
+    positions = np.empty(len(packages), dtype=np.int64)
+    positions[solution] = np.arange(len(solution))
+    active = set()
+    for package in changed:
+        position = int(positions[package])
+        active.update(solution[max(position - repair_radius, 0) : position + repair_radius + 1].tolist())
+    state = RouteState(solution, instance)
+    candidates = NearestCandidates(instance, num_candidates)
+    candidate_local_search(state, instance, num_candidates, max_segment, stats, termination, sorted(active), candidates, max_span)
+    if stats is not None:
+        stats.stop()
+    if termination is not None:
+        termination.finish("local_optimum")
+    return instance.to_packages(solution)
@@ -0,0 +1,205 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from evaluation import evaluate_permutations
+from genetic import evolve_population, generate_population
+from problem import as_instance, as_solution
+from randomness import get_rng
+from stats import SolverStats
+
+# Instance being solved, set once in each worker process by init_worker.
+_worker_instance = None
+
+
+# Stores the instance in the worker process, so it is sent once per worker instead of once per epoch.
+def init_worker(instance):
+    global _worker_instance
+    _worker_instance = instance
+
+
+# Evolves one island for a number of generations in a worker process, using the same operators as genetic.genetic_algorithm.
+# Every generation has population_size solutions, the configured size of the island (see genetic.evolve_population).
+# With count, the island's evaluations, offspring and phase times are recorded in a stats.SolverStats.
+# Returns the final population, its fitness scores and the stats, or None without count.
+def evolve_island(population, fitness_scores, num_generations, population_size, tournament_size, crossover_method, selection, elite_fraction, seed, count=False):
+    rng = random.Random(seed)
+    stats = SolverStats() if count else None
+    if stats is not None:
+        stats.start()
+    for _ in range(num_generations):
+        population = evolve_population(population, fitness_scores, population_size, tournament_size, crossover_method, selection, elite_fraction, rng, stats)
+        if stats is not None:
+            clock = time.perf_counter()
+        fitness_scores = evaluate_permutations(_worker_instance, population).tolist()
+        if stats is not None:
+            stats.add_time("evaluation", clock)
+            stats.evaluations += len(population)
+    if stats is not None:
+        stats.stop()
+    return population, fitness_scores, stats
+
+
+# Returns, for each island, the islands that receive its migrants.
+# In a ring each island sends to the next one, in a fully connected topology it sends to every other island.
+def migration_targets(num_islands, topology):
+    if topology == "ring":
+        return [[(i + 1) % num_islands] for i in range(num_islands)]
+    elif topology == "full":
+        return [[j for j in range(num_islands) if j != i] for i in range(num_islands)]
+    raise ValueError(f"Unknown migration topology: {topology}")
+
+
+# Sends copies of the best num_migrants solutions of every island to its targets, where they replace the worst solutions.
+# Migrants are chosen from every island before any of them is replaced.
+def migrate(populations, fitness_scores, num_migrants, topology):
+    emigrants = []
+    for population, scores in zip(populations, fitness_scores):
+        best = np.argsort(scores)[::-1][:num_migrants]
+        emigrants.append([(population[i].copy(), scores[i]) for i in best])
+
+    for source, targets in enumerate(migration_targets(len(populations), topology)):
+        for target in targets:
+            worst = np.argsort(fitness_scores[target])[:num_migrants]
+            for index, (migrant, score) in zip(worst, emigrants[source]):
+                populations[target][index] = migrant
+                fitness_scores[target][index] = score
+
+
+# Executes the island model of the genetic algorithm: num_islands populations evolve in separate processes and exchange
+# their best solutions every migration_interval generations, following a "ring" or "full" (fully connected) topology.
+# The crossover method, selection and elite fraction are passed to genetic.evolve_population.
+# The package stream can be a list of packages or a problem.ProblemInstance, and the solution is returned in the same form.
+# With scores_info, the best score after each migration epoch is also returned.
+# The initial populations and the seed of every island epoch are drawn from rng (see randomness.get_rng).
+# Each initial population starts with the route built by construction, when one is named (see problem.as_instance).
+# A termination.Termination is checked between migration epochs, counting every island's offspring as evaluations.
+# A stats.SolverStats can be given to add up the evaluations, offspring and phase times of all islands; its iterations are
+# generations of the model, and its callback is only called at the end of each epoch. island_stats can be a list that
+# receives one stats.SolverStats per island, counting the generations and evaluations of that island.
+def island_genetic_algorithm(
+    num_generations,
+    package_stream,
+    population_size,
+    num_islands=4,
+    migration_interval=10,
+    num_migrants=2,
+    topology="ring",
+    crossover_method=None,
+    selection="roulette",
+    elite_fraction=None,
+    max_workers=None,
+    log=False,
+    scores_info=False,
+    rng=None,
+    construction=None,
+    termination=None,
+    stats=None,
+    island_stats=None,
+):
+    rng = get_rng(rng)
+    instance, initial_solution = as_instance(package_stream, construction)
+    tournament_size = int(population_size * 0.2)
+    migration_targets(num_islands, topology)  # Fails early on an unknown topology.
+    if max_workers is None:
+        max_workers = min(num_islands, os.cpu_count() or 1)
+
+    populations = [generate_population(initial_solution, population_size, rng) for _ in range(num_islands)]
+    count = stats is not None or island_stats is not None
+    if island_stats is not None:
+        island_stats[:] = [SolverStats() for _ in range(num_islands)]
+        for island in island_stats:
+            island.start()
+    if stats is not None:
+        stats.start()
+        clock = time.perf_counter()
+    fitness_scores = [evaluate_permutations(instance, population).tolist() for population in populations]
+    if stats is not None:
+        stats.add_time("evaluation", clock)
+        stats.evaluations += num_islands * population_size
+    if island_stats is not None:
+        for island in island_stats:
+            island.evaluations += population_size
+    best_score = fitness_scores[0][0]
+    best_solution = populations[0][0]
+    scores_history = []
+    if log:
+        print(f"Initial score: {best_score}")
+
+    if termination is not None:
+        termination.start()
+        termination.evaluations += num_islands * population_size
+
+    generation_no = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(instance,)) as executor:
+        while generation_no < num_generations:
+            if termination is not None and termination.should_stop(best_score):
+                break
+            epoch_generations = min(migration_interval, num_generations - generation_no)
+            futures = [
+                executor.submit(
+                    evolve_island,
+                    populations[i],
+                    fitness_scores[i],
+                    epoch_generations,
+                    population_size,
+                    tournament_size,
+                    crossover_method,
+                    selection,
+                    elite_fraction,
+                    rng.randrange(2**32),
+                    count,
+                )
+                for i in range(num_islands)
+            ]
+            results = [future.result() for future in futures]
+            populations = [population for population, _, _ in results]
+            fitness_scores = [scores for _, scores, _ in results]
+            generation_no += epoch_generations
+            if termination is not None:
+                termination.evaluations += num_islands * population_size * epoch_generations
+
+            epoch_best_score = None
+            for population, scores in zip(populations, fitness_scores):
+                island_best = int(np.argmax(scores))
+                if epoch_best_score is None or scores[island_best] > epoch_best_score:
+                    epoch_best_score = scores[island_best]
+                if scores[island_best] > best_score:
+                    best_score = scores[island_best]
+                    best_solution = population[island_best].copy()
+                    if stats is not None:
+                        stats.improved(best_score, best_solution)
+
+            for i, (_, _, island) in enumerate(results):
+                if stats is not None:
+                    stats.add(island)
+                if island_stats is not None:
+                    island_stats[i].add(island)
+                    island_stats[i].iterations += epoch_generations
+            if stats is not None:
+                for _ in range(epoch_generations):
+                    stats.iteration(best_score, epoch_best_score)
+
+            if generation_no < num_generations and num_islands > 1:
+                migrate(populations, fitness_scores, num_migrants, topology)
+
+            if log:
+                print(f" Best score so far: {best_score}")
+                print(f" Generation: {generation_no}")
+            if scores_info:
+                scores_history.append(best_score)
+
+    if stats is not None:
+        stats.stop()
+    if island_stats is not None:
+        for island in island_stats:
+            island.stop()
+    if termination is not None:
+        termination.finish("generations")
+    best_solution = as_solution(package_stream, instance, best_solution)
+    if scores_info:
+        return best_solution, scores_history
+    return best_solution
@@ -0,0 +1,195 @@
+import math
+import random
+from collections import deque
+
+import numpy as np
+
+from neighbours import MAX_SEGMENT_LENGTH, OrOpt, Reverse, get_random_move
+from spatial import SpatialGrid
+
+# Number of nearest packages each package is connected to by candidate moves.
+NUM_CANDIDATES = 8
+# Minimum score improvement for a move to be applied, so rounding errors cannot make the search cycle.
+MIN_IMPROVEMENT = 1e-9
+
+
+# Candidate-list local search. Instead of pairing positions uniformly at random, moves only join a package with one of
+# its nearest packages (problem.ProblemInstance.candidates), which are the moves that can shorten the route.
+# Two move families are used: 2-opt (reversing the segment between the two packages, neighbours.Reverse) and Or-opt
+# (moving a segment of up to MAX_SEGMENT_LENGTH packages next to the other package, neighbours.OrOpt).
+
+
+# Nearest packages of every package, found on a spatial.SpatialGrid the first time they are asked for. It can replace the
+# lists of problem.ProblemInstance.candidates when only a few packages will be looked at, as when repairing a route
+# locally, since building it does not search the neighbours of every package.
+class NearestCandidates:
+    def __init__(self, instance, num_candidates=NUM_CANDIDATES):
+        self.xs = instance.coordinates_x
+        self.ys = instance.coordinates_y
+        self.num_candidates = num_candidates
+        self.grid = SpatialGrid(self.xs, self.ys)
+        self.lists = {}
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __getitem__(self, package):
+        if package not in self.lists:
+            nearest = self.grid.nearest_points(self.xs[package], self.ys[package], self.num_candidates + 1)
+            self.lists[package] = [i for i in nearest if i != package][: self.num_candidates]
+        return self.lists[package]
+
+
+# Position of every package in a solution (a permutation of an instance), as a numpy array.
+def get_positions(solution):
+    positions = np.empty(len(solution), dtype=np.int64)
+    positions[np.asarray(solution)] = np.arange(len(solution))
+    return positions
+
+
+# Updates the positions of the packages at positions lo..hi after a move changed them.
+def update_positions(positions, solution, lo, hi):
+    positions[np.asarray(solution[lo : hi + 1])] = np.arange(lo, hi + 1)
+
+
+# Distance between the stops at two positions of a route state. Position -1 is the depot, and position n (after the last
+# stop) is at distance 0 from everything, since the route ends at its last delivery.
+def stop_distance(stops, i, j):
+    if j >= len(stops) or i >= len(stops):
+        return 0.0
+    x1, y1 = stops[i][:2] if i >= 0 else (0, 0)
+    x2, y2 = stops[j][:2] if j >= 0 else (0, 0)
+    return math.hypot(x1 - x2, y1 - y2)
+
+
+# Every 2-opt and Or-opt move that places package b next to package a, with the reduction of the travelled distance it
+# gives (positive when the route gets shorter). The distance is only a quick estimate: the score also depends on when the
+# fragile and urgent packages are reached, so moves are still scored exactly with the route state.
+def get_candidate_moves(stops, positions, a, b, max_segment=MAX_SEGMENT_LENGTH):
+    n = len(stops)
+    p = int(positions[a])
+    q = int(positions[b])
+    moves = []
+
+    # 2-opt: reversing the segment after the first package, or the segment before the second one, makes them adjacent.
+    lo, hi = min(p, q), max(p, q)
+    if hi - lo >= 2:
+        gain = stop_distance(stops, lo, lo + 1) + stop_distance(stops, hi, hi + 1)
+        gain -= stop_distance(stops, lo, hi) + stop_distance(stops, lo + 1, hi + 1)
+        moves.append((Reverse(lo + 1, hi + 1), gain))
+        gain = stop_distance(stops, lo - 1, lo) + stop_distance(stops, hi - 1, hi)
+        gain -= stop_distance(stops, lo - 1, hi - 1) + stop_distance(stops, lo, hi)
+        moves.append((Reverse(lo, hi), gain))
+
+    for length in range(1, max_segment + 1):
+        # Or-opt: the segment starting at a is moved right after b.
+        end = p + length - 1
+        if end < n and not p <= q <= end and q + 1 != p:
+            gain = stop_distance(stops, p - 1, p) + stop_distance(stops, end, end + 1) + stop_distance(stops, q, q + 1)
+            gain -= stop_distance(stops, p - 1, end + 1) + stop_distance(stops, q, p) + stop_distance(stops, end, q + 1)
+            moves.append((OrOpt(p, q - length + 1 if q > end else q + 1, length), gain))
+
+        # Or-opt: the segment ending at a is moved right before b.
+        start = p - length + 1
+        if start >= 0 and not start <= q <= p and q != p + 1:
+            gain = stop_distance(stops, start - 1, start) + stop_distance(stops, p, p + 1) + stop_distance(stops, q - 1, q)
+            gain -= stop_distance(stops, start - 1, p + 1) + stop_distance(stops, q - 1, start) + stop_distance(stops, p, q)
+            moves.append((OrOpt(start, q - length if q > p else q, length), gain))
+    return moves
+
+
+# Samples a random candidate move: a random package, one of its nearest packages, and one of the moves joining them.
+# Falls back to an unrestricted random move when the two packages are already adjacent in every possible way.
+def get_random_candidate_move(state, positions, candidates, rng=random):
+    a = rng.randrange(len(candidates))
+    moves = get_candidate_moves(state.stops, positions, a, candidates[a][rng.randrange(len(candidates[a]))])
+    if not moves:
+        return get_random_move(state.solution, rng)
+    return rng.choice(moves)[0]
+
+
+# Improves the route of a delta.RouteState in place until no candidate move improves it.
+# Packages are processed from a queue of "active" packages (don't-look bits): for each one, every 2-opt and Or-opt move
+# towards its nearest packages that shortens the route is scored, and the best improving move is applied. Only the packages
+# around the changed positions become active again, so once the route is good each pass touches few packages.
+# Returns the number of moves applied. A stats.SolverStats can be given to count the evaluations and moves, and a
+# termination.Termination to stop early, checked before each package is looked at.
+# By default every package starts active and the candidate lists come from instance.candidates; to repair only part of a
+# route, the packages to start from can be given as active, candidates can be a NearestCandidates, and max_span limits
+# the moves to those changing at most max_span + 1 consecutive positions.
+# When a list is given as scores, a (best score, current score) pair is appended to it after every applied move, like the
+# per-iteration scores of the other solvers (both are the score of the route, which only improves).
+def candidate_local_search(state, instance, num_candidates=NUM_CANDIDATES, max_segment=MAX_SEGMENT_LENGTH, stats=None, termination=None, active=None, candidates=None, max_span=None, scores=None):
+    solution = state.solution
+    n = len(solution)
+    if n < 3:
+        return 0
+    if candidates is None:
+        candidates = instance.candidates(num_candidates).tolist()
+    positions = get_positions(solution)
+    if active is None:
+        active = deque(range(n))
+        is_active = [True] * n
+    else:
+        active = deque(dict.fromkeys(active))
+        is_active = [False] * n
+        for package in active:
+            is_active[package] = True
+    num_moves = 0
+
+    while active:
+        if termination is not None and termination.should_stop(state.score()):
+            break
+        a = active.popleft()
+        is_active[a] = False
+        best_move = None
+        best_delta = MIN_IMPROVEMENT
+        for b in candidates[a]:
+            # Every move joining a and b changes the positions between them, give or take the moved segment.
+            if max_span is not None and abs(int(positions[a]) - int(positions[b])) > max_span + max_segment:
+                continue
+            for move, gain in get_candidate_moves(state.stops, positions, a, b, max_segment):
+                if stats is not None:
+                    stats.moves_proposed += 1
+                if gain <= 0:
+                    continue
+                if max_span is not None:
+                    lo, hi = move.bounds()
+                    if hi - lo > max_span:
+                        continue
+                delta = move.delta(state)
+                if stats is not None:
+                    stats.evaluations += 1
+                if termination is not None:
+                    termination.evaluations += 1
+                if delta > best_delta:
+                    best_move = move
+                    best_delta = delta
+
+        if best_move is not None:
+            state.apply(best_move)
+            lo, hi = best_move.bounds()
+            update_positions(positions, solution, lo, hi)
+            num_moves += 1
+            if stats is not None:
+                stats.moves_accepted += 1
+                stats.improved(state.score(), solution)
+            if scores is not None:
+                scores.append((state.score(), state.score()))
+            # The packages at the ends of the changed edges, and a itself, are looked at again.
+            touched = {lo - 1, lo, hi, hi + 1, best_move.j - 1, best_move.j}
+            if isinstance(best_move, OrOpt):
+                touched.update((best_move.j + best_move.length - 1, best_move.j + best_move.length))
+            for position in touched:
+                if 0 <= position < n:
+                    package = int(solution[position])
+                    if not is_active[package]:
+                        is_active[package] = True
+                        active.append(package)
+            if not is_active[a]:
+                is_active[a] = True
+                active.append(a)
+        if stats is not None:
+            score = state.score()
+            stats.iteration(score, score)
+    return num_moves
@@ -6,6 +6,8 @@ from hill_climbing import *
 from simulated_annealing import *
 from tabu_search import *
 from genetic import *
+from stats import SolverStats
+from tracing import ProgressTrace
 
 
 def print_package_num():
@@ -163,7 +165,8 @@ def main():
     if choice == 1 and num_packages_choice != 4: 
 
         start_time = time.time()
-        solution, scores = get_hc_solution(package_stream, 1000, False,True)
+        scores = ProgressTrace()
+        solution = get_hc_solution(package_stream, 1000, stats=SolverStats(callback=scores))
         end_time = time.time()
         execution_time = end_time - start_time
         print(f"Execution time: {execution_time}")
@@ -190,7 +193,8 @@ def main():
 
     elif choice == 2 and num_packages_choice != 4:
         start_time = time.time()
-        solution,scores = get_sahc_solution(package_stream, False,True)
+        scores = ProgressTrace()
+        solution = get_sahc_solution(package_stream, stats=SolverStats(callback=scores))
         end_time = time.time()
         execution_time = end_time - start_time
         print(f"Execution time: {execution_time}")
@@ -220,7 +224,8 @@ def main():
         cooling = get_cooling_schedule()
         
         start_time = time.time()
-        solution,scores = get_sa_solution(package_stream, False, True, cooling)
+        scores = ProgressTrace()
+        solution = get_sa_solution(package_stream, cooling=cooling, stats=SolverStats(callback=scores))
         end_time = time.time()
         execution_time = end_time - start_time
         print(f"Execution time: {execution_time}")
@@ -236,7 +241,7 @@ def main():
         for num_package in num_package_list:
             package_stream = generate_package_stream(num_package, map_size)
             start_time = time.time()
-            solution = get_sa_solution(package_stream, False, True,cooling)
+            solution = get_sa_solution(package_stream, False, False,cooling)
             end_time = time.time()
             execution_time = end_time - start_time
             sa_scores.append(evaluate_solution(solution))
@@ -248,7 +253,8 @@ def main():
     elif choice == 4 and num_packages_choice != 4:
 
         start_time = time.time()
-        solution,scores = get_tabu_solution(package_stream, 200, 5, num_packages ,False, True)
+        scores = ProgressTrace()
+        solution = get_tabu_solution(package_stream, 200, 5, num_packages, stats=SolverStats(callback=scores))
         end_time = time.time()
         execution_time = end_time - start_time
         print(f"Execution time: {execution_time}")
@@ -278,7 +284,8 @@ def main():
         generations = num_packages*20
         population_size = int(generations/10)
         start_time = time.time()
-        solution,scores= genetic_algorithm(generations, package_stream, population_size, False ,True)
+        scores = ProgressTrace()
+        solution = genetic_algorithm(generations, package_stream, population_size, stats=SolverStats(callback=scores))
         end_time = time.time()
         execution_time = end_time - start_time
         print(f"Execution time: {execution_time}")
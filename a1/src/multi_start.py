@@ -0,0 +1,56 @@
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from evaluation import evaluate_permutation
+from problem import as_instance, as_solution
+from randomness import spawn_seeds
+
+# Instance of the current multi-start run, set once in each worker process by init_worker.
+_worker_instance = None
+
+
+# Stores the instance in the worker process, so it is sent once per worker instead of once per run.
+def init_worker(instance):
+    global _worker_instance
+    _worker_instance = instance
+
+
+# Executes one run of a solver in a worker process with its own random.Random, and returns the permutation found, its score,
+# the run time and the reason the run stopped (None unless a termination.Termination is among the solver arguments).
+def run_seeded(solver, seed, solver_args):
+    start_time = time.perf_counter()
+    solution = solver(package_stream=_worker_instance, rng=random.Random(seed), **solver_args)
+    execution_time = time.perf_counter() - start_time
+    if isinstance(solution, tuple):
+        solution = solution[0]
+    termination = solver_args.get("termination")
+    reason = termination.reason if termination is not None else None
+    return solution, evaluate_permutation(_worker_instance, solution), execution_time, reason
+
+
+# Executes num_runs independent runs of a solver in a pool of processes and returns the best solution with per-run statistics.
+# The solver is any of get_hc_solution, get_sahc_solution, get_sa_solution, get_tabu_solution or genetic_algorithm, and its
+# parameters (other than the package stream) are given as keyword arguments, e.g. multi_start(get_hc_solution, packages, 8, num_iterations=1000).
+# Each run uses its own seed from seeds, or one drawn from rng (see randomness.get_rng), so the runs are independent and a
+# whole multi-start can be reproduced from a single seed. The solution is returned in the same form as the package stream,
+# along with a list of {"seed", "score", "time", "reason"} dictionaries, one per run. A termination.Termination given as
+# termination is copied to every worker, so each run gets the whole time limit and evaluation budget.
+def multi_start(solver, package_stream, num_runs, seeds=None, max_workers=None, rng=None, **solver_args):
+    instance, _ = as_instance(package_stream)
+    if seeds is None:
+        seeds = spawn_seeds(rng, num_runs)
+    if max_workers is None:
+        max_workers = min(num_runs, os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(instance,)) as executor:
+        futures = [executor.submit(run_seeded, solver, seed, solver_args) for seed in seeds[:num_runs]]
+        results = [future.result() for future in futures]
+
+    runs = [
+        {"seed": seed, "score": score, "time": execution_time, "reason": reason}
+        for seed, (_, score, execution_time, reason) in zip(seeds, results)
+    ]
+    best_solution = max(results, key=lambda result: result[1])[0]
+    return as_solution(package_stream, instance, best_solution), runs
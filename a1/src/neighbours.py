@@ -1,90 +1,234 @@
-# Pick a package and place it somewhere else on the solution
-import copy
 import random
+import time
 
-from utils import evaluate_solution
+import numpy as np
 
-# Generates a neighbor solution by randomly selecting a package and moving it to a new position within the solution.
-def get_neighbour_solution1(solution):
-    neighbour = copy.deepcopy(solution)
+from evaluation import BATCH_ELEMENTS, evaluate_permutations
 
-    package_number = random.randint(0, len(neighbour) - 1)
-    package = neighbour.pop(package_number)
 
-    new_pos = random.randint(0, len(neighbour) - 1)
-    neighbour.insert(new_pos, package)
+# Reversible description of a neighbourhood move. Moves are applied in place, so exploring a neighbour does not copy the solution.
+# apply/undo work on lists of packages as well as on int32 permutations of a problem.ProblemInstance.
+# The random functions of this module draw from rng, a random.Random-like object (see randomness.get_rng), or the global random module.
+class Move:
+    __slots__ = ("i", "j")
 
-    return neighbour
+    def __init__(self, i, j):
+        self.i = i
+        self.j = j
 
+    def __repr__(self):
+        return f"{type(self).__name__}({self.i}, {self.j})"
 
-# Creates a neighbor solution by swapping the positions of two randomly selected packages.
-def get_neighbour_solution2(solution):
-    neighbour = copy.deepcopy(solution)
+    def __eq__(self, other):
+        return type(self) is type(other) and self.i == other.i and self.j == other.j
 
-    package1 = random.randint(0, len(neighbour) - 1)
-    package2 = random.randint(0, len(neighbour) - 1)
-    neighbour[package1], neighbour[package2] = neighbour[package2], neighbour[package1]
+    def __hash__(self):
+        return hash((type(self).__name__, self.i, self.j))
 
-    return neighbour
 
+# Picks a package and places it somewhere else on the solution (same result as popping position i and inserting at position j).
+class Relocate(Move):
+    __slots__ = ()
 
-# Generates a neighbor by reversing a randomly selected segment of the solution (2-opt swap).
-def get_neighbour_solution3(solution):
-    neighbour = copy.deepcopy(solution)
+    @classmethod
+    def sample(cls, solution, rng=random):
+        return cls(rng.randint(0, len(solution) - 1), rng.randint(0, len(solution) - 2))
 
-    start_index = random.randint(0, len(neighbour) - 1)
-    end_index = random.randint(start_index, len(neighbour))
+    # First and last positions changed by the move.
+    def bounds(self):
+        return min(self.i, self.j), max(self.i, self.j)
 
-    neighbour[start_index:end_index] = reversed(neighbour[start_index:end_index])
+    def delta(self, state):
+        return state.relocate_delta(self.i, self.j)
+
+    def apply(self, solution):
+        relocate(solution, self.i, self.j)
+
+    def undo(self, solution):
+        relocate(solution, self.j, self.i)
+
+
+# Swaps the positions of two packages.
+class Swap(Move):
+    __slots__ = ()
+
+    @classmethod
+    def sample(cls, solution, rng=random):
+        return cls(rng.randint(0, len(solution) - 1), rng.randint(0, len(solution) - 1))
+
+    def bounds(self):
+        return min(self.i, self.j), max(self.i, self.j)
+
+    def delta(self, state):
+        return state.swap_delta(self.i, self.j)
+
+    def apply(self, solution):
+        solution[self.i], solution[self.j] = solution[self.j], solution[self.i]
+
+    def undo(self, solution):
+        self.apply(solution)
+
+
+# Reverses the segment [i, j) of the solution (2-opt swap).
+class Reverse(Move):
+    __slots__ = ()
+
+    @classmethod
+    def sample(cls, solution, rng=random):
+        start_index = rng.randint(0, len(solution) - 1)
+        return cls(start_index, rng.randint(start_index, len(solution)))
+
+    def bounds(self):
+        return self.i, max(self.i, self.j - 1)
+
+    def delta(self, state):
+        return state.reverse_delta(self.i, self.j)
+
+    def apply(self, solution):
+        solution[self.i : self.j] = solution[self.i : self.j][::-1]
+
+    def undo(self, solution):
+        self.apply(solution)
 
-    return neighbour
 
+MOVE_TYPES = (Relocate, Swap, Reverse)
 
-# Selects one of the three neighbor-generating methods at random and applies it to the given solution.
-def get_random_neighbour_solution(solution):
-    rand_num = random.randint(0, 2)
-    if rand_num == 0:
-        return get_neighbour_solution1(solution)
-    elif rand_num == 1:
-        return get_neighbour_solution2(solution)
-    else:
-        return get_neighbour_solution3(solution)
+# Longest segment moved by an Or-opt move.
+MAX_SEGMENT_LENGTH = 3
 
 
-# Generates all possible neighbors of a solution by applying all types of modifications (reposition, swap, reverse segment/2-opt).
-def get_all_neighbours(solution):
-    neighbours = []
+# Or-opt: moves the segment of `length` packages starting at position i so that it starts at position j of the resulting
+# solution, keeping its order. With length 1 it is the same move as Relocate(i, j).
+class OrOpt(Move):
+    __slots__ = ("length",)
+
+    def __init__(self, i, j, length):
+        super().__init__(i, j)
+        self.length = length
+
+    def __repr__(self):
+        return f"OrOpt({self.i}, {self.j}, {self.length})"
+
+    def __eq__(self, other):
+        return type(self) is type(other) and (self.i, self.j, self.length) == (other.i, other.j, other.length)
+
+    def __hash__(self):
+        return hash(("OrOpt", self.i, self.j, self.length))
+
+    @classmethod
+    def sample(cls, solution, rng=random):
+        length = rng.randint(1, min(MAX_SEGMENT_LENGTH, len(solution)))
+        return cls(rng.randint(0, len(solution) - length), rng.randint(0, len(solution) - length), length)
+
+    def bounds(self):
+        return min(self.i, self.j), max(self.i, self.j) + self.length - 1
+
+    def delta(self, state):
+        return state.segment_delta(self.i, self.j, self.length)
+
+    def apply(self, solution):
+        move_segment(solution, self.i, self.j, self.length)
+
+    def undo(self, solution):
+        move_segment(solution, self.j, self.i, self.length)
+
+
+# Moves the element at position i to position j in place, shifting the elements in between.
+def relocate(solution, i, j):
+    package = solution[i]
+    if i < j:
+        solution[i:j] = solution[i + 1 : j + 1]
+    elif j < i:
+        solution[j + 1 : i + 1] = solution[j:i]
+    solution[j] = package
+
+
+# Moves the segment of `length` elements starting at position i so that it starts at position j, shifting the elements in between.
+def move_segment(solution, i, j, length):
+    segment = solution[i : i + length].copy()
+    if i < j:
+        solution[i:j] = solution[i + length : j + length]
+    elif j < i:
+        solution[j + length : i + length] = solution[j:i]
+    solution[j : j + length] = segment
+
+
+# Picks one of the three move types at random and samples a move of that type, without building the neighbour.
+def get_random_move(solution, rng=random):
+    return MOVE_TYPES[rng.randint(0, 2)].sample(solution, rng)
+
+
+# Builds the neighbour obtained by applying a move to a copy of the solution.
+def apply_move(solution, move):
+    neighbour = solution.copy()
+    move.apply(neighbour)
+    return neighbour
+
 
+# Enumerates, lazily, every move of the full neighbourhood (reposition, swap, reverse segment/2-opt).
+# Moves that leave the solution unchanged are skipped.
+def iter_all_moves(num_packages):
     # Reposition each package in all possible positions.
-    for i in range(len(solution)):
-        neighbour = copy.deepcopy(solution)
-        package = neighbour.pop(i)
-        for j in range(len(solution)):
-            neighbour2 = copy.deepcopy(neighbour)
-            neighbour2.insert(j, package)
-            neighbours.append(neighbour2)
+    for i in range(num_packages):
+        for j in range(num_packages):
+            if i != j:
+                yield Relocate(i, j)
 
     # Swap the positions of each pair of packages.
-    for i in range(len(solution)):
-        for j in range(i + 1, len(solution)):
-            neighbour = copy.deepcopy(solution)
-            neighbour[i], neighbour[j] = neighbour[j], neighbour[i]
-            neighbours.append(neighbour)
-
-    # Reverse segments of the solution.    
-    for i in range(len(solution)):
-        for j in range(i + 1, len(solution)):
-            neighbour[i:j] = reversed(neighbour[i:j])
-    return neighbours
-
-
-# Identifies and returns the best neighbor based on its evaluated score.
-def get_best_neighbour(neighbours):
-    best_neighbour = neighbours[0]
-    best_score = evaluate_solution(best_neighbour)
-    for neighbour in neighbours:
-        score = evaluate_solution(neighbour)
-        if score > best_score:
-            best_neighbour = neighbour
-            best_score = score
-    return best_neighbour
+    for i in range(num_packages):
+        for j in range(i + 1, num_packages):
+            yield Swap(i, j)
+
+    # Reverse segments of the solution.
+    for i in range(num_packages):
+        for j in range(i + 2, num_packages + 1):
+            yield Reverse(i, j)
+
+
+# Scans the full neighbourhood of a permutation and returns its best move and score, or (None, -inf) if it has no neighbours.
+# Moves are enumerated lazily and their neighbours are written into a fixed buffer that is scored one chunk at a time,
+# so memory stays at chunk_size routes no matter how large the neighbourhood is.
+# The moves are not ranked with Move.delta: every move of the full neighbourhood is scored, and one numpy batch of whole
+# routes is 3 to 4 times faster than a delta.RouteState call per move (which is used when moves are sampled or restricted).
+# With a stats.SolverStats, the moves scored and the time spent building and scoring the neighbours are added to it.
+# With a termination.Termination, the moves scored are counted in it and the scan stops early, returning the best move
+# of the chunks already scored, once one of its limits is reached.
+def get_best_move(solution, instance, chunk_size=None, stats=None, termination=None):
+    if chunk_size is None:
+        chunk_size = max(1, BATCH_ELEMENTS // max(1, len(solution)))
+    buffer = np.empty((chunk_size, len(solution)), dtype=solution.dtype)
+    chunk_moves = []
+    best_move = None
+    best_score = -float("inf")
+
+    moves = iter_all_moves(len(solution))
+    while True:
+        if stats is not None:
+            clock = time.perf_counter()
+        chunk_moves.clear()
+        for move in moves:
+            row = buffer[len(chunk_moves)]
+            row[:] = solution
+            move.apply(row)
+            chunk_moves.append(move)
+            if len(chunk_moves) == chunk_size:
+                break
+        if not chunk_moves:
+            break
+
+        if stats is not None:
+            clock = stats.add_time("neighbours", clock)
+        scores = evaluate_permutations(instance, buffer[: len(chunk_moves)])
+        if stats is not None:
+            stats.add_time("evaluation", clock)
+            stats.evaluations += len(chunk_moves)
+            stats.moves_proposed += len(chunk_moves)
+        best_index = int(np.argmax(scores))
+        if scores[best_index] > best_score:
+            best_move = chunk_moves[best_index]
+            best_score = float(scores[best_index])
+        if termination is not None:
+            termination.evaluations += len(chunk_moves)
+            if termination.should_stop(best_score):
+                break
+    return best_move, best_score
@@ -1,22 +1,51 @@
 import random
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+
+from construction import construct_route
+from randomness import get_rng
+from spatial import SpatialGrid
+
+# Type codes used by the array-backed instance.
+NORMAL = 0
+FRAGILE = 1
+URGENT = 2
+TYPE_CODES = {"normal": NORMAL, "fragile": FRAGILE, "urgent": URGENT}
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+# Above these sizes the distance matrix is stored as float32, and then memory-mapped to a temporary file.
+FLOAT32_MATRIX_SIZE = 4000
+MEMMAP_MATRIX_SIZE = 16000
+# Number of matrix rows computed at once, to bound the temporary arrays used while building it.
+MATRIX_BLOCK_ROWS = 512
+# Number of instances kept by as_instance for package lists it has already converted.
+INSTANCE_CACHE_SIZE = 8
+# Seed of the random keys used to hash routes, fixed so that hashes do not depend on the solver's random state.
+ROUTE_HASH_SEED = 2324
 
 
 class Package:
     curr_id = 0
 
-    def __init__(self, package_type, coordinates):
-        self.id = Package.curr_id
-        Package.curr_id += 1
+    # The optional attributes allow rebuilding a package from stored data instead of drawing new random values.
+    # Packages created without an id get one from a global counter, generate_package_stream numbers them within the stream instead.
+    def __init__(self, package_type, coordinates, breaking_chance=None, breaking_cost=None, delivery_time=None, package_id=None, rng=random):
+        if package_id is None:
+            package_id = Package.curr_id
+            Package.curr_id += 1
+        self.id = package_id
         self.package_type = package_type
         self.coordinates_x = coordinates[0]
         self.coordinates_y = coordinates[1]
         if package_type == "fragile":
-            self.breaking_chance = random.uniform(
+            self.breaking_chance = breaking_chance if breaking_chance is not None else rng.uniform(
                 0.0001, 0.01
             )  # 0.01-1% chance of breaking per km
-            self.breaking_cost = random.uniform(3, 10)  # Extra cost in case of breaking
+            self.breaking_cost = breaking_cost if breaking_cost is not None else rng.uniform(3, 10)  # Extra cost in case of breaking
         elif package_type == "urgent":
-            self.delivery_time = random.uniform(
+            self.delivery_time = delivery_time if delivery_time is not None else rng.uniform(
                 100, 240
             )  # Delivery time in minutes (100 minutes to 4 hours)
 
@@ -29,13 +58,238 @@ class Package:
         return self.id == other.id
 
 
-def generate_package_stream(num_packages, map_size):
+# Generates the packages of an instance. Their ids go from 0 to num_packages - 1, so the same seed always gives the same stream.
+# Package.curr_id is moved past them, so packages created later with an automatic id do not share an id with the stream.
+# rng can be None (global random module), a seed, a random.Random or a numpy.random.Generator (see randomness.get_rng).
+def generate_package_stream(num_packages, map_size, rng=None):
+    rng = get_rng(rng)
     package_types = ["fragile", "normal", "urgent"]
     package_stream = [
         Package(
-            random.choice(package_types),
-            (random.uniform(0, map_size), random.uniform(0, map_size)),
+            rng.choice(package_types),
+            (rng.uniform(0, map_size), rng.uniform(0, map_size)),
+            package_id=i,
+            rng=rng,
         )
-        for _ in range(num_packages)
+        for i in range(num_packages)
     ]
+    Package.curr_id = max(Package.curr_id, num_packages)
     return package_stream
+
+
+# Problem instance stored as contiguous arrays, one entry per package.
+# Solutions on an instance are int32 permutations of the package indices.
+# Packages that are not fragile have a breaking cost of 0 and packages that are not urgent have an infinite delivery time,
+# so the cost function can be computed without checking the package type.
+class ProblemInstance:
+    def __init__(self, coordinates_x, coordinates_y, types, breaking_chance, breaking_cost, delivery_time, packages=None):
+        self.coordinates_x = np.ascontiguousarray(coordinates_x, dtype=np.float64)
+        self.coordinates_y = np.ascontiguousarray(coordinates_y, dtype=np.float64)
+        self.types = np.ascontiguousarray(types, dtype=np.int8)
+        self.breaking_chance = np.ascontiguousarray(breaking_chance, dtype=np.float64)
+        self.breaking_cost = np.ascontiguousarray(breaking_cost, dtype=np.float64)
+        self.delivery_time = np.ascontiguousarray(delivery_time, dtype=np.float64)
+        self.packages = packages
+        self.source = None
+        self._stops = None
+        self._distances = None
+        self._hash_keys = None
+        self._candidates = None
+
+    def __len__(self):
+        return len(self.types)
+
+    # Only the arrays and packages are pickled when the instance is sent to another process.
+    # Cached data (distance matrix, stops, hash keys, candidate lists) is rebuilt there on first use.
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["source"] = None
+        state["_stops"] = None
+        state["_distances"] = None
+        state["_hash_keys"] = None
+        state["_candidates"] = None
+        return state
+
+    # Whether another instance holds the same packages in the same order, so that every route has the same hash and
+    # score on both, e.g. when get_instance rebuilt the instance of a package list after evicting it.
+    def same_packages(self, other):
+        return other is self or all(
+            np.array_equal(getattr(self, name), getattr(other, name))
+            for name in ("coordinates_x", "coordinates_y", "types", "breaking_chance", "breaking_cost", "delivery_time")
+        )
+
+    # Index of the depot (0, 0) in the distance matrix. It is the row/column after the last package.
+    @property
+    def depot(self):
+        return len(self)
+
+    # Distance matrix between every pair of packages and the depot, built on first use and then reused by every solver.
+    def distances(self):
+        if self._distances is None:
+            self._distances = build_distance_matrix(self.coordinates_x, self.coordinates_y)
+        return self._distances
+
+    # The num_candidates nearest packages of every package, closest first, as an (n, num_candidates) int32 array.
+    # They are found with a spatial.SpatialGrid on first use and reused, so local search can restrict its moves to
+    # nearby packages without a distance matrix.
+    def candidates(self, num_candidates):
+        num_candidates = min(num_candidates, max(len(self) - 1, 0))
+        if self._candidates is None or self._candidates.shape[1] < num_candidates:
+            self._candidates = SpatialGrid(self.coordinates_x, self.coordinates_y).k_nearest(num_candidates)
+        return self._candidates[:, :num_candidates]
+
+    # Builds an instance from a list of packages. Index i of the instance is package_stream[i].
+    @classmethod
+    def from_packages(cls, package_stream):
+        num_packages = len(package_stream)
+        types = np.zeros(num_packages, dtype=np.int8)
+        breaking_chance = np.zeros(num_packages)
+        breaking_cost = np.zeros(num_packages)
+        delivery_time = np.full(num_packages, np.inf)
+        for i, package in enumerate(package_stream):
+            types[i] = TYPE_CODES[package.package_type]
+            if package.package_type == "fragile":
+                breaking_chance[i] = package.breaking_chance
+                breaking_cost[i] = package.breaking_cost
+            elif package.package_type == "urgent":
+                delivery_time[i] = package.delivery_time
+        return cls(
+            [package.coordinates_x for package in package_stream],
+            [package.coordinates_y for package in package_stream],
+            types,
+            breaking_chance,
+            breaking_cost,
+            delivery_time,
+            packages=tuple(package_stream),
+        )
+
+    # Converts a permutation into a list of packages, reusing the original packages when the instance was built from them.
+    def to_packages(self, permutation):
+        if self.packages is None:
+            self.packages = tuple(
+                Package(
+                    TYPE_NAMES[int(self.types[i])],
+                    (float(self.coordinates_x[i]), float(self.coordinates_y[i])),
+                    breaking_chance=float(self.breaking_chance[i]),
+                    breaking_cost=float(self.breaking_cost[i]),
+                    delivery_time=float(self.delivery_time[i]),
+                    package_id=i,
+                )
+                for i in range(len(self))
+            )
+        return [self.packages[i] for i in permutation]
+
+    # Hash of the packages at positions lo..hi of a permutation: the sum of position key * package key, modulo 2**64.
+    # Since each position contributes independently, the hash of a neighbour is obtained from the hash of the route by
+    # replacing the contribution of the positions changed by the move (see route_hash).
+    def positions_hash(self, permutation, lo, hi):
+        position_keys, package_keys = self.hash_keys()
+        return int((position_keys[lo : hi + 1] * package_keys[permutation[lo : hi + 1]]).sum())
+
+    # Random 64-bit keys of every position and every package, built on first use.
+    def hash_keys(self):
+        if self._hash_keys is None:
+            rng = np.random.default_rng(ROUTE_HASH_SEED)
+            self._hash_keys = (
+                rng.integers(0, 2**64, size=len(self), dtype=np.uint64, endpoint=False),
+                rng.integers(0, 2**64, size=len(self), dtype=np.uint64, endpoint=False),
+            )
+        return self._hash_keys
+
+    # Hash of a whole permutation.
+    def route_hash(self, permutation):
+        return self.positions_hash(permutation, 0, len(permutation) - 1)
+
+    # Hashes of many permutations at once, given as a 2-D array with one route per row.
+    def route_hashes(self, permutations):
+        permutations = np.asarray(permutations)
+        position_keys, package_keys = self.hash_keys()
+        return (position_keys[: permutations.shape[1]] * package_keys[permutations]).sum(axis=1)
+
+    # The route that delivers the packages in the order they are stored.
+    def identity(self):
+        return np.arange(len(self), dtype=np.int32)
+
+    # Per-stop tuples (x, y, type, a, b) used by delta.RouteState, in the order of the given permutation.
+    # For fragile packages a is the breaking chance and b the breaking cost, for urgent packages a is the delivery time.
+    def route_stops(self, permutation):
+        if self._stops is None:
+            a = np.where(self.types == FRAGILE, self.breaking_chance, np.where(self.types == URGENT, self.delivery_time, 0))
+            self._stops = list(
+                zip(
+                    self.coordinates_x.tolist(),
+                    self.coordinates_y.tolist(),
+                    self.types.tolist(),
+                    a.tolist(),
+                    self.breaking_cost.tolist(),
+                )
+            )
+        stops = self._stops
+        return [stops[i] for i in np.asarray(permutation).tolist()]
+
+
+# Builds the (n + 1) x (n + 1) distance matrix of the given coordinates plus the depot (0, 0), which is stored last.
+# Large instances use float32 and very large ones a memory-mapped temporary file instead of an in-memory array.
+def build_distance_matrix(coordinates_x, coordinates_y):
+    xs = np.append(coordinates_x, 0.0)
+    ys = np.append(coordinates_y, 0.0)
+    size = len(xs)
+    if size > MEMMAP_MATRIX_SIZE:
+        matrix = np.memmap(tempfile.TemporaryFile(), dtype=np.float32, mode="w+", shape=(size, size))
+    elif size > FLOAT32_MATRIX_SIZE:
+        matrix = np.empty((size, size), dtype=np.float32)
+    else:
+        matrix = np.empty((size, size), dtype=np.float64)
+
+    for start in range(0, size, MATRIX_BLOCK_ROWS):
+        end = min(start + MATRIX_BLOCK_ROWS, size)
+        dx = xs[start:end, None] - xs[None, :]
+        dy = ys[start:end, None] - ys[None, :]
+        matrix[start:end] = np.sqrt(dx * dx + dy * dy)
+    return matrix
+
+
+# Instances already built from package lists, so that every solver run on the same list shares one distance matrix.
+_instance_cache = OrderedDict()
+
+
+# Returns the cached instance of a package list, building it if the list was not seen before or has changed since.
+def get_instance(package_stream):
+    key = id(package_stream)
+    instance = _instance_cache.get(key)
+    if (
+        instance is not None
+        and len(instance.packages) == len(package_stream)
+        and all(cached is package for cached, package in zip(instance.packages, package_stream))
+    ):
+        _instance_cache.move_to_end(key)
+        return instance
+
+    instance = ProblemInstance.from_packages(package_stream)
+    # The list itself is kept alive with the instance so its id cannot be reused by another list.
+    instance.source = package_stream
+    _instance_cache[key] = instance
+    _instance_cache.move_to_end(key)
+    while len(_instance_cache) > INSTANCE_CACHE_SIZE:
+        _instance_cache.popitem(last=False)
+    return instance
+
+
+# Returns the instance and the initial route for either a package list or an existing instance.
+# The initial route delivers the packages in their stored order, or is built by one of the construction.CONSTRUCTIONS
+# ("nearest_neighbour", "greedy_edge" or "cheapest_insertion") when its name is given.
+def as_instance(package_stream, construction=None):
+    if isinstance(package_stream, ProblemInstance):
+        instance = package_stream
+    else:
+        instance = get_instance(package_stream)
+    if construction is not None:
+        return instance, construct_route(instance, construction)
+    return instance, instance.identity()
+
+
+# Converts a route found on the instance back to the representation the solver was called with.
+def as_solution(package_stream, instance, permutation):
+    if isinstance(package_stream, ProblemInstance):
+        return permutation
+    return instance.to_packages(permutation)
@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+
+
+# Random number generator used by a solver run. Every solver and problem.generate_package_stream accept an rng argument:
+#  - None uses the global random module, as before,
+#  - an int (NumPy integers included), str or bytes seed creates a random.Random with that seed,
+#  - a random.Random is used as is,
+#  - a numpy.random.Generator is wrapped in GeneratorRandom.
+# The operators below the solvers (moves, crossovers, selection...) receive the object returned by this function.
+def get_rng(rng=None):
+    if rng is None:
+        return random
+    if isinstance(rng, np.random.Generator):
+        return GeneratorRandom(rng)
+    if isinstance(rng, (random.Random, GeneratorRandom)) or rng is random:
+        return rng
+    if isinstance(rng, np.integer):
+        rng = int(rng)
+    return random.Random(rng)
+
+
+# Independent seeds for parallel or repeated runs, drawn from a generator so the whole set is reproducible from one seed.
+def spawn_seeds(rng, num_seeds):
+    rng = get_rng(rng)
+    return [rng.randrange(2**32) for _ in range(num_seeds)]
+
+
+# Exposes the methods of random.Random used by the solvers on top of a numpy.random.Generator.
+class GeneratorRandom:
+    def __init__(self, generator):
+        self.generator = generator
+
+    def random(self):
+        return float(self.generator.random())
+
+    def uniform(self, a, b):
+        return float(self.generator.uniform(a, b))
+
+    # Integer between a and b, both included.
+    def randint(self, a, b):
+        return int(self.generator.integers(a, b, endpoint=True))
+
+    def randrange(self, start, stop=None):
+        if stop is None:
+            start, stop = 0, start
+        return int(self.generator.integers(start, stop))
+
+    def choice(self, sequence):
+        return sequence[int(self.generator.integers(len(sequence)))]
+
+    def sample(self, population, k):
+        population = list(population)
+        return [population[i] for i in self.generator.choice(len(population), k, replace=False).tolist()]
+
+    def shuffle(self, sequence):
+        self.generator.shuffle(sequence)
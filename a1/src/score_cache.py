@@ -0,0 +1,105 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from evaluation import evaluate_permutation, evaluate_permutations
+
+# Rough memory used by one cache entry (hash, score and the OrderedDict bookkeeping), used to turn a memory cap into an entry limit.
+ENTRY_BYTES = 120
+
+
+# Cache of route scores for one problem.ProblemInstance, keyed by route hash (see ProblemInstance.route_hash).
+# It holds at most max_entries scores, or as many as fit in max_bytes, and evicts the least recently used ones first.
+# The same cache can be shared by several solvers working on the same instance. It is bound to the first instance it is
+# used with, since the hashes of routes of different instances are not comparable, and keeps a reference to it. Another
+# instance with the same packages (see ProblemInstance.same_packages) is accepted, and the bound instance is used for it.
+class ScoreCache:
+    def __init__(self, max_entries=100000, max_bytes=None):
+        self.instance = None
+        if max_bytes is not None:
+            max_entries = max(1, max_bytes // ENTRY_BYTES)
+        self.max_entries = max_entries
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+    # Binds the cache to an instance, or checks that it has the packages of the one the cache is bound to.
+    def bind(self, instance):
+        if self.instance is None:
+            self.instance = instance
+        elif not self.instance.same_packages(instance):
+            raise ValueError("ScoreCache is already used with another instance")
+
+    # Returns the cached score of a route hash, or None.
+    def get(self, key):
+        score = self.scores.get(key)
+        if score is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.scores.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        self.scores[key] = score
+        self.scores.move_to_end(key)
+        if len(self.scores) > self.max_entries:
+            self.scores.popitem(last=False)
+            self.evictions += 1
+
+    # Score of a single permutation, evaluated only if it is not cached.
+    def evaluate(self, instance, permutation):
+        self.bind(instance)
+        key = self.instance.route_hash(permutation)
+        score = self.get(key)
+        if score is None:
+            score = evaluate_permutation(self.instance, permutation)
+            self.put(key, score)
+        return score
+
+    # Scores of a 2-D array of permutations. Only the routes that are not cached are evaluated, in one batch,
+    # with the given evaluator (see evaluators.py) or utils.evaluate_permutations. A route that appears several times in
+    # the population is looked up and evaluated once.
+    def evaluate_population(self, instance, population, evaluator=None):
+        self.bind(instance)
+        keys = self.instance.route_hashes(population).tolist()
+        scores = np.empty(len(keys))
+        rows_by_key = {}
+        for i, key in enumerate(keys):
+            rows_by_key.setdefault(key, []).append(i)
+        missing = {}
+        for key, rows in rows_by_key.items():
+            score = self.get(key)
+            if score is not None:
+                scores[rows] = score
+            else:
+                missing[key] = rows
+
+        if missing:
+            first_rows = [rows[0] for rows in missing.values()]
+            if evaluator is not None:
+                new_scores = evaluator(population[first_rows])
+            else:
+                new_scores = evaluate_permutations(self.instance, population[first_rows])
+            for (key, rows), score in zip(missing.items(), new_scores.tolist()):
+                scores[rows] = score
+                self.put(key, score)
+        return scores
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    # Counters of the cache, e.g. to log them after a run.
+    def stats(self):
+        return {
+            "entries": len(self.scores),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
@@ -0,0 +1,430 @@
+# Route optimization service: a small HTTP/1.1 server (over TCP or a Unix socket, standard library only) that lets a
+# dispatch system call the solvers without the menus of main.py.
+#
+# Examples:
+#   python3 service.py --port 8080 --max-jobs 4
+#   python3 service.py --unix /tmp/routes.sock
+#
+# Endpoints:
+#   POST   /solve      solves a route and streams its progress as NDJSON (one JSON object per line, chunked encoding)
+#   DELETE /jobs/<id>  cancels a job; it stops at its next check and still returns the best route found so far
+#   GET    /jobs       running and queued jobs
+#   GET    /health     service status
+#
+# The body of /solve is a JSON object:
+#   {"algorithm": "sa", "packages": [{"type": "urgent", "x": 10.5, "y": 3, "delivery_time": 150}, ...],
+#    "parameters": {"cooling": 0.999}, "seed": 7, "time_limit": 2.0, "max_evaluations": null, "target_score": null}
+# Fragile packages need "breaking_chance" and "breaking_cost", urgent ones "delivery_time". The algorithm is one of
+# batch.ALGORITHMS and its parameters default to the ones of batch.default_parameters. Routes are lists of indices into
+# the package list. The response streams these events:
+#   {"event": "accepted", "job": "1"}                       the job was queued
+#   {"event": "started", "job": "1"}                        a worker process started solving it
+#   {"event": "improvement", "job": "1", "score", "route"}  a better route was found (at most every STREAM_INTERVAL seconds)
+#   {"event": "done", "job": "1", "score", "route", "reason", "time", "stats"}
+#   {"event": "error", "job": "1", "error": "..."}
+# The reason of a done event is a termination.Termination reason, "cancelled" included. Closing the connection cancels
+# the job too. At most max_jobs jobs are solved at once and max_queued more wait for a worker; further requests get a 503.
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from batch import ALGORITHMS, default_parameters
+from evaluation import evaluate_permutation
+from problem import TYPE_CODES, Package, ProblemInstance
+from stats import SolverStats
+from termination import Termination
+
+DEFAULT_MAX_JOBS = 4
+DEFAULT_MAX_QUEUED = 16
+# Minimum time between two improvement events of a job, in seconds.
+STREAM_INTERVAL = 0.1
+# Largest request body accepted, in bytes.
+MAX_BODY_SIZE = 64 * 2**20
+# Solver arguments set by the service, which requests cannot override.
+RESERVED_PARAMETERS = {"package_stream", "rng", "stats", "termination", "log", "scores_info"}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+# Queue of the events sent by the worker processes, and one cancellation flag per worker slot, set by init_worker.
+_worker_events = None
+_worker_cancel_flags = None
+
+
+def init_worker(events, cancel_flags):
+    global _worker_events, _worker_cancel_flags
+    _worker_events = events
+    _worker_cancel_flags = cancel_flags
+
+
+# Empty task submitted to start the worker processes.
+def warm_up():
+    pass
+
+
+# on_improvement callback of the stats.SolverStats of a job: sends the new best route to the service, at most once
+# every STREAM_INTERVAL seconds so that fast solvers do not flood the connection.
+class ImprovementStream:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.last_sent = -float("inf")
+
+    def __call__(self, stats, best_score, route):
+        now = time.perf_counter()
+        if now - self.last_sent < STREAM_INTERVAL:
+            return
+        self.last_sent = now
+        event = {"event": "improvement", "job": self.job_id, "score": float(best_score), "route": route.tolist()}
+        _worker_events.put((self.job_id, event))
+
+
+# Solves a job in a worker process. Improvements and the final route are sent through the event queue, in order.
+# The job stops early when the flag of its slot is set.
+def run_job(job_id, slot, algorithm, packages, parameters, seed, limits):
+    try:
+        instance = ProblemInstance.from_packages(packages)
+        stats = SolverStats(on_improvement=ImprovementStream(job_id))
+        termination = Termination(*limits, cancelled=lambda: _worker_cancel_flags[slot] != 0)
+        start_time = time.perf_counter()
+        route = ALGORITHMS[algorithm](
+            package_stream=instance,
+            rng=random.Random(seed) if seed is not None else None,
+            stats=stats,
+            termination=termination,
+            **parameters,
+        )
+        event = {
+            "event": "done",
+            "job": job_id,
+            "score": evaluate_permutation(instance, route),
+            "route": route.tolist(),
+            "reason": termination.reason,
+            "time": time.perf_counter() - start_time,
+            "stats": stats.as_dict(),
+        }
+    except Exception as error:
+        event = {"event": "error", "job": job_id, "error": f"{type(error).__name__}: {error}"}
+    _worker_events.put((job_id, event))
+
+
+# Whether a JSON value is a number. JSON true and false are rejected, although bool is a subclass of int in Python.
+def is_number(value, integer=False):
+    return isinstance(value, int if integer else (int, float)) and not isinstance(value, bool)
+
+
+# Optional field of a /solve request: None when it is missing or null, otherwise a number that is at least minimum.
+def optional_number(request, field, integer=False, minimum=None):
+    value = request.get(field)
+    if value is None:
+        return None
+    if not is_number(value, integer) or (minimum is not None and value < minimum):
+        kind = "an integer" if integer else "a number"
+        raise ValueError(f"{field} must be {kind}" + (f" of at least {minimum}" if minimum is not None else ""))
+    return value
+
+
+# Builds a package from its JSON description. Raises ValueError when a field is missing or invalid.
+def package_from_dict(data, package_id):
+    if not isinstance(data, dict):
+        raise ValueError(f"package {package_id} is not an object")
+    package_type = data.get("type", "normal")
+    if package_type not in TYPE_CODES:
+        raise ValueError(f"package {package_id} has an unknown type: {package_type}")
+    required = {"fragile": ("breaking_chance", "breaking_cost"), "urgent": ("delivery_time",)}.get(package_type, ())
+    for field in ("x", "y") + required:
+        if not is_number(data.get(field)):
+            raise ValueError(f"package {package_id} needs a numeric {field}")
+    return Package(
+        package_type,
+        (float(data["x"]), float(data["y"])),
+        breaking_chance=data.get("breaking_chance"),
+        breaking_cost=data.get("breaking_cost"),
+        delivery_time=data.get("delivery_time"),
+        package_id=package_id,
+    )
+
+
+# Checks the body of a /solve request and returns the arguments of run_job (other than the job id and slot).
+def parse_job(body):
+    try:
+        request = json.loads(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as error:
+        raise ValueError(f"invalid JSON: {error}")
+    if not isinstance(request, dict):
+        raise ValueError("the request must be a JSON object")
+    algorithm = request.get("algorithm", "sa")
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm: {algorithm}")
+    packages = request.get("packages")
+    if not isinstance(packages, list) or not packages:
+        raise ValueError("packages must be a non-empty list")
+    packages = [package_from_dict(data, i) for i, data in enumerate(packages)]
+
+    parameters = default_parameters(algorithm, len(packages))
+    requested = request.get("parameters", {})
+    if not isinstance(requested, dict):
+        raise ValueError("parameters must be an object")
+    reserved = RESERVED_PARAMETERS.intersection(requested)
+    if reserved:
+        raise ValueError(f"parameters cannot set {', '.join(sorted(reserved))}")
+    parameters.update(requested)
+    limits = (
+        optional_number(request, "time_limit", minimum=0),
+        optional_number(request, "max_evaluations", integer=True, minimum=0),
+        optional_number(request, "target_score"),
+    )
+    return algorithm, packages, parameters, optional_number(request, "seed", integer=True), limits
+
+
+# A job of the service: its events, waiting to be written to the client, and the worker slot it runs in.
+class Job:
+    def __init__(self, job_id, algorithm, num_packages):
+        self.id = job_id
+        self.algorithm = algorithm
+        self.num_packages = num_packages
+        self.events = asyncio.Queue()
+        self.slot = None
+        self.task = None
+        self.cancelled = False
+
+    def as_dict(self):
+        state = "running" if self.slot is not None else "queued"
+        return {"job": self.id, "algorithm": self.algorithm, "num_packages": self.num_packages, "state": state}
+
+
+# The service: a pool of max_jobs worker processes, each solving one job at a time, and the HTTP server in front of it.
+# The event loop only parses requests and forwards events; the solvers always run in the worker processes.
+class RouteService:
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, max_queued=DEFAULT_MAX_QUEUED):
+        self.max_jobs = max_jobs
+        self.max_queued = max_queued
+        self.jobs = {}
+        self.job_ids = itertools.count(1)
+        self.free_slots = list(range(max_jobs))
+        self.slots = asyncio.Semaphore(max_jobs)
+        # Forked workers would inherit the listening socket and the client connections open at that time, which then
+        # never see EOF after their response; spawned workers only get the queue and the flags.
+        context = multiprocessing.get_context("spawn")
+        self.events = context.Queue()
+        self.cancel_flags = context.RawArray("b", max_jobs)
+        self.executor = ProcessPoolExecutor(max_workers=max_jobs, mp_context=context, initializer=init_worker, initargs=(self.events, self.cancel_flags))
+        self.event_reader = ThreadPoolExecutor(max_workers=1)
+        self.dispatcher = None
+        self.server = None
+
+    # Starts listening on a Unix socket when a path is given, on host:port otherwise.
+    # The worker processes are started first, so that the first requests do not wait for them.
+    async def start(self, host="127.0.0.1", port=8080, path=None):
+        await asyncio.gather(*(asyncio.wrap_future(self.executor.submit(warm_up)) for _ in range(self.max_jobs)))
+        self.dispatcher = asyncio.create_task(self.dispatch_events())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+        # The workers are waited for in a thread, so that the event loop keeps draining their event queue meanwhile.
+        await asyncio.get_running_loop().run_in_executor(None, lambda: self.executor.shutdown(wait=True, cancel_futures=True))
+        self.events.put(None)
+        if self.dispatcher is not None:
+            await self.dispatcher
+        self.event_reader.shutdown()
+
+    # Forwards the events sent by the worker processes to the queues of their jobs.
+    async def dispatch_events(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(self.event_reader, self.events.get)
+            if message is None:
+                return
+            job_id, event = message
+            job = self.jobs.get(job_id)
+            if job is not None:
+                job.events.put_nowait(event)
+
+    # Waits for a free worker slot and solves the job in it. Its events reach job.events through dispatch_events.
+    async def run(self, job, arguments):
+        try:
+            await self.slots.acquire()
+        except asyncio.CancelledError:
+            job.events.put_nowait({"event": "done", "job": job.id, "score": None, "route": None, "reason": "cancelled"})
+            return
+        try:
+            job.slot = self.free_slots.pop()
+            self.cancel_flags[job.slot] = 1 if job.cancelled else 0
+            job.events.put_nowait({"event": "started", "job": job.id})
+            future = self.executor.submit(run_job, job.id, job.slot, *arguments)
+            try:
+                await asyncio.wrap_future(future)
+            except Exception as error:
+                job.events.put_nowait({"event": "error", "job": job.id, "error": f"{type(error).__name__}: {error}"})
+        finally:
+            if job.slot is not None:
+                self.free_slots.append(job.slot)
+                job.slot = None
+            self.slots.release()
+
+    # Cancels a job: a running job is stopped through its slot flag, a queued one is removed from the queue.
+    def cancel(self, job):
+        job.cancelled = True
+        if job.slot is not None:
+            self.cancel_flags[job.slot] = 1
+        elif job.task is not None:
+            job.task.cancel()
+
+    async def handle(self, reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            method, path, body = request
+            if method == "POST" and path == "/solve":
+                await self.solve(reader, writer, body)
+            elif method == "DELETE" and path.startswith("/jobs/"):
+                job = self.jobs.get(path[len("/jobs/") :])
+                if job is None:
+                    await send_json(writer, 404, {"error": "unknown job"})
+                else:
+                    self.cancel(job)
+                    await send_json(writer, 200, {"job": job.id, "cancelled": True})
+            elif method == "GET" and path == "/jobs":
+                await send_json(writer, 200, [job.as_dict() for job in self.jobs.values()])
+            elif method == "GET" and path == "/health":
+                running = sum(job.slot is not None for job in self.jobs.values())
+                status = {"status": "ok", "running": running, "queued": len(self.jobs) - running, "max_jobs": self.max_jobs}
+                await send_json(writer, 200, status)
+            elif path in ("/solve", "/jobs", "/health") or path.startswith("/jobs/"):
+                await send_json(writer, 405, {"error": f"{method} is not allowed on {path}"})
+            else:
+                await send_json(writer, 404, {"error": f"unknown path: {path}"})
+        except ValueError as error:
+            await send_json(writer, 400, {"error": str(error)})
+        except RequestTooLarge as error:
+            await send_json(writer, 413, {"error": str(error)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # Handles POST /solve: queues the job and streams its events until it is done. If the client goes away first, the
+    # job is cancelled.
+    async def solve(self, reader, writer, body):
+        arguments = parse_job(body)
+        if len(self.jobs) >= self.max_jobs + self.max_queued:
+            await send_json(writer, 503, {"error": "too many jobs, try again later"})
+            return
+
+        job = Job(str(next(self.job_ids)), arguments[0], len(arguments[1]))
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self.run(job, arguments))
+        disconnected = asyncio.create_task(reader.read())
+        try:
+            writer.write(response_head(200, "application/x-ndjson", chunked=True))
+            await send_chunk(writer, {"event": "accepted", "job": job.id})
+            while True:
+                next_event = asyncio.create_task(job.events.get())
+                await asyncio.wait((next_event, disconnected), return_when=asyncio.FIRST_COMPLETED)
+                if not next_event.done():
+                    next_event.cancel()
+                    self.cancel(job)
+                    break
+                event = next_event.result()
+                await send_chunk(writer, event)
+                if event["event"] in ("done", "error"):
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+                    break
+        except ConnectionError:
+            self.cancel(job)
+        finally:
+            disconnected.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+            del self.jobs[job.id]
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+# Reads one HTTP request and returns (method, path, body), or None when the connection closed before sending one.
+async def read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    parts = request_line.decode("latin-1").split()
+    if len(parts) != 3:
+        raise ValueError("malformed request line")
+    method, path, _ = parts
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_SIZE:
+        raise RequestTooLarge(f"the body is larger than {MAX_BODY_SIZE} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?")[0], body
+
+
+def response_head(status, content_type, length=None, chunked=False):
+    lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", f"Content-Type: {content_type}", "Connection: close"]
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    else:
+        lines.append(f"Content-Length: {length}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def send_json(writer, status, data):
+    body = json.dumps(data).encode()
+    writer.write(response_head(status, "application/json", len(body)) + body)
+    await writer.drain()
+
+
+# Writes one event as a chunk holding one NDJSON line.
+async def send_chunk(writer, event):
+    line = (json.dumps(event) + "\n").encode()
+    writer.write(f"{len(line):x}\r\n".encode("latin-1") + line + b"\r\n")
+    await writer.drain()
+
+
+async def serve(host, port, path, max_jobs, max_queued):
+    service = RouteService(max_jobs, max_queued)
+    server = await service.start(host, port, path)
+    print(f"Route service listening on {path if path is not None else f'{host}:{port}'}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the delivery scheduling algorithms over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("--unix", help="listen on this Unix socket instead of a TCP port")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS, help="jobs solved at the same time (worker processes)")
+    parser.add_argument("--max-queued", type=int, default=DEFAULT_MAX_QUEUED, help="jobs waiting for a worker before requests are refused")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_jobs, args.max_queued))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
-import copy
 import math
-import random
+import time
 
-from neighbours import get_random_neighbour_solution
-from utils import evaluate_solution
+from delta import RouteState
+from neighbours import get_random_move
+from problem import as_instance, as_solution
+from randomness import get_rng
 
 
 def prob(current_score, new_score, temperature):
@@ -13,42 +14,79 @@ def prob(current_score, new_score, temperature):
     return math.exp(-(current_score - new_score) / temperature)
 
 # Executes the Simulated Annealing algorithm with an optional cooling schedule.
-def get_sa_solution(package_stream, log=False, scores_info=False, cooling=0.99):
+# The package stream can be a list of packages or a problem.ProblemInstance, and the solution is returned in the same form.
+# Random moves and acceptances are drawn from rng (see randomness.get_rng), the global random module by default.
+# A stats.SolverStats can be given to count evaluations and moves and time each phase of the search.
+# The initial route can be built by a constructive heuristic, named by construction (see problem.as_instance).
+# A termination.Termination can be given to stop at a time limit, evaluation budget or target score; the reason is left in it.
+def get_sa_solution(package_stream, log=False, scores_info=False, cooling=0.99, rng=None, stats=None, construction=None, termination=None):
+    rng = get_rng(rng)
     it = 0
     it_no_imp = 0
     temperature = 1000
-    solution = copy.deepcopy(package_stream)
-    score = evaluate_solution(solution)
+    instance, solution = as_instance(package_stream, construction)
+    state = RouteState(solution, instance)
+    score = state.score()
 
-    best_solution = copy.deepcopy(solution)
+    best_solution = solution.copy()
     best_score = score
     
     scores = []
 
     if log:
         print(f"Initial score: {best_score}")
+    if stats is not None:
+        stats.start()
+    if termination is not None:
+        termination.start()
 
     while temperature > 0.1:
+        if termination is not None and termination.should_stop(best_score):
+            break
         # Default temperature is 0.99 to ensure the algorithm doesn't converge too fast or too slow.
         temperature = temperature * cooling
         it += 1
         it_no_imp += 1
 
-        temp_solution = get_random_neighbour_solution(solution)
-        temp_score = evaluate_solution(temp_solution)
+        if stats is not None:
+            clock = time.perf_counter()
+        # Moves are scored against the cached route state and applied in place, so nothing is copied unless a new best is found.
+        move = get_random_move(solution, rng)
+        if stats is not None:
+            clock = stats.add_time("neighbours", clock)
+        temp_score = score + move.delta(state)
+        if stats is not None:
+            clock = stats.add_time("evaluation", clock)
+            stats.evaluations += 1
+            stats.moves_proposed += 1
+        if termination is not None:
+            termination.evaluations += 1
 
-        if temp_score > best_score:
-            best_solution = copy.deepcopy(temp_solution)
-            best_score = temp_score
-            it_no_imp = 0
-            if log:
-                print(f"New best score: {temp_score}")
         # If the new solution is better or the probability of accepting it is greater than a random number, the solution is updated.
-        if prob(score, temp_score, temperature) >= random.random():
-            solution = copy.deepcopy(temp_solution)
-            score = temp_score
-        scores.append((best_score, score))
-        
+        if prob(score, temp_score, temperature) >= rng.random():
+            state.apply(move)
+            score = state.score()
+            if stats is not None:
+                stats.moves_accepted += 1
+            if score > best_score:
+                best_solution = solution.copy()
+                best_score = score
+                it_no_imp = 0
+                if stats is not None:
+                    stats.improved(best_score, best_solution)
+                if log:
+                    print(f"New best score: {score}")
+        if stats is not None:
+            stats.add_time("selection", clock)
+            stats.iteration(best_score, score)
+        if scores_info:
+            scores.append((best_score, score))
+
+    if stats is not None:
+        stats.stop()
+    if termination is not None:
+        termination.finish("temperature")
+    best_solution = as_solution(package_stream, instance, best_solution)
     if(scores_info):
         return best_solution, scores
     return best_solution
\ No newline at end of file
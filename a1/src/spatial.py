@@ -0,0 +1,147 @@
+import math
+
+import numpy as np
+
+# Average number of points per grid cell.
+POINTS_PER_CELL = 2
+
+
+# Uniform grid over a set of points, used to find the points close to a position without comparing it with every point.
+# Each cell holds the indices of the points inside it. Cells are square and sized so that they hold about
+# points_per_cell points on average, also when the points are collinear or coincident. Only the given indices are put in the grid at first (all the points by default);
+# the others can be added later with add.
+class SpatialGrid:
+    def __init__(self, xs, ys, points_per_cell=POINTS_PER_CELL, indices=None):
+        self.xs = np.asarray(xs, dtype=np.float64)
+        self.ys = np.asarray(ys, dtype=np.float64)
+        num_points = len(self.xs)
+        if num_points:
+            self.min_x = float(self.xs.min())
+            self.min_y = float(self.ys.min())
+            width = float(self.xs.max()) - self.min_x
+            height = float(self.ys.max()) - self.min_y
+        else:
+            self.min_x = self.min_y = width = height = 0.0
+        # Points along a line (or a very thin strip) fill a bounding box of almost no area, which would give tiny cells
+        # and millions of empty columns; the second bound keeps at most about num_points / points_per_cell cells per side.
+        num_cells = max(num_points, 1) / points_per_cell
+        area = max(width, 1e-9) * max(height, 1e-9)
+        self.cell_size = max(math.sqrt(area / num_cells), max(width, height) / num_cells, 1e-9)
+        self.columns = int(width / self.cell_size) + 1
+        self.rows = int(height / self.cell_size) + 1
+
+        self.cells = {}
+        indices = np.arange(num_points) if indices is None else np.asarray(indices, dtype=np.int64)
+        cell_x = ((self.xs[indices] - self.min_x) / self.cell_size).astype(np.int64)
+        cell_y = ((self.ys[indices] - self.min_y) / self.cell_size).astype(np.int64)
+        for i, key in zip(indices.tolist(), zip(cell_x.tolist(), cell_y.tolist())):
+            self.cells.setdefault(key, []).append(i)
+
+    # Cell containing a position, which may be outside the grid.
+    def cell(self, x, y):
+        return int((x - self.min_x) // self.cell_size), int((y - self.min_y) // self.cell_size)
+
+    # Grid cell closest to a position: its own cell, or the nearest border cell when it is outside the grid. Points outside
+    # the rings 0..radius around it are still at least radius * cell_size away from the position, so the ring searches stay
+    # exact, and a far away position does not have to search through empty rings first.
+    def query_cell(self, x, y):
+        cell_x, cell_y = self.cell(x, y)
+        return min(max(cell_x, 0), self.columns - 1), min(max(cell_y, 0), self.rows - 1)
+
+    # Points in the cells at Chebyshev distance `radius` of a cell (the square ring around it).
+    # Every point outside the rings 0..radius is at least radius * cell_size away from any position inside the centre cell.
+    def ring(self, cell_x, cell_y, radius):
+        if radius == 0:
+            return list(self.cells.get((cell_x, cell_y), ()))
+        points = []
+        for dx in range(-radius, radius + 1):
+            for dy in (-radius, radius):
+                points.extend(self.cells.get((cell_x + dx, cell_y + dy), ()))
+        for dy in range(-radius + 1, radius):
+            for dx in (-radius, radius):
+                points.extend(self.cells.get((cell_x + dx, cell_y + dy), ()))
+        return points
+
+    # Largest ring radius needed to cover the whole grid from one of its cells.
+    def max_radius(self, cell_x, cell_y):
+        return max(cell_x, self.columns - 1 - cell_x, cell_y, self.rows - 1 - cell_y)
+
+    # Adds one of the points to the grid.
+    def add(self, i):
+        self.cells.setdefault(self.cell(self.xs[i], self.ys[i]), []).append(i)
+
+    # Removes a point, so later queries no longer return it.
+    def remove(self, i):
+        key = self.cell(self.xs[i], self.ys[i])
+        members = self.cells[key]
+        members.remove(i)
+        if not members:
+            del self.cells[key]
+
+    # Nearest remaining point to a position, or None when the grid is empty. Rings are searched outwards until no
+    # unexplored cell can hold a closer point.
+    def nearest(self, x, y):
+        cell_x, cell_y = self.query_cell(x, y)
+        best = None
+        best_dist = math.inf
+        radius = 0
+        max_radius = self.max_radius(cell_x, cell_y)
+        while radius <= max_radius:
+            for i in self.ring(cell_x, cell_y, radius):
+                dist = math.hypot(self.xs[i] - x, self.ys[i] - y)
+                if dist < best_dist:
+                    best = i
+                    best_dist = dist
+            if best is not None and best_dist <= radius * self.cell_size:
+                break
+            radius += 1
+        return best
+
+    # The k nearest points in the grid to a position, closest first (fewer when the grid holds fewer points).
+    def nearest_points(self, x, y, k):
+        cell_x, cell_y = self.query_cell(x, y)
+        found = []
+        radius = 0
+        max_radius = self.max_radius(cell_x, cell_y)
+        while radius <= max_radius:
+            for i in self.ring(cell_x, cell_y, radius):
+                found.append((math.hypot(self.xs[i] - x, self.ys[i] - y), i))
+            if len(found) >= k:
+                found.sort()
+                if found[k - 1][0] <= radius * self.cell_size:
+                    break
+            radius += 1
+        found.sort()
+        return [i for _, i in found[:k]]
+
+    # The k nearest other points of every point, closest first, as an (n, k) int32 array (k is capped at n - 1).
+    # The points of each cell are handled together: their distances to the points in the surrounding rings are computed
+    # at once, and more rings are added until the k-th nearest point of each of them is known to be inside.
+    def k_nearest(self, k):
+        num_points = len(self.xs)
+        k = min(k, num_points - 1)
+        result = np.empty((num_points, max(k, 0)), dtype=np.int32)
+        if k <= 0:
+            return result
+
+        for (cell_x, cell_y), members in self.cells.items():
+            members = np.array(members)
+            nearby = self.ring(cell_x, cell_y, 0)
+            radius = 0
+            max_radius = self.max_radius(cell_x, cell_y)
+            while True:
+                radius += 1
+                nearby.extend(self.ring(cell_x, cell_y, radius))
+                if len(nearby) <= k and radius < max_radius:
+                    continue
+                candidates = np.array(nearby)
+                dist = np.hypot(self.xs[members, None] - self.xs[candidates], self.ys[members, None] - self.ys[candidates])
+                dist[members[:, None] == candidates] = np.inf
+                nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                nearest_dist = np.take_along_axis(dist, nearest, axis=1)
+                if radius >= max_radius or nearest_dist.max() <= radius * self.cell_size:
+                    break
+
+            order = np.argsort(nearest_dist, axis=1, kind="stable")
+            result[members] = candidates[np.take_along_axis(nearest, order, axis=1)]
+        return result
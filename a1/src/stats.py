@@ -0,0 +1,90 @@
+import time
+
+# Phases whose time is measured by the solvers: building neighbours or offspring, scoring them, and choosing among them
+# (acceptance, tabu checks, parent and elite selection).
+PHASES = ("neighbours", "evaluation", "selection")
+
+
+# Counters and phase timings of a solver run, with an optional progress callback.
+# Every solver accepts stats=None; when it is None no counter is updated and no clock is read, so instrumentation has no cost
+# unless it is asked for. The same object can be passed to several runs to add up their counters.
+#
+# The callback is called as callback(stats, best_score, current_score) every callback_interval iterations
+# (generations for the genetic algorithm, whose offspring are counted as proposed moves and none as accepted).
+# on_improvement is called as on_improvement(stats, best_score, route) every time a new best route is found. The route is
+# the solver's permutation of the instance, which it may keep changing in place, so it has to be copied to be kept.
+class SolverStats:
+    def __init__(self, callback=None, callback_interval=1, on_improvement=None):
+        self.callback = callback
+        self.callback_interval = callback_interval
+        self.on_improvement = on_improvement
+        self.iterations = 0
+        self.evaluations = 0
+        self.moves_proposed = 0
+        self.moves_accepted = 0
+        self.improvements = 0
+        self.phase_times = dict.fromkeys(PHASES, 0.0)
+        self.elapsed = 0.0
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def stop(self):
+        if self.start_time is not None:
+            self.elapsed += time.perf_counter() - self.start_time
+            self.start_time = None
+
+    # Adds time to a phase and returns the current clock, so consecutive phases can be timed from one reading each.
+    def add_time(self, phase, since):
+        now = time.perf_counter()
+        self.phase_times[phase] += now - since
+        return now
+
+    # Ends an iteration and calls the callback when it is due.
+    def iteration(self, best_score, current_score):
+        self.iterations += 1
+        if self.callback is not None and self.iterations % self.callback_interval == 0:
+            self.callback(self, best_score, current_score)
+
+    # Counts a new best route and passes it to on_improvement.
+    def improved(self, best_score, route):
+        self.improvements += 1
+        if self.on_improvement is not None:
+            self.on_improvement(self, best_score, route)
+
+    # Time of the run so far, including the time since start() if it is still running.
+    def total_time(self):
+        if self.start_time is None:
+            return self.elapsed
+        return self.elapsed + time.perf_counter() - self.start_time
+
+    # Adds the counters and phase times of another run, e.g. one done in a worker process, to these stats.
+    # Its elapsed time is not added, since the runs may have overlapped.
+    def add(self, other):
+        self.iterations += other.iterations
+        self.evaluations += other.evaluations
+        self.moves_proposed += other.moves_proposed
+        self.moves_accepted += other.moves_accepted
+        self.improvements += other.improvements
+        for phase, phase_time in other.phase_times.items():
+            self.phase_times[phase] += phase_time
+
+    def evaluations_per_second(self):
+        total_time = self.total_time()
+        return self.evaluations / total_time if total_time > 0 else 0.0
+
+    def as_dict(self):
+        return {
+            "iterations": self.iterations,
+            "evaluations": self.evaluations,
+            "moves_proposed": self.moves_proposed,
+            "moves_accepted": self.moves_accepted,
+            "improvements": self.improvements,
+            "time": self.total_time(),
+            "evaluations_per_second": self.evaluations_per_second(),
+            "phase_times": dict(self.phase_times),
+        }
+
+    def __repr__(self):
+        return f"SolverStats({self.as_dict()})"
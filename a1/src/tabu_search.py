@@ -1,69 +1,170 @@
 import random
+import time
 
-from neighbours import get_random_neighbour_solution
-from utils import evaluate_solution
+from delta import RouteState
+from neighbours import get_random_move
+from problem import as_instance, as_solution
+from randomness import get_rng
 
-# Obtains a random number of neighbours for the current solution, ensuring that they are not in the tabu list.
-def get_tabu_neighbour(solution, tabu_list):
-    neighbours_size = random.randint(3, 10)
+
+# Tabu memory of route hashes (see problem.ProblemInstance.route_hash).
+# Membership is a dictionary lookup, and entries expire through a ring buffer indexed by the iteration at which they stop
+# being tabu, so the cost of an iteration does not grow with the tenure or with the length of the routes.
+class TabuMemory:
+    def __init__(self, size=16):
+        self.iteration = 0
+        self.expiry = {}
+        self.ring = [[] for _ in range(size)]
+
+    def __contains__(self, key):
+        return self.expiry.get(key, 0) > self.iteration
+
+    def __len__(self):
+        return len(self.expiry)
+
+    # Makes the key tabu for the next tenure iterations.
+    def add(self, key, tenure):
+        if tenure >= len(self.ring):
+            self.resize(2 * tenure)
+        expires = self.iteration + tenure + 1
+        self.expiry[key] = expires
+        self.ring[expires % len(self.ring)].append(key)
+
+    # Advances one iteration and forgets the keys whose tenure has ended.
+    def step(self):
+        self.iteration += 1
+        bucket = self.ring[self.iteration % len(self.ring)]
+        for key in bucket:
+            # A key added again later has a newer expiry and stays in the memory.
+            if self.expiry.get(key) == self.iteration:
+                del self.expiry[key]
+        bucket.clear()
+
+    # Rebuilds the ring buffer with more slots, needed when the tenure grows beyond its size.
+    def resize(self, size):
+        self.ring = [[] for _ in range(size)]
+        for key, expires in self.expiry.items():
+            self.ring[expires % size].append(key)
+
+
+# Obtains a random number of neighbours for the current solution.
+# Neighbours are described by their move and route hash, which is updated from the positions the move changes,
+# so no neighbour is copied. Returns (move, hash, is_tabu) tuples without duplicates.
+def get_tabu_neighbour(solution, solution_hash, tabu_memory, instance, rng=random):
+    neighbours_size = rng.randint(3, 10)
     neighbourhood = []
+    seen = set()
     for i in range(neighbours_size):
-        neighbour = get_random_neighbour_solution(solution)
-        while neighbour in tabu_list:
-            neighbour = get_random_neighbour_solution(solution)
-        if (
-            not any(neighbour == pair[0] for pair in tabu_list)
-            and neighbour not in neighbourhood
-        ):
-            neighbourhood.append(neighbour)
+        move = get_random_move(solution, rng)
+        lo, hi = move.bounds()
+        old_hash = instance.positions_hash(solution, lo, hi)
+        move.apply(solution)
+        neighbour_hash = (solution_hash - old_hash + instance.positions_hash(solution, lo, hi)) % 2**64
+        move.undo(solution)
+        if neighbour_hash not in seen:
+            seen.add(neighbour_hash)
+            neighbourhood.append((move, neighbour_hash, neighbour_hash in tabu_memory))
 
     return neighbourhood
 
 # Executes the tabu search algorithm over a specified number of iterations. It has a base tabu tenure and a maximum stagnation count.
 # The base tabu tenure is used to determine the number of iterations a solution is kept in the tabu list. It also increases when the algorithm stagnates.
 # The maximum stagnation count is used to determine when the algorithm has stagnated.
-def get_tabu_solution(package_stream,num_iterations, base_tabu_tenure, max_stagnation, log=False, scores_info=False):
+# The package stream can be a list of packages or a problem.ProblemInstance, and the solution is returned in the same form.
+# A score_cache.ScoreCache can be given so that neighbours already visited are not scored again.
+# Random neighbours are drawn from rng (see randomness.get_rng), the global random module by default.
+# A stats.SolverStats can be given to count evaluations and moves and time each phase of the search.
+# The initial route can be built by a constructive heuristic, named by construction (see problem.as_instance).
+# A termination.Termination can be given to stop at a time limit, evaluation budget or target score; the reason is left in it.
+def get_tabu_solution(package_stream,num_iterations, base_tabu_tenure, max_stagnation, log=False, scores_info=False, cache=None, rng=None, stats=None, construction=None, termination=None):
+    rng = get_rng(rng)
     iteration = 0
     stagnation_count = 0
-    best_solution = package_stream
-    best_candidate = None
-    best_score = evaluate_solution(best_solution)
-    tabu_list = []
+    instance, best_solution = as_instance(package_stream, construction)
+    state = RouteState(best_solution, instance)
+    best_hash = instance.route_hash(best_solution)
+    best_candidate_hash = None
+    best_move = None
+    best_score = state.score()
+    tabu_memory = TabuMemory(2 * base_tabu_tenure + 2)
+    if cache is not None:
+        cache.bind(instance)
     scores = []
     if log:
         print(f"Initial score: {best_score}")
+    if stats is not None:
+        stats.start()
+    if termination is not None:
+        termination.start()
 
     while iteration < num_iterations:
+        if termination is not None and termination.should_stop(best_score):
+            break
         iteration += 1
-        neighbours = get_tabu_neighbour(best_solution, tabu_list)
+        if stats is not None:
+            clock = time.perf_counter()
+        neighbours = get_tabu_neighbour(best_solution, best_hash, tabu_memory, instance, rng)
+        if stats is not None:
+            clock = stats.add_time("neighbours", clock)
+            stats.moves_proposed += len(neighbours)
         best_candidate_eval = -float('inf')
-        for neighbour in neighbours:
-            neighbour_score = evaluate_solution(neighbour)
+        for move, neighbour_hash, tabu in neighbours:
+            neighbour_score = cache.get(neighbour_hash) if cache is not None else None
+            if neighbour_score is None:
+                neighbour_score = best_score + move.delta(state)
+                if stats is not None:
+                    stats.evaluations += 1
+                if termination is not None:
+                    termination.evaluations += 1
+                if cache is not None:
+                    cache.put(neighbour_hash, neighbour_score)
+            # Aspiration criterion: a tabu neighbour is only considered if it is better than the best solution found so far.
+            if tabu and neighbour_score <= best_score:
+                continue
             if neighbour_score > best_candidate_eval:
-                best_candidate = neighbour
+                best_candidate_hash = neighbour_hash
+                best_move = move
                 best_candidate_eval = neighbour_score
 
+        if stats is not None:
+            clock = stats.add_time("evaluation", clock)
+
         if best_candidate_eval == -float("inf"):
+            if termination is not None:
+                termination.finish("no_neighbours")
             break
 
         if best_candidate_eval > best_score:
-            best_solution = best_candidate
-            best_score = best_candidate_eval
+            state.apply(best_move)
+            best_hash = best_candidate_hash
+            best_score = state.score()
             iteration = 0
             stagnation_count = 0
+            if stats is not None:
+                stats.moves_accepted += 1
+                stats.improved(best_score, best_solution)
             if log:
                 print(f"New best score: {best_score}")
         else:
             stagnation_count += 1
             if stagnation_count >= max_stagnation:
                 base_tabu_tenure = int(base_tabu_tenure + pow(base_tabu_tenure, 0.5))
-                stagnation_count = 0   
+                stagnation_count = 0
+
+        if scores_info:
+            scores.append((best_score, best_candidate_eval))
+        tabu_memory.step()
+        tabu_memory.add(best_candidate_hash, base_tabu_tenure)
+        if stats is not None:
+            stats.add_time("selection", clock)
+            stats.iteration(best_score, best_candidate_eval)
 
-        scores.append((best_score, best_candidate_eval))
-        tabu_list = [tabu for tabu in tabu_list if tabu[1] > 0]
-        tabu_list = [[tabu[0], tabu[1] - 1] for tabu in tabu_list]
-        tabu_list.append([best_candidate, base_tabu_tenure])
+    if stats is not None:
+        stats.stop()
+    if termination is not None:
+        termination.finish("no_improvement")
 
+    best_solution = as_solution(package_stream, instance, best_solution)
     if (scores_info):
         return best_solution, scores
-    return best_solution
\ No newline at end of file
+    return best_solution
@@ -0,0 +1,54 @@
+import time
+
+
+# Anytime stopping conditions shared by every solver: a time limit in seconds, a maximum number of evaluations and a target
+# score. Every solver accepts termination=None; when it is given, the solver stops as soon as one of its limits is reached and
+# returns the best route found so far, and the reason it stopped is left in termination.reason:
+#     termination = Termination(time_limit=0.5, target_score=-12000)
+#     solution = get_sa_solution(package_stream, termination=termination)
+#     print(termination.reason)
+# The reason is "time_limit", "max_evaluations" or "target_score" when a limit stopped the search, otherwise the solver's
+# own stopping rule: "no_improvement" (hill climbing and tabu search ran num_iterations iterations without improving),
+# "no_neighbours" (every tabu neighbour was rejected), "local_optimum" (steepest ascent), "temperature" (simulated
+# annealing cooled down) or "generations" (the genetic algorithms ran all their generations).
+# A cancelled function can also be given; when it returns True the search stops with the reason "cancelled", which is how
+# the route service (service.py) stops a job whose client went away.
+# Limits are checked once per iteration (per chunk of moves for the steepest ascent scan, per generation for the genetic
+# algorithm and per migration epoch for the island model), and the check costs a few comparisons and one clock reading.
+class Termination:
+    def __init__(self, time_limit=None, max_evaluations=None, target_score=None, cancelled=None):
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.target_score = target_score
+        self.cancelled = cancelled
+        self.deadline = None
+        self.evaluations = 0
+        self.reason = None
+
+    # Starts the clock and resets the counters. Solvers call it when they start, so the same object can be reused.
+    def start(self):
+        self.deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        self.evaluations = 0
+        self.reason = None
+
+    # Whether the search has to stop, given the best score found so far. Once it has returned True it keeps doing so.
+    def should_stop(self, best_score):
+        if self.reason is not None:
+            return True
+        if self.target_score is not None and best_score >= self.target_score:
+            self.reason = "target_score"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = "max_evaluations"
+        elif self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.reason = "time_limit"
+        elif self.cancelled is not None and self.cancelled():
+            self.reason = "cancelled"
+        return self.reason is not None
+
+    # Records the solver's own stopping rule, unless a limit stopped it first.
+    def finish(self, reason):
+        if self.reason is None:
+            self.reason = reason
+
+    def __repr__(self):
+        return f"Termination(reason={self.reason!r}, evaluations={self.evaluations})"
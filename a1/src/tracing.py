@@ -0,0 +1,75 @@
+import json
+import math
+from collections import deque
+
+# Number of samples a ProgressTrace keeps in memory.
+TRACE_BUFFER_SIZE = 10000
+# Number of samples loaded from a trace file for plotting, at most.
+TRACE_PLOT_POINTS = 5000
+
+
+# Progress trace of a solver run with bounded memory. It is the callback of a stats.SolverStats:
+#     trace = ProgressTrace("sa.ndjson", every=10)
+#     get_sa_solution(package_stream, stats=SolverStats(callback=trace))
+# One sample out of every `every` iterations is kept. The last buffer_size samples are kept in a ring buffer and,
+# when a path is given, every sample is also appended to that file as one JSON object per line (NDJSON), so memory does not
+# grow with the length of the run. The show_*_graph functions in utils.py accept a trace instead of a list of scores.
+class ProgressTrace:
+    def __init__(self, path=None, every=1, buffer_size=TRACE_BUFFER_SIZE):
+        self.path = path
+        self.every = every
+        self.samples = deque(maxlen=buffer_size)
+        self.count = 0
+        self.file = open(path, "w") if path is not None else None
+
+    def __call__(self, stats, best_score, current_score):
+        self.record(best_score, current_score)
+
+    # Adds the scores of one iteration, keeping it only if it is one of the sampled iterations.
+    def record(self, best_score, current_score):
+        self.count += 1
+        if self.count % self.every != 0:
+            return
+        self.samples.append((self.count, best_score, current_score))
+        if self.file is not None:
+            self.file.write(json.dumps({"iteration": self.count, "best": best_score, "current": current_score}) + "\n")
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Sampled (iteration, best score, current score) tuples: the whole run read back from the file when there is one,
+    # otherwise the samples still in the ring buffer.
+    def points(self, max_points=TRACE_PLOT_POINTS):
+        if self.path is None:
+            return list(self.samples)
+        if self.file is not None:
+            self.file.flush()
+        return load_trace(self.path, max_points)
+
+
+# Reads the samples of a trace file, keeping at most max_points of them evenly spread over the run.
+# While reading, every other sample is dropped when the kept ones reach twice max_points, so memory stays bounded for any
+# file size, and the result is thinned to max_points at the end.
+def load_trace(path, max_points=TRACE_PLOT_POINTS):
+    points = []
+    stride = 1
+    with open(path) as file:
+        for line_no, line in enumerate(file):
+            if line_no % stride != 0:
+                continue
+            sample = json.loads(line)
+            points.append((sample["iteration"], sample["best"], sample["current"]))
+            if len(points) >= 2 * max_points:
+                points = points[::2]
+                stride *= 2
+    if len(points) > max_points:
+        points = points[:: math.ceil(len(points) / max_points)]
+    return points
@@ -1,54 +1,22 @@
-import copy
-import math
-import random
-import pygame
-import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt
-
-# Create a random assortment of the packages from an existing list.
-def generate_random_solution(package_stream):
-    solution = copy.deepcopy(package_stream)
-    random.shuffle(solution)
-    return solution
-
-# Calculate the total cost of delivering the packages in the given order and return its negative value for minimization
-def evaluate_solution(solution):
-    last_x = 0
-    last_y = 0
-    total_dist = 0
-    total_breaking_cost = 0
-    total_urgent_cost = 0
 
-    for package in solution:
-        if package == None:
-            return 0
-        
-        # Calculate distance from the last package's location
-        dist = math.sqrt(
-            (package.coordinates_x - last_x) ** 2
-            + (package.coordinates_y - last_y) ** 2
-        )
-        total_dist += dist
-
-        last_x = package.coordinates_x
-        last_y = package.coordinates_y
-
-        if package.package_type == "fragile":
-            p_damage = 1 - ((1 - package.breaking_chance) ** total_dist)
-            total_breaking_cost += (
-                p_damage * package.breaking_cost
-            )  # Expected value of breaking cost instead of random chance in order to make the evaluation function deterministic and consistent
-
-        if package.package_type == "urgent":
-            if (
-                total_dist > package.delivery_time
-            ):  # 60km/h = 1km/min so total_dist is equal to the minutes elapsed
-                total_urgent_cost += (total_dist - package.delivery_time) * 0.3
+from evaluation import BATCH_ELEMENTS, generate_random_solution, evaluate_solution, evaluate_permutation, evaluate_permutations
+from tracing import ProgressTrace, load_trace
 
-    total_cost = total_dist * 0.3 + total_breaking_cost + total_urgent_cost
+# pygame, pandas and matplotlib are only imported by the functions that use them, so importing this module stays cheap.
 
-    return -total_cost
+# Returns the iterations, best scores and current scores of a run's progress, given as a tracing.ProgressTrace, the path
+# of a trace file, or the list of (best, current) tuples returned by the solvers with scores_info.
+def get_progress(scores):
+    if isinstance(scores, ProgressTrace):
+        points = scores.points()
+    elif isinstance(scores, str):
+        points = load_trace(scores)
+    else:
+        best_scores, current_scores = zip(*scores)
+        return np.arange(1, len(scores) + 1), best_scores, current_scores
+    iterations, best_scores, current_scores = zip(*points)
+    return iterations, best_scores, current_scores
 
 # Print the IDs of packages in the solution in order
 def print_solution_ids(solution):
@@ -61,6 +29,8 @@ def print_solution_ids(solution):
 
 # Visualize the delivery path of packages using pygame.
 def display_path(solution,map_size):
+    import pygame
+
     WIDTH = 600
     WHITE = (255, 255, 255)
     RED = (255, 0, 0)
@@ -108,6 +78,8 @@ def display_path(solution,map_size):
     
 # Convert a solution (list of package objects) into a Pandas DataFrame for analysis.
 def solution_to_data_frame(solution):
+    import pandas as pd
+
     df = pd.DataFrame(
         [
             (
@@ -135,9 +107,9 @@ def solution_to_data_frame(solution):
 
 # Plot the progress of scores in a Hill Climbing optimization algorithm.
 def show_hc_graph(scores):
-    best_scores, neighbour_scores = zip(*scores)
+    from matplotlib import pyplot as plt
 
-    iterations = np.arange(1, len(scores) + 1)
+    iterations, best_scores, neighbour_scores = get_progress(scores)
 
     plt.plot(iterations, best_scores, label='Best Score')
     plt.plot(iterations, neighbour_scores, label='Neighbour Score')
@@ -150,11 +122,10 @@ def show_hc_graph(scores):
 
 # Compare Hill Climbing and Steepest Ascent Hill Climbing algorithms over iterations.   
 def show_hc_iteration_comparison_graph(hc_scores, sahc_scores):
-    best_hc_scores, _ = zip(*hc_scores)
-    best_sahc_scores, _ = zip(*sahc_scores)
-    
-    hc_iterations = np.arange(1, len(best_hc_scores) + 1)
-    sahc_iterations = np.arange(1, len(best_sahc_scores) + 1)
+    from matplotlib import pyplot as plt
+
+    hc_iterations, best_hc_scores, _ = get_progress(hc_scores)
+    sahc_iterations, best_sahc_scores, _ = get_progress(sahc_scores)
     
     plt.plot(hc_iterations, best_hc_scores, label='Basic')
     plt.plot(sahc_iterations, best_sahc_scores, label='Steepest Ascent')
@@ -167,6 +138,8 @@ def show_hc_iteration_comparison_graph(hc_scores, sahc_scores):
 
 # Compare scores of basic and Steepest Ascent Hill Climbing for different package counts.
 def show_hc_score_comparison_graph(num_packages_list, hc_scores, sahc_scores):
+    from matplotlib import pyplot as plt
+
     plt.plot(num_packages_list, hc_scores, label='Basic')
     plt.plot(num_packages_list, sahc_scores, label='Steepest Ascent')
 
@@ -179,6 +152,8 @@ def show_hc_score_comparison_graph(num_packages_list, hc_scores, sahc_scores):
 
 # Compare execution times of basic and Steepest Ascent Hill Climbing for different package counts.
 def show_hc_time_comparison_graph(num_packages_list, hc_times, sahc_times):
+    from matplotlib import pyplot as plt
+
     plt.plot(num_packages_list, hc_times, label='Basic')
     plt.plot(num_packages_list, sahc_times, label='Steepest Ascent')
 
@@ -191,9 +166,9 @@ def show_hc_time_comparison_graph(num_packages_list, hc_times, sahc_times):
 
 # Plot the progress of scores in a Simulated Annealing optimization algorithm.
 def show_sa_graph(scores):
-    best_scores, current_scores = zip(*scores)
+    from matplotlib import pyplot as plt
 
-    iterations = np.arange(1, len(scores) + 1)
+    iterations, best_scores, current_scores = get_progress(scores)
 
     plt.plot(iterations, best_scores, label='Best Score')
     plt.plot(iterations, current_scores, label='Current Score')
@@ -206,6 +181,8 @@ def show_sa_graph(scores):
 
 # Compare scores of basic Hill Climbing and Simulated Annealing for different package counts.
 def show_sa_score_comparison_graph(num_packages_list, hc_scores, sa_score1, sa_score2, sa_score3, sa_score4):
+    from matplotlib import pyplot as plt
+
     plt.plot(num_packages_list, hc_scores, label='Hill Climbing')
     plt.plot(num_packages_list, sa_score1, label='SA: Cooling = 0.9')
     plt.plot(num_packages_list, sa_score2, label='SA: Cooling = 0.95')
@@ -220,6 +197,8 @@ def show_sa_score_comparison_graph(num_packages_list, hc_scores, sa_score1, sa_s
 
 # Compare execution times of basic Hill Climbing and Simulated Annealing for different package counts.
 def show_sa_time_comparison_graph(num_packages_list, hc_times, sa_time1, sa_time2, sa_time3, sa_time4):
+    from matplotlib import pyplot as plt
+
     plt.plot(num_packages_list, hc_times, label='Hill Climbing')
     plt.plot(num_packages_list, sa_time1, label='SA: Cooling = 0.9')
     plt.plot(num_packages_list, sa_time2, label='SA: Cooling = 0.95')
@@ -234,9 +213,9 @@ def show_sa_time_comparison_graph(num_packages_list, hc_times, sa_time1, sa_time
 
 # Plot the progress of scores in a Tabu Search optimization algorithm.
 def show_ts_graph(scores):
-    best_scores, current_scores = zip(*scores)
+    from matplotlib import pyplot as plt
 
-    iterations = np.arange(1, len(scores) + 1)
+    iterations, best_scores, current_scores = get_progress(scores)
 
     plt.plot(iterations, best_scores, label='Best Score')
     plt.plot(iterations, current_scores, label='Current Score')
@@ -249,11 +228,16 @@ def show_ts_graph(scores):
 
 # Plot the progress of scores in a Genetic Algorithm optimization algorithm.
 def show_ga_graph(scores):
-    best_scores = scores
+    from matplotlib import pyplot as plt
 
-    generations = np.arange(1, len(scores) + 1)
+    # The genetic algorithm returns a list of best scores with scores_info, a trace holds (generation, best, generation best) samples.
+    if isinstance(scores, (ProgressTrace, str)):
+        generations, best_scores, _ = get_progress(scores)
+    else:
+        best_scores = scores
+        generations = np.arange(1, len(scores) + 1)
 
-    z = np.polyfit(generations, scores, 5)  
+    z = np.polyfit(generations, best_scores, 5)  
     p = np.poly1d(z)
     plt.plot(generations, p(generations), "r--", label="Trend Line")
 
@@ -267,6 +251,8 @@ def show_ga_graph(scores):
 
 # Compare best scores achieved by different algorithms for varying numbers of packages.   
 def show_best_scores_graph(num_packages_list, hc_scores, sahc_scores, sa_scores, ts_scores, ga_scores):
+    from matplotlib import pyplot as plt
+
     if(len(hc_scores) != 0):
         plt.plot(num_packages_list, hc_scores, label='Hill Climbing')
     if(len(sahc_scores) != 0):
@@ -286,6 +272,8 @@ def show_best_scores_graph(num_packages_list, hc_scores, sahc_scores, sa_scores,
     
 # Compare execution times of different algorithms for varying numbers of packages.
 def show_times_graph(num_packages_list, hc_times, sahc_times, sa_times, ts_times, ga_times):
+    from matplotlib import pyplot as plt
+
     if(len(hc_times) != 0):
         plt.plot(num_packages_list, hc_times, label='Hill Climbing')
     if(len(sahc_times) != 0):
@@ -306,6 +294,8 @@ def show_times_graph(num_packages_list, hc_times, sahc_times, sa_times, ts_times
 
 # Compare best scores achieved by different algorithms for a single number of packages.
 def show_best_scores_graph_single(num_packages_list, algo_scores, algorithm_name):
+    from matplotlib import pyplot as plt
+
     plt.plot(num_packages_list, algo_scores, label=algorithm_name)
     plt.xlabel('Number of Packages')
     plt.ylabel('Best Score')
@@ -316,6 +306,8 @@ def show_best_scores_graph_single(num_packages_list, algo_scores, algorithm_name
 
 # Compare execution times of different algorithms for a single number of packages.
 def show_times_graph_single(num_packages_list, algo_times, algorithm_name):
+    from matplotlib import pyplot as plt
+
     plt.plot(num_packages_list, algo_times, label=algorithm_name)
     plt.xlabel('Number of Packages')
     plt.ylabel('Execution Time (s)')
@@ -326,6 +318,8 @@ def show_times_graph_single(num_packages_list, algo_times, algorithm_name):
 
 # Compare best scores achieved by different algorithms for the same number of packages.
 def show_best_scores_graph_same(num_packages, hc_score, sahc_score, sa_score, ts_score, ga_score):
+    from matplotlib import pyplot as plt
+
     scores = [[hc_score, 'HC'], [sahc_score, 'SAHC'], [sa_score,'SA'],[ ts_score, 'TS'], [ga_score,'GEN']]
     valid_scores = [[score,algorithm] for score,algorithm in scores if score != 0]
     
@@ -338,6 +332,8 @@ def show_best_scores_graph_same(num_packages, hc_score, sahc_score, sa_score, ts
 
 # Compare execution times of different algorithms for the same number of packages.
 def show_times_graph_same(num_packages, hc_time, sahc_time, sa_time, ts_time, ga_time):
+    from matplotlib import pyplot as plt
+
     times = [[hc_time, 'HC'], [sahc_time, 'SAHC'], [sa_time,'SA'],[ ts_time, 'TS'], [ga_time,'GEN']]
     valid_times = [[time,algorithm] for time,algorithm in times if time != 0]
     
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules live flat in a1/src and import each other by name, as when running from that directory.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
@@ -0,0 +1,36 @@
+import csv
+import json
+
+import pytest
+
+from batch import build_config, main, parse_args
+
+
+def test_results_are_written_to_a_new_directory(tmp_path):
+    output = tmp_path / "results" / "nested" / "runs.csv"
+    main(["--packages", "10", "--algorithms", "hc", "sa", "--param", "hc.num_iterations=20", "--seed", "3", "--output", str(output)])
+    with open(output) as file:
+        rows = list(csv.DictReader(file))
+    assert [row["algorithm"] for row in rows] == ["hc", "sa"]
+    assert json.loads(rows[0]["parameters"])["num_iterations"] == 20
+
+
+@pytest.mark.parametrize("param", ["hcc.num_iterations=5", "hc", "hc.=3", "num_iterations=3"])
+def test_bad_parameters_are_reported(tmp_path, capsys, param):
+    output = tmp_path / "runs.json"
+    with pytest.raises(SystemExit):
+        main(["--packages", "10", "--algorithms", "hc", "--param", param, "--output", str(output)])
+    error = capsys.readouterr().err
+    assert repr(param) in error or param.split("=")[0] in error
+    assert not output.exists()
+
+
+def test_config_file_parameters_are_checked(tmp_path):
+    config = tmp_path / "batch.json"
+    config.write_text(json.dumps({"algorithms": ["ga"], "parameters": {"gaa": {"population_size": 10}}}))
+    with pytest.raises(ValueError, match="gaa.population_size"):
+        build_config(parse_args(["--config", str(config)]))
+    config.write_text(json.dumps({"algorithms": ["ga"], "parameters": {"ga": {"population_size": 10}}}))
+    assert build_config(parse_args(["--config", str(config), "--param", "ga.num_generations=4"]))["parameters"] == {
+        "ga": {"population_size": 10, "num_generations": 4}
+    }
@@ -0,0 +1,34 @@
+from benchmark import MICRO_BENCHMARKS, find_regressions, make_instance, run_macro, run_micro
+
+
+# Instances and solver runs only depend on the seed, whatever ran before them.
+def test_macro_results_are_reproducible():
+    first = run_macro(["hc", "sahc"], [15])
+    make_instance(30)
+    second = run_macro(["hc", "sahc"], [15])
+    assert [(entry["solver"], entry["budget"], entry["score"]) for entry in first] == [
+        (entry["solver"], entry["budget"], entry["score"]) for entry in second
+    ]
+    assert [entry["budget"] for entry in first] == [250, 1000, 4000, None]
+
+
+def test_every_micro_benchmark_runs():
+    results = run_micro(list(MICRO_BENCHMARKS), [15], 0.001, 1)
+    assert [entry["name"] for entry in results] == list(MICRO_BENCHMARKS)
+    assert all(entry["ops_per_sec"] > 0 for entry in results)
+
+
+# Throughput may drop and scores may worsen by the tolerance before they count as regressions.
+def test_regressions_beyond_the_tolerance_are_reported():
+    baseline = {
+        "micro": [{"name": "delta:swap", "size": 50, "ops_per_sec": 1000.0}, {"name": "delta:reverse", "size": 50, "ops_per_sec": 1000.0}],
+        "macro": [{"solver": "hc", "size": 50, "budget": 250, "score": -100.0}, {"solver": "sa", "size": 50, "budget": 0.99, "score": -100.0}],
+    }
+    results = {
+        "micro": [{"name": "delta:swap", "size": 50, "ops_per_sec": 850.0}, {"name": "delta:reverse", "size": 50, "ops_per_sec": 700.0}],
+        "macro": [{"solver": "hc", "size": 50, "budget": 250, "score": -115.0}, {"solver": "sa", "size": 50, "budget": 0.99, "score": -130.0}],
+    }
+    regressions = find_regressions(results, baseline, 0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith("micro delta:reverse size=50")
+    assert regressions[1].startswith("macro sa size=50")
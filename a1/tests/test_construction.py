@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from construction import CONSTRUCTIONS, InsertionRoute, construct_route, insertion_order
+from evaluation import evaluate_permutation
+from problem import Package, ProblemInstance, generate_package_stream, get_instance
+
+
+@pytest.mark.parametrize("method", sorted(CONSTRUCTIONS))
+@pytest.mark.parametrize("num_packages", [0, 1, 2, 50, 400])
+def test_constructions_return_permutations(method, num_packages):
+    instance = get_instance(generate_package_stream(num_packages, 100, rng=1)) if num_packages else ProblemInstance.from_packages([])
+    route = construct_route(instance, method)
+    assert route.dtype == np.int32
+    assert sorted(route.tolist()) == list(range(num_packages))
+
+
+@pytest.mark.parametrize("method", sorted(CONSTRUCTIONS))
+def test_constructions_on_collinear_and_coincident_packages(method):
+    packages = [Package("normal", (float(i), 5.0), package_id=i) for i in range(40)]
+    packages += [Package("fragile", (7.0, 7.0), breaking_chance=0.01, breaking_cost=5.0, package_id=40 + i) for i in range(10)]
+    route = construct_route(get_instance(packages), method)
+    assert sorted(route.tolist()) == list(range(50))
+
+
+def test_constructions_beat_the_generated_order():
+    instance = get_instance(generate_package_stream(300, 100, rng=2))
+    generated = evaluate_permutation(instance, instance.identity())
+    for method in CONSTRUCTIONS:
+        assert evaluate_permutation(instance, construct_route(instance, method)) > generated
+
+
+# With every package as a candidate, each insertion is the best of all the positions of the route.
+def test_insertion_picks_the_cheapest_position():
+    instance = get_instance(generate_package_stream(60, 100, rng=3))
+    route = InsertionRoute(instance)
+    for package in insertion_order(instance, np.arange(len(instance))).tolist():
+        current = route.permutation()
+        costs = [evaluate_permutation(instance, np.insert(current, slot, package)) for slot in range(len(current) + 1)]
+        slot = route.add(package, len(instance))
+        assert evaluate_permutation(instance, route.permutation()) == pytest.approx(max(costs))
+        assert route.permutation()[slot] == package
@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+import pytest
+
+from delta import VECTOR_MIN_STOPS, RouteState
+from evaluation import evaluate_permutation, evaluate_solution
+from neighbours import MAX_SEGMENT_LENGTH, OrOpt, Relocate, Reverse, Swap, get_best_move, iter_all_moves
+from problem import generate_package_stream, get_instance
+
+
+# Every move of each type on a route of n packages.
+def all_moves(n):
+    for i in range(n):
+        for j in range(n - 1):
+            yield Relocate(i, j)
+        for j in range(n):
+            yield Swap(i, j)
+        for j in range(i, n + 1):
+            yield Reverse(i, j)
+    for length in range(1, MAX_SEGMENT_LENGTH + 1):
+        for i in range(n - length + 1):
+            for j in range(n - length + 1):
+                yield OrOpt(i, j, length)
+
+
+def random_moves(n, count, rng):
+    move_types = (Relocate, Swap, Reverse, OrOpt)
+    return [move_types[k % len(move_types)].sample(list(range(n)), rng) for k in range(count)]
+
+
+# A list of packages scored by evaluate_solution, and a permutation of an instance scored by evaluate_permutation.
+def routes(num_packages, seed):
+    package_stream = generate_package_stream(num_packages, 60, rng=seed)
+    instance = get_instance(package_stream)
+    permutation = np.random.default_rng(seed).permutation(num_packages).astype(np.int32)
+    yield list(package_stream), None, evaluate_solution
+    yield permutation, instance, lambda solution: evaluate_permutation(instance, solution)
+
+
+@pytest.mark.parametrize("num_packages", [1, 2, 9])
+def test_every_move_delta_matches_full_evaluation(num_packages):
+    for solution, instance, evaluate in routes(num_packages, 1):
+        state = RouteState(solution, instance)
+        score = evaluate(solution)
+        assert state.score() == pytest.approx(score)
+        for move in all_moves(num_packages):
+            delta = state.delta(move)
+            move.apply(solution)
+            assert score + delta == pytest.approx(evaluate(solution), rel=1e-12, abs=1e-9), move
+            move.undo(solution)
+
+
+# Moves are applied to the state one after the other, on routes long enough to use the numpy paths of RouteState too.
+@pytest.mark.parametrize("num_packages", [30, VECTOR_MIN_STOPS + 72, 6 * VECTOR_MIN_STOPS])
+def test_deltas_stay_exact_while_moves_are_applied(num_packages):
+    rng = random.Random(2)
+    for solution, instance, evaluate in routes(num_packages, 3):
+        state = RouteState(solution, instance)
+        for move in random_moves(num_packages, 400, rng):
+            expected = state.score() + state.delta(move)
+            if rng.random() < 0.5:
+                state.apply(move)
+                assert state.score() == pytest.approx(evaluate(solution), rel=1e-12, abs=1e-9)
+                assert state.score() == pytest.approx(expected, rel=1e-12, abs=1e-9), move
+            else:
+                score = state.score()
+                state.apply(move)
+                state.undo(move)
+                assert state.score() == pytest.approx(score, rel=1e-12, abs=1e-9)
+        assert RouteState(solution, instance).score() == pytest.approx(state.score(), rel=1e-12, abs=1e-9)
+
+
+@pytest.mark.parametrize("num_packages", [1, 7, 250])
+def test_incremental_route_hash_matches_full_hash(num_packages):
+    instance = get_instance(generate_package_stream(num_packages, 60, rng=4))
+    solution = np.random.default_rng(5).permutation(num_packages).astype(np.int32)
+    solution_hash = instance.route_hash(solution)
+    moves = list(all_moves(num_packages)) if num_packages < 10 else random_moves(num_packages, 500, random.Random(6))
+    visited = []
+    for move in moves:
+        lo, hi = move.bounds()
+        old_hash = instance.positions_hash(solution, lo, hi)
+        move.apply(solution)
+        neighbour_hash = (solution_hash - old_hash + instance.positions_hash(solution, lo, hi)) % 2**64
+        assert neighbour_hash == instance.route_hash(solution), move
+        visited.append(solution.copy())
+        solution_hash = neighbour_hash
+    assert [int(value) for value in instance.route_hashes(visited)] == [instance.route_hash(route) for route in visited]
+
+
+# The batch scan of the full neighbourhood finds the same best score as ranking every move by its delta,
+# also when it is split into small chunks.
+@pytest.mark.parametrize("chunk_size", [None, 7])
+def test_best_move_matches_the_best_delta(chunk_size):
+    instance = get_instance(generate_package_stream(20, 60, rng=17))
+    route = np.array(random.Random(18).sample(range(20), 20), dtype=np.int32)
+    state = RouteState(route.copy(), instance)
+    best_delta = max(move.delta(state) for move in iter_all_moves(20))
+    move, score = get_best_move(route, instance, chunk_size=chunk_size)
+    assert score == pytest.approx(state.score() + best_delta, abs=1e-9)
+    assert state.score() + move.delta(state) == pytest.approx(score, abs=1e-9)
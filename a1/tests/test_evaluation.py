@@ -0,0 +1,28 @@
+import random
+
+import numpy as np
+import pytest
+
+import evaluation
+from evaluation import evaluate_permutation, evaluate_permutations, evaluate_solution
+from problem import generate_package_stream, get_instance
+
+
+# Small batches split the population into several blocks of routes.
+@pytest.mark.parametrize("batch_elements", [evaluation.BATCH_ELEMENTS, 40])
+def test_batch_scores_match_the_package_list_scores(monkeypatch, batch_elements):
+    monkeypatch.setattr(evaluation, "BATCH_ELEMENTS", batch_elements)
+    package_stream = generate_package_stream(18, 100, rng=27)
+    instance = get_instance(package_stream)
+    rng = random.Random(28)
+    permutations = np.array([rng.sample(range(18), 18) for _ in range(11)], dtype=np.int32)
+    scores = evaluate_permutations(instance, permutations)
+    expected = [evaluate_solution([package_stream[i] for i in permutation]) for permutation in permutations]
+    np.testing.assert_allclose(scores, expected, rtol=0, atol=1e-9)
+    assert evaluate_permutation(instance, permutations[3]) == pytest.approx(expected[3], abs=1e-9)
+
+
+def test_empty_routes_score_zero():
+    instance = get_instance(generate_package_stream(5, 100, rng=29))
+    assert evaluate_permutation(instance, []) == 0
+    assert evaluate_permutations(instance, np.empty((3, 0), dtype=np.int32)).tolist() == [0, 0, 0]
@@ -0,0 +1,117 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+import evaluators
+from evaluation import evaluate_permutations
+from genetic import CROSSOVERS, crossover, evolve_population, genetic_algorithm, get_elite_count, get_greatest_fits, roulette_selection, roulette_wheel, stochastic_universal_sampling
+from problem import generate_package_stream, get_instance
+from stats import SolverStats
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt(stats, best_score, current_score):
+    raise Interrupted()
+
+
+# Names of the evaluator blocks currently in shared memory.
+def shared_blocks():
+    return set(os.listdir("/dev/shm")) if os.path.isdir("/dev/shm") else set()
+
+
+def test_owned_process_evaluator_is_closed_when_the_search_fails():
+    package_stream = generate_package_stream(20, 60, rng=1)
+    before = shared_blocks()
+    with pytest.raises(Interrupted):
+        genetic_algorithm(5, package_stream, 8, evaluator="process", max_workers=2, rng=2, stats=SolverStats(callback=interrupt))
+    assert shared_blocks() == before
+
+
+def test_process_evaluator_releases_its_blocks_when_the_pool_cannot_start(monkeypatch):
+    def failing_pool(*args, **kwargs):
+        raise OSError("no processes")
+
+    monkeypatch.setattr(evaluators, "ProcessPoolExecutor", failing_pool)
+    before = shared_blocks()
+    with pytest.raises(OSError):
+        evaluators.ProcessPoolEvaluator(get_instance(generate_package_stream(10, 60, rng=1)))
+    assert shared_blocks() == before
+
+
+@pytest.mark.parametrize("name", sorted(evaluators.EVALUATORS))
+def test_evaluators_match_serial_evaluation(name):
+    instance = get_instance(generate_package_stream(25, 60, rng=4))
+    rng = np.random.default_rng(5)
+    population = np.array([rng.permutation(len(instance)) for _ in range(9)], dtype=np.int32)
+    with evaluators.make_evaluator(name, instance, 2) as evaluator:
+        np.testing.assert_allclose(evaluator(population), evaluate_permutations(instance, population))
+
+
+# With 5 individuals and 4 elites no pair of parents is selected.
+@pytest.mark.parametrize("population_size", [2, 5, 6])
+@pytest.mark.parametrize("selection", ["roulette", "sus"])
+def test_small_populations(population_size, selection):
+    package_stream = generate_package_stream(12, 60, rng=6)
+    route = genetic_algorithm(3, package_stream, population_size, selection=selection, rng=7)
+    assert sorted(package.id for package in route) == list(range(12))
+
+
+# With 9 individuals and 4 elites, the last pair of parents only contributes one offspring.
+@pytest.mark.parametrize("population_size", [9, 10])
+def test_evolve_population_keeps_the_population_size(population_size):
+    instance = get_instance(generate_package_stream(15, 60, rng=8))
+    rng = random.Random(9)
+    population = np.array([rng.sample(range(15), 15) for _ in range(population_size)], dtype=np.int32)
+    for _ in range(3):
+        scores = evaluate_permutations(instance, population).tolist()
+        population = evolve_population(population, scores, population_size, 2, rng=rng)
+        assert population.shape == (population_size, 15)
+
+
+# Every crossover gives two permutations, and cycle crossover takes each position from one of the parents.
+@pytest.mark.parametrize("method", sorted(CROSSOVERS))
+def test_crossovers_give_permutations(method):
+    rng = random.Random(39)
+    for _ in range(20):
+        parent1 = np.array(rng.sample(range(30), 30), dtype=np.int32)
+        parent2 = np.array(rng.sample(range(30), 30), dtype=np.int32)
+        for child in crossover(parent1, parent2, method, rng):
+            assert sorted(np.asarray(child).tolist()) == list(range(30))
+            if method == "cycle":
+                assert all(value in (a, b) for value, a, b in zip(child, parent1, parent2))
+
+
+# The wheel holds the cumulative share of each score, and both selection methods pick by it.
+def test_roulette_and_sus_follow_the_wheel():
+    population = ["a", "b", "c", "d"]
+    scores = [-1.0, -3.0, -2.0, -4.0]
+    wheel = roulette_wheel(scores)
+    np.testing.assert_allclose(wheel, [0.1, 0.4, 0.6, 1.0])
+
+    rng = random.Random(41)
+    draws = [roulette_selection(population, scores, wheel, rng) for _ in range(4000)]
+    assert abs(draws.count("d") / 4000 - 0.4) < 0.03
+
+    # Ten equally spaced pointers land 1, 3, 2 and 4 times on the four solutions, whatever the spin.
+    for _ in range(20):
+        selections = stochastic_universal_sampling(population, wheel, 10, rng)
+        assert [selections.count(name) for name in population] == [1, 3, 2, 4]
+    assert stochastic_universal_sampling(population, wheel, 0, rng) == []
+
+
+# Elites are the best scores, best first, and ties are broken by their order in the population.
+def test_greatest_fits_are_the_best_solutions():
+    population = ["a", "b", "c", "d", "e", "f"]
+    scores = [-5.0, -1.0, -3.0, -1.0, -3.0, -9.0]
+    assert get_greatest_fits(population, scores, 3) == ["b", "d", "c"]
+    assert get_greatest_fits(population, scores, 10) == ["b", "d", "c", "e", "a", "f"]
+    assert get_greatest_fits(population, scores, 0) == []
+
+    assert get_elite_count(50) == 4
+    assert get_elite_count(50, 0.1) == 5
+    assert get_elite_count(5, 0.1) == 1
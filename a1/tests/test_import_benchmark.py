@@ -0,0 +1,15 @@
+import os
+
+import pytest
+
+from import_benchmark import CORE_MODULES, measure_import
+
+SOURCE_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+
+
+# Solver modules are imported in a fresh interpreter, as by worker processes, and must not load the visualization libraries.
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_solver_modules_do_not_import_visualization_libraries(monkeypatch, module):
+    monkeypatch.chdir(SOURCE_DIRECTORY)
+    _, heavy = measure_import(module)
+    assert heavy == []
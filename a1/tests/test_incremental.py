@@ -0,0 +1,60 @@
+import copy
+
+import pytest
+
+from evaluation import evaluate_solution
+from hill_climbing import get_sahc_solution
+from incremental import update_route
+from problem import Package, generate_package_stream
+
+
+@pytest.fixture(scope="module")
+def route():
+    return get_sahc_solution(generate_package_stream(120, 100, rng=11), num_candidates=8)
+
+
+def test_cancelled_copies_are_removed(route):
+    cancellations = [copy.deepcopy(route[3]), copy.deepcopy(route[50]), copy.deepcopy(route[-1])]
+    updated = update_route(route, cancellations=cancellations)
+    assert len(updated) == len(route) - 3
+    assert {package.id for package in updated} == {package.id for package in route} - {package.id for package in cancellations}
+
+
+def test_unknown_cancellation_is_an_error(route):
+    with pytest.raises(ValueError):
+        update_route(route, cancellations=[Package("normal", (1.0, 1.0), package_id=10**6)])
+
+
+def test_arrivals_are_inserted(route):
+    arrivals = [
+        Package("urgent", (20.0, 30.0), delivery_time=120.0, package_id=1000),
+        Package("fragile", (70.0, 5.0), breaking_chance=0.005, breaking_cost=8.0, package_id=1001),
+        Package("normal", (50.0, 50.0), package_id=1002),
+    ]
+    updated = update_route(route, arrivals=arrivals, cancellations=[route[10]])
+    assert sorted(package.id for package in updated) == sorted([package.id for package in route if package != route[10]] + [1000, 1001, 1002])
+    # The repaired route is no worse than inserting the same packages with the rest of the route left alone.
+    unrepaired = update_route(route, arrivals=arrivals, cancellations=[route[10]], repair_radius=0, max_span=0)
+    assert evaluate_solution(updated) >= evaluate_solution(unrepaired) - 1e-9
+
+
+def test_empty_route():
+    assert update_route([]) == []
+    package = Package("normal", (3.0, 4.0), package_id=0)
+    assert update_route([], arrivals=[package]) == [package]
+
+
+def test_arrival_created_after_the_stream_can_be_cancelled():
+    route = generate_package_stream(10, 60, rng=1)
+    arrival = Package("normal", (5.0, 5.0))
+    updated = update_route(route, arrivals=[arrival])
+    assert len(updated) == 11
+    updated = update_route(updated, cancellations=[arrival])
+    assert sorted(package.id for package in updated) == list(range(10))
+
+
+def test_duplicate_ids_are_an_error(route):
+    with pytest.raises(ValueError):
+        update_route(route, arrivals=[Package("normal", (5.0, 5.0), package_id=route[0].id)])
+    with pytest.raises(ValueError):
+        update_route(route + [copy.deepcopy(route[1])])
@@ -0,0 +1,39 @@
+import random
+
+import island
+from island import evolve_island, island_genetic_algorithm
+from evaluation import evaluate_permutations
+from genetic import generate_population
+from problem import generate_package_stream, get_instance
+from stats import SolverStats
+
+
+# An island with an odd number of offspring per generation used to lose one solution every generation.
+def test_evolve_island_keeps_the_population_size(monkeypatch):
+    instance = get_instance(generate_package_stream(15, 60, rng=10))
+    monkeypatch.setattr(island, "_worker_instance", instance)
+    population = generate_population(instance.identity(), 9, random.Random(11))
+    scores = evaluate_permutations(instance, population).tolist()
+    population, scores, stats = evolve_island(population, scores, 5, 9, 1, None, "roulette", None, 12)
+    assert len(population) == len(scores) == 9
+    assert stats is None
+
+
+def test_island_genetic_algorithm_returns_a_route():
+    package_stream = generate_package_stream(15, 60, rng=13)
+    route, scores = island_genetic_algorithm(6, package_stream, 9, num_islands=2, migration_interval=3, max_workers=2, scores_info=True, rng=14)
+    assert sorted(package.id for package in route) == list(range(15))
+    assert len(scores) == 2
+
+
+def test_island_stats_count_every_island():
+    package_stream = generate_package_stream(15, 60, rng=15)
+    stats = SolverStats()
+    island_stats = []
+    island_genetic_algorithm(6, package_stream, 8, num_islands=3, migration_interval=4, max_workers=2, rng=16, stats=stats, island_stats=island_stats)
+    assert [island.iterations for island in island_stats] == [6, 6, 6]
+    assert [island.evaluations for island in island_stats] == [8 * 7] * 3
+    assert stats.iterations == 6
+    assert stats.evaluations == 3 * 8 * 7
+    assert stats.moves_proposed == 3 * 4 * 6
+    assert stats.phase_times["evaluation"] > 0
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from delta import RouteState
+from evaluation import evaluate_permutation, evaluate_solution
+from hill_climbing import get_hc_solution, get_sahc_solution
+from local_search import candidate_local_search, get_candidate_moves, get_positions, update_positions
+from problem import generate_package_stream, get_instance
+from stats import SolverStats
+
+
+def test_candidate_moves_place_the_packages_next_to_each_other():
+    instance = get_instance(generate_package_stream(40, 60, rng=1))
+    solution = np.random.default_rng(2).permutation(40).astype(np.int32)
+    state = RouteState(solution, instance)
+    positions = get_positions(solution)
+    for a in range(40):
+        for b in instance.candidates(4)[a].tolist():
+            for move, _ in get_candidate_moves(state.stops, positions, a, b):
+                moved = solution.copy()
+                move.apply(moved)
+                p, q = np.flatnonzero(moved == a)[0], np.flatnonzero(moved == b)[0]
+                assert abs(p - q) == 1, move
+                assert state.score() + move.delta(state) == pytest.approx(evaluate_permutation(instance, moved), abs=1e-9)
+
+
+def test_positions_follow_the_moves():
+    solution = np.random.default_rng(3).permutation(50).astype(np.int32)
+    positions = get_positions(solution)
+    solution[5:30] = solution[5:30][::-1].copy()
+    update_positions(positions, solution, 5, 29)
+    assert positions.tolist() == get_positions(solution).tolist()
+    assert all(solution[position] == package for package, position in enumerate(positions.tolist()))
+
+
+@pytest.mark.parametrize("num_packages", [30, 400])
+def test_candidate_local_search_only_improves(num_packages):
+    instance = get_instance(generate_package_stream(num_packages, 100, rng=4))
+    solution = instance.identity()
+    state = RouteState(solution, instance)
+    initial = state.score()
+    scores = []
+    stats = SolverStats()
+    num_moves = candidate_local_search(state, instance, 6, stats=stats, scores=scores)
+    assert num_moves == len(scores) == stats.moves_accepted > 0
+    assert [best for best, _ in scores] == sorted(best for best, _ in scores)
+    assert initial < scores[0][0]
+    assert scores[-1][0] == pytest.approx(evaluate_permutation(instance, solution))
+    assert sorted(solution.tolist()) == list(range(num_packages))
+
+
+# The candidate steepest ascent returns one score per applied move, as the full neighbourhood search returns one per step.
+def test_sahc_scores_history():
+    package_stream = generate_package_stream(60, 100, rng=5)
+    stats = SolverStats()
+    route, scores = get_sahc_solution(package_stream, scores_info=True, num_candidates=6, stats=stats)
+    assert len(scores) == stats.moves_accepted > 1
+    assert scores[-1][0] == pytest.approx(evaluate_solution(route))
+    route, scores = get_hc_solution(package_stream, 200, scores_info=True, num_candidates=6, rng=6)
+    assert scores[-1][0] == pytest.approx(evaluate_solution(route))
@@ -0,0 +1,26 @@
+import pytest
+
+from evaluation import evaluate_solution
+from hill_climbing import get_hc_solution
+from multi_start import multi_start
+from problem import generate_package_stream
+from termination import Termination
+
+
+# Runs with the same seeds find the same routes, and the best of them is returned.
+def test_multi_start_is_reproducible():
+    package_stream = generate_package_stream(20, 60, rng=36)
+    results = [multi_start(get_hc_solution, package_stream, 3, max_workers=2, rng=37, num_iterations=100) for _ in range(2)]
+    (route, runs), (other_route, other_runs) = results
+    assert [package.id for package in route] == [package.id for package in other_route]
+    assert [run["seed"] for run in runs] == [run["seed"] for run in other_runs]
+    assert [run["score"] for run in runs] == [run["score"] for run in other_runs]
+    assert len({run["seed"] for run in runs}) == 3
+    assert evaluate_solution(route) == pytest.approx(max(run["score"] for run in runs), abs=1e-9)
+
+
+def test_every_run_gets_the_termination():
+    package_stream = generate_package_stream(15, 60, rng=38)
+    _, runs = multi_start(get_hc_solution, package_stream, 2, seeds=[1, 2], max_workers=2, num_iterations=10**6, termination=Termination(max_evaluations=50))
+    assert [run["seed"] for run in runs] == [1, 2]
+    assert [run["reason"] for run in runs] == ["max_evaluations", "max_evaluations"]
@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+import pytest
+
+from neighbours import MOVE_TYPES, OrOpt, Relocate, apply_move, move_segment, relocate
+
+
+# Moves are applied in place and undone exactly, on lists (as package lists are) and on permutations.
+@pytest.mark.parametrize("as_array", [False, True])
+@pytest.mark.parametrize("move_type", MOVE_TYPES + (OrOpt,))
+def test_moves_are_undone_exactly(as_array, move_type):
+    rng = random.Random(30)
+    solution = np.arange(12, dtype=np.int32) if as_array else list(range(12))
+    for _ in range(50):
+        move = move_type.sample(solution, rng)
+        move.apply(solution)
+        assert sorted(solution) == list(range(12))
+        move.undo(solution)
+        assert list(solution) == list(range(12))
+
+
+# Relocate and Or-opt give the same routes as popping and inserting in a list.
+def test_relocations_match_list_operations():
+    for i in range(6):
+        for j in range(6):
+            expected = list(range(6))
+            expected.insert(j, expected.pop(i))
+            solution = list(range(6))
+            relocate(solution, i, j)
+            assert solution == expected
+            solution = np.arange(6)
+            OrOpt(i, j, 1).apply(solution)
+            assert solution.tolist() == expected
+
+    solution = list(range(8))
+    move_segment(solution, 1, 4, 3)
+    assert solution == [0, 4, 5, 6, 1, 2, 3, 7]
+
+
+# The solution a neighbour is built from is left unchanged.
+def test_apply_move_copies_the_solution():
+    solution = np.arange(10, dtype=np.int32)
+    neighbour = apply_move(solution, Relocate(2, 7))
+    assert solution.tolist() == list(range(10))
+    assert neighbour.tolist() == [0, 1, 3, 4, 5, 6, 7, 2, 8, 9]
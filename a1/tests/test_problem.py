@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+import problem
+
+from evaluation import evaluate_permutation, evaluate_solution
+from problem import ProblemInstance, as_instance, as_solution, generate_package_stream, get_instance
+
+
+def test_permutations_score_like_package_lists():
+    package_stream = generate_package_stream(30, 80, rng=20)
+    instance = ProblemInstance.from_packages(package_stream)
+    permutation = np.array(random.Random(21).sample(range(30), 30), dtype=np.int32)
+    route = instance.to_packages(permutation)
+    assert [package.id for package in route] == [package_stream[i].id for i in permutation]
+    assert evaluate_permutation(instance, permutation) == pytest.approx(evaluate_solution(route), abs=1e-9)
+
+
+# An instance built from arrays creates its packages on demand, with the same scores.
+def test_instances_without_packages_create_them():
+    source = ProblemInstance.from_packages(generate_package_stream(12, 80, rng=22))
+    instance = ProblemInstance(
+        source.coordinates_x, source.coordinates_y, source.types, source.breaking_chance, source.breaking_cost, source.delivery_time
+    )
+    route = instance.to_packages(instance.identity())
+    assert [package.id for package in route] == list(range(12))
+    assert evaluate_solution(route) == pytest.approx(evaluate_permutation(source, source.identity()), abs=1e-9)
+
+
+# Solvers get the same instance for the same list, and return solutions in the form they were called with.
+def test_as_instance_reuses_the_instance_of_a_list():
+    package_stream = generate_package_stream(10, 80, rng=23)
+    instance, route = as_instance(package_stream)
+    assert as_instance(package_stream)[0] is instance
+    assert as_solution(package_stream, instance, route) == package_stream
+    assert as_solution(instance, instance, route) is route
+    package_stream.append(generate_package_stream(1, 80, rng=24)[0])
+    assert get_instance(package_stream) is not instance
+
+
+# The last row and column of the matrix are the depot (0, 0).
+def test_distance_matrix_includes_the_depot():
+    instance = get_instance(generate_package_stream(9, 80, rng=25))
+    xs = np.append(instance.coordinates_x, 0.0)
+    ys = np.append(instance.coordinates_y, 0.0)
+    matrix = instance.distances()
+    assert matrix.shape == (10, 10)
+    np.testing.assert_allclose(matrix, np.hypot(xs[:, None] - xs[None, :], ys[:, None] - ys[None, :]))
+    assert instance.distances() is matrix
+
+
+@pytest.mark.parametrize("sizes, dtype, memmap", [((4, 100), np.float32, False), ((2, 4), np.float32, True)])
+def test_large_distance_matrices_use_less_memory(monkeypatch, sizes, dtype, memmap):
+    monkeypatch.setattr(problem, "FLOAT32_MATRIX_SIZE", sizes[0])
+    monkeypatch.setattr(problem, "MEMMAP_MATRIX_SIZE", sizes[1])
+    monkeypatch.setattr(problem, "MATRIX_BLOCK_ROWS", 3)
+    instance = ProblemInstance.from_packages(generate_package_stream(7, 80, rng=26))
+    matrix = instance.distances()
+    assert matrix.dtype == dtype
+    assert isinstance(matrix, np.memmap) == memmap
+    assert evaluate_permutation(instance, instance.identity()) == pytest.approx(
+        evaluate_solution(list(instance.packages)), rel=1e-5
+    )
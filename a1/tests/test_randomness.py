@@ -0,0 +1,43 @@
+import random
+
+import numpy as np
+import pytest
+
+from problem import generate_package_stream
+from randomness import GeneratorRandom, get_rng, spawn_seeds
+from simulated_annealing import get_sa_solution
+
+
+@pytest.mark.parametrize("seed", [5, np.int64(5), np.uint32(5), "5", b"5"])
+def test_seeds_create_a_seeded_random(seed):
+    rng = get_rng(seed)
+    assert isinstance(rng, random.Random)
+    assert rng.random() == get_rng(seed).random()
+
+
+def test_numpy_integer_seeds_match_int_seeds():
+    assert get_rng(np.int64(5)).random() == random.Random(5).random()
+    assert spawn_seeds(np.int32(9), 3) == spawn_seeds(9, 3)
+
+
+def test_generators_are_used_as_given():
+    assert get_rng(None) is random
+    rng = random.Random(1)
+    assert get_rng(rng) is rng
+    assert isinstance(get_rng(np.random.default_rng(1)), GeneratorRandom)
+
+
+def test_same_seed_gives_the_same_solution():
+    package_stream = generate_package_stream(20, 60, rng=np.int64(3))
+    assert get_sa_solution(package_stream, rng=8) == get_sa_solution(package_stream, rng=np.int64(8))
+    assert get_sa_solution(package_stream, rng=np.random.default_rng(8)) == get_sa_solution(package_stream, rng=np.random.default_rng(8))
+
+
+def test_packages_created_after_a_stream_get_new_ids():
+    from problem import Package
+
+    package_stream = generate_package_stream(10, 60, rng=1)
+    package = Package("normal", (5.0, 5.0))
+    assert package.id not in {other.id for other in package_stream}
+    assert package not in package_stream
+    assert [other.id for other in generate_package_stream(10, 60, rng=1)] == list(range(10))
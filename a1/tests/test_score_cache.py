@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from evaluation import evaluate_permutations
+from genetic import genetic_algorithm
+from problem import INSTANCE_CACHE_SIZE, generate_package_stream, get_instance
+from score_cache import ScoreCache
+from tabu_search import get_tabu_solution
+
+
+def test_population_scores_match_and_duplicates_are_looked_up_once():
+    instance = get_instance(generate_package_stream(20, 60, rng=1))
+    rng = np.random.default_rng(2)
+    routes = np.array([rng.permutation(20) for _ in range(4)], dtype=np.int32)
+    population = routes[[0, 1, 0, 2, 0, 1]]
+    evaluated = []
+
+    def evaluator(rows):
+        evaluated.append(len(rows))
+        return evaluate_permutations(instance, rows)
+
+    cache = ScoreCache()
+    np.testing.assert_allclose(cache.evaluate_population(instance, population, evaluator), evaluate_permutations(instance, population))
+    assert evaluated == [3]
+    assert (cache.misses, cache.hits) == (3, 0)
+    np.testing.assert_allclose(cache.evaluate_population(instance, routes[[3, 2, 3]], evaluator), evaluate_permutations(instance, routes[[3, 2, 3]]))
+    assert evaluated == [3, 1]
+    assert (cache.misses, cache.hits) == (4, 1)
+    assert cache.evaluate(instance, routes[3]) == pytest.approx(evaluate_permutations(instance, routes[3:4])[0])
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    cache = ScoreCache(max_entries=2)
+    cache.put(1, -1.0)
+    cache.put(2, -2.0)
+    assert cache.get(1) == -1.0
+    cache.put(3, -3.0)
+    assert cache.get(2) is None and cache.get(1) == -1.0 and cache.evictions == 1
+
+
+# The instance of a package list is rebuilt by get_instance once it has been evicted; the cache still accepts it.
+def test_cache_outlives_the_instance_cache():
+    package_stream = generate_package_stream(15, 60, rng=3)
+    cache = ScoreCache()
+    get_tabu_solution(package_stream, 20, 3, 5, cache=cache, rng=4)
+    for seed in range(INSTANCE_CACHE_SIZE + 1):
+        get_instance(generate_package_stream(5, 60, rng=seed))
+    assert get_instance(package_stream) is not cache.instance
+    genetic_algorithm(3, package_stream, 6, cache=cache, rng=5)
+    with pytest.raises(ValueError):
+        cache.bind(get_instance(generate_package_stream(15, 60, rng=6)))
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+from service import RouteService, parse_job
+
+PACKAGES = [{"type": "normal", "x": float(i % 7) * 3, "y": float(i // 7) * 2} for i in range(20)] + [
+    {"type": "urgent", "x": 4.0, "y": 9.0, "delivery_time": 150},
+    {"type": "fragile", "x": 12.0, "y": 1.0, "breaking_chance": 0.005, "breaking_cost": 6.0},
+]
+
+
+# Sends one request and reads the whole response, until the server closes the connection.
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), head.decode("latin-1"), payload
+
+
+# The NDJSON events of a chunked response.
+def events(payload):
+    lines = []
+    while True:
+        size_line, _, payload = payload.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            return [json.loads(line) for line in b"".join(lines).splitlines()]
+        lines.append(payload[:size])
+        payload = payload[size + 2 :]
+
+
+async def run_service(check):
+    service = RouteService(max_jobs=2, max_queued=2)
+    server = await service.start(port=0)
+    try:
+        await asyncio.wait_for(check(server.sockets[0].getsockname()[1]), 60)
+    finally:
+        await service.close()
+
+
+# Every response ends with the connection closed by the server, the first /solve included (its worker used to be forked
+# while the connection was open and kept it alive).
+def test_solve_streams_until_done_and_closes():
+    async def check(port):
+        for seed in (1, 2):
+            status, head, payload = await request(port, "POST", "/solve", {"algorithm": "hc", "packages": PACKAGES, "seed": seed, "time_limit": 0.2})
+            assert status == 200 and "chunked" in head
+            received = events(payload)
+            assert [event["event"] for event in (received[0], received[1], received[-1])] == ["accepted", "started", "done"]
+            assert sorted(received[-1]["route"]) == list(range(len(PACKAGES)))
+        status, _, payload = await request(port, "GET", "/health")
+        assert status == 200
+
+    asyncio.run(run_service(check))
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"algorithm": "nope", "packages": PACKAGES},
+        {"algorithm": "hc", "packages": [{"type": "urgent", "x": 1, "y": 2}]},
+        {"algorithm": "hc", "packages": PACKAGES, "time_limit": "2"},
+    ],
+)
+def test_invalid_requests_are_rejected(body):
+    async def check(port):
+        status, _, _ = await request(port, "POST", "/solve", body)
+        assert status == 400
+
+    asyncio.run(run_service(check))
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"time_limit": "2"},
+        {"time_limit": -1},
+        {"time_limit": True},
+        {"max_evaluations": 10.5},
+        {"max_evaluations": True},
+        {"target_score": "high"},
+        {"seed": "7"},
+        {"seed": False},
+        {"packages": [{"type": "normal", "x": True, "y": 1}]},
+    ],
+)
+def test_malformed_fields_are_rejected(fields):
+    with pytest.raises(ValueError):
+        parse_job(json.dumps({"algorithm": "hc", "packages": PACKAGES, **fields}))
+
+
+def test_fields_are_passed_to_the_job():
+    algorithm, packages, parameters, seed, limits = parse_job(
+        json.dumps({"algorithm": "sa", "packages": PACKAGES, "seed": 3, "time_limit": 1, "max_evaluations": 100, "target_score": -50.5})
+    )
+    assert (algorithm, len(packages), seed, limits) == ("sa", len(PACKAGES), 3, (1, 100, -50.5))
+    assert parse_job(json.dumps({"packages": PACKAGES}))[3:] == (None, (None, None, None))
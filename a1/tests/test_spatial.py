@@ -0,0 +1,82 @@
+import math
+
+import numpy as np
+import pytest
+
+from spatial import SpatialGrid
+
+
+# The k nearest other points of every point, by comparing all the pairs.
+def brute_force_k_nearest(xs, ys, k):
+    dist = np.hypot(xs[:, None] - xs, ys[:, None] - ys)
+    np.fill_diagonal(dist, np.inf)
+    return np.sort(dist, axis=1)[:, :k]
+
+
+# Distances from each point to the points returned for it.
+def neighbour_distances(xs, ys, neighbours):
+    return np.hypot(xs[:, None] - xs[neighbours], ys[:, None] - ys[neighbours])
+
+
+LAYOUTS = {
+    "uniform": lambda rng: (rng.uniform(0, 100, 300), rng.uniform(0, 100, 300)),
+    "clustered": lambda rng: (np.repeat(rng.uniform(0, 100, 6), 40) + rng.normal(0, 0.5, 240), np.repeat(rng.uniform(0, 100, 6), 40) + rng.normal(0, 0.5, 240)),
+    "horizontal_line": lambda rng: (np.arange(50, dtype=float), np.full(50, 5.0)),
+    "vertical_line": lambda rng: (np.full(50, -3.0), rng.uniform(0, 1000, 50)),
+    "thin_strip": lambda rng: (rng.uniform(0, 1000, 200), rng.uniform(0, 1e-6, 200)),
+    "coincident": lambda rng: (np.full(30, 7.0), np.full(30, 7.0)),
+    "two_points": lambda rng: (np.array([0.0, 1.0]), np.array([0.0, 0.0])),
+}
+
+
+@pytest.mark.parametrize("layout", sorted(LAYOUTS))
+def test_k_nearest_matches_brute_force(layout):
+    xs, ys = LAYOUTS[layout](np.random.default_rng(1))
+    grid = SpatialGrid(xs, ys)
+    k = min(8, len(xs) - 1)
+    neighbours = grid.k_nearest(8)
+    assert neighbours.shape == (len(xs), k)
+    assert not np.any(neighbours == np.arange(len(xs))[:, None])
+    assert np.all(np.array([len(set(row)) for row in neighbours.tolist()]) == k)
+    np.testing.assert_allclose(neighbour_distances(xs, ys, neighbours), brute_force_k_nearest(xs, ys, k))
+
+
+@pytest.mark.parametrize("layout", sorted(LAYOUTS))
+def test_nearest_queries_match_brute_force(layout):
+    rng = np.random.default_rng(2)
+    xs, ys = LAYOUTS[layout](rng)
+    grid = SpatialGrid(xs, ys)
+    # Queries from the depot and from positions inside and far outside the points.
+    queries = [(0.0, 0.0), (xs[0], ys[0]), (-500.0, 2000.0)] + list(zip(rng.uniform(-50, 150, 10), rng.uniform(-50, 150, 10)))
+    for x, y in queries:
+        dist = np.hypot(xs - x, ys - y)
+        assert math.isclose(dist[grid.nearest(x, y)], dist.min())
+        found = grid.nearest_points(x, y, 5)
+        np.testing.assert_allclose(dist[found], np.sort(dist)[:5])
+
+
+def test_grid_size_is_bounded_for_collinear_points():
+    grid = SpatialGrid(np.arange(50, dtype=float), np.full(50, 5.0))
+    assert grid.columns * grid.rows <= 50
+
+
+def test_removed_points_are_not_returned():
+    xs = np.arange(20, dtype=float)
+    ys = np.zeros(20)
+    grid = SpatialGrid(xs, ys, indices=range(10))
+    assert grid.nearest(15.0, 0.0) == 9
+    grid.add(14)
+    grid.remove(9)
+    assert grid.nearest(15.0, 0.0) == 14
+    assert grid.nearest_points(0.0, 0.0, 3) == [0, 1, 2]
+
+
+# Packages along one road used to give a grid of millions of empty cells, so these never returned.
+def test_solvers_on_collinear_packages():
+    from hill_climbing import get_sahc_solution
+    from problem import Package, get_instance
+
+    packages = [Package("normal", (float(i), 5.0), package_id=i) for i in range(40)]
+    route = get_sahc_solution(packages, num_candidates=5, construction="nearest_neighbour", rng=1)
+    assert sorted(package.id for package in route) == list(range(40))
+    assert len(get_instance(packages).candidates(5)) == 40
@@ -0,0 +1,41 @@
+import pytest
+
+from hill_climbing import get_hc_solution
+from problem import generate_package_stream
+from simulated_annealing import get_sa_solution
+from stats import SolverStats
+from tabu_search import get_tabu_solution
+
+
+@pytest.mark.parametrize(
+    "solver, solver_args",
+    [
+        (get_hc_solution, {"num_iterations": 100}),
+        (get_sa_solution, {}),
+        (get_tabu_solution, {"num_iterations": 30, "base_tabu_tenure": 5, "max_stagnation": 20}),
+    ],
+)
+def test_counters_are_consistent(solver, solver_args):
+    calls = []
+    stats = SolverStats(callback=lambda stats, best_score, current_score: calls.append(stats.iterations), callback_interval=5)
+    routes = []
+    stats.on_improvement = lambda stats, best_score, route: routes.append(best_score)
+    solver(generate_package_stream(20, 60, rng=42), rng=43, stats=stats, **solver_args)
+    assert stats.iterations > 0
+    assert calls == list(range(5, stats.iterations + 1, 5))
+    assert 0 < stats.moves_accepted <= stats.moves_proposed
+    assert stats.evaluations > 0
+    assert stats.improvements == len(routes) > 0
+    assert routes == sorted(routes)
+
+
+# The same object adds up the counters of several runs.
+def test_stats_add_up_over_runs():
+    package_stream = generate_package_stream(15, 60, rng=44)
+    stats = SolverStats()
+    get_hc_solution(package_stream, 50, rng=45, stats=stats)
+    first = stats.as_dict()
+    get_hc_solution(package_stream, 50, rng=45, stats=stats)
+    assert stats.evaluations == 2 * first["evaluations"]
+    assert stats.iterations == 2 * first["iterations"]
+    assert stats.total_time() > first["time"]
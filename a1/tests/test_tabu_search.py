@@ -0,0 +1,45 @@
+import pytest
+
+from problem import generate_package_stream
+from tabu_search import TabuMemory, get_tabu_solution
+from termination import Termination
+
+
+# A key added with tenure t stays tabu in the current iteration and the next t.
+def test_keys_expire_after_their_tenure():
+    memory = TabuMemory(size=4)
+    memory.add("a", 2)
+    memory.add("b", 10)  # Longer than the ring, which is resized.
+    for _ in range(3):
+        assert "a" in memory
+        memory.step()
+    assert "a" not in memory
+    assert len(memory) == 1
+    for _ in range(8):
+        assert "b" in memory
+        memory.step()
+    assert "b" not in memory
+    assert len(memory) == 0
+
+
+# A key made tabu again before it expires stays tabu for its new tenure.
+def test_adding_a_key_again_extends_its_tenure():
+    memory = TabuMemory(size=8)
+    memory.add("a", 2)
+    memory.step()
+    memory.add("a", 3)
+    for _ in range(3):
+        memory.step()
+    assert "a" in memory
+    memory.step()
+    assert "a" not in memory
+
+
+def test_tabu_search_is_reproducible():
+    package_stream = generate_package_stream(20, 60, rng=34)
+    routes = [
+        [package.id for package in get_tabu_solution(package_stream, 40, 5, 20, rng=35, termination=Termination())]
+        for _ in range(2)
+    ]
+    assert routes[0] == routes[1]
+    assert sorted(routes[0]) == list(range(20))
@@ -0,0 +1,54 @@
+import pytest
+
+from genetic import genetic_algorithm
+from hill_climbing import get_hc_solution, get_sahc_solution
+from island import island_genetic_algorithm
+from problem import generate_package_stream
+from simulated_annealing import get_sa_solution
+from tabu_search import get_tabu_solution
+from termination import Termination
+
+SOLVERS = [
+    (get_hc_solution, {"num_iterations": 10**6}),
+    (get_sahc_solution, {}),
+    (get_sa_solution, {"cooling": 0.99999}),
+    (get_tabu_solution, {"num_iterations": 10**6, "base_tabu_tenure": 5, "max_stagnation": 10**6}),
+    (genetic_algorithm, {"num_generations": 10**6, "population_size": 10}),
+    (island_genetic_algorithm, {"num_generations": 10**6, "population_size": 10, "num_islands": 2, "migration_interval": 5, "max_workers": 2}),
+]
+
+
+# Every solver stops once the evaluation budget is spent, at most one check (one iteration, chunk or epoch) later.
+@pytest.mark.parametrize("solver, solver_args", SOLVERS)
+def test_every_solver_stops_at_the_evaluation_budget(solver, solver_args):
+    package_stream = generate_package_stream(25, 60, rng=46)
+    termination = Termination(max_evaluations=300)
+    route = solver(package_stream=package_stream, rng=47, termination=termination, **solver_args)
+    assert termination.reason == "max_evaluations"
+    assert 300 <= termination.evaluations < 300 + 2000
+    assert sorted(package.id for package in route) == list(range(25))
+
+
+@pytest.mark.parametrize("solver, solver_args", SOLVERS)
+def test_every_solver_stops_at_the_time_limit(solver, solver_args):
+    termination = Termination(time_limit=0.05)
+    solver(package_stream=generate_package_stream(60, 60, rng=48), rng=49, termination=termination, **solver_args)
+    assert termination.reason == "time_limit"
+
+
+# A target score that is already reached stops the search before any move, and an unreached one lets the solver finish.
+def test_target_score_and_own_stopping_rule():
+    package_stream = generate_package_stream(20, 60, rng=50)
+    termination = Termination(target_score=-float("inf"))
+    get_hc_solution(package_stream, 100, rng=51, termination=termination)
+    assert (termination.reason, termination.evaluations) == ("target_score", 0)
+
+    termination = Termination(target_score=0)
+    get_hc_solution(package_stream, 100, rng=51, termination=termination)
+    assert termination.reason == "no_improvement"
+
+
+def test_cancelled_search_stops():
+    termination = Termination(cancelled=lambda: True)
+    get_sa_solution(generate_package_stream(20, 60, rng=52), rng=53, termination=termination)
+    assert (termination.reason, termination.evaluations) == ("cancelled", 0)
@@ -0,0 +1,28 @@
+import pytest
+
+from hill_climbing import get_hc_solution
+from problem import generate_package_stream
+from simulated_annealing import get_sa_solution
+from tracing import ProgressTrace, load_trace
+
+
+@pytest.mark.parametrize("num_samples", [1, 99, 100, 101, 199, 1000, 12345])
+@pytest.mark.parametrize("max_points", [1, 7, 100])
+def test_load_trace_keeps_at_most_max_points(tmp_path, num_samples, max_points):
+    path = tmp_path / "trace.ndjson"
+    with ProgressTrace(path) as trace:
+        for i in range(num_samples):
+            trace.record(-i, -i - 1)
+    points = load_trace(path, max_points)
+    assert min(num_samples, max_points) // 2 <= len(points) <= max_points
+    assert points[0] == (1, 0, -1)
+    assert [point[0] for point in points] == sorted(point[0] for point in points)
+
+
+def test_scores_are_only_kept_when_requested():
+    package_stream = generate_package_stream(15, 60, rng=3)
+    solution, scores = get_sa_solution(package_stream, scores_info=True, rng=4)
+    assert scores and all(best >= current for best, current in scores[-10:])
+    assert get_sa_solution(package_stream, rng=4) == solution
+    solution, scores = get_hc_solution(package_stream, 50, scores_info=True, rng=5)
+    assert len(scores) >= 50